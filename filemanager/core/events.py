@@ -0,0 +1,103 @@
+# core/events.py
+import json
+import logging
+
+from django.conf import settings
+from django.db import transaction
+
+from filemanager.redis_client import get_redis, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ('completed', 'failed')
+
+
+def status_channel(file_id):
+    """Имя канала Redis pub/sub для событий статуса файла"""
+    return f"{settings.FILE_STATUS_CHANNEL_PREFIX}:{file_id}"
+
+
+def status_payload(file):
+    return {
+        'file_id': file.id,
+        'processed': file.processed,
+        'status': file.processing_status,
+    }
+
+
+def publish_file_status(file, **extra):
+    """
+    Публикует смену статуса файла подписчикам (SSE-клиентам).
+
+    Внутри транзакции событие уходит после фиксации: подписчики не должны
+    увидеть статус, который будет откачен.
+    """
+    payload = {**status_payload(file), **extra}
+    transaction.on_commit(lambda: send_status(file.id, payload))
+
+
+def send_status(file_id, payload):
+    try:
+        get_redis().publish(status_channel(file_id), json.dumps(payload))
+    except Exception as e:
+        # Клиенты без событий откатятся на опрос JSON-эндпоинта
+        logger.warning(f"Could not publish status for file {file_id}: {e}")
+
+
+def format_sse(data, event='status'):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def subscribe_file_status(file_id):
+    """
+    Подписка на канал статуса файла или None, если Redis недоступен.
+
+    Выполняется до отправки заголовков ответа: без подписки view отвечает
+    503, и клиент переходит на опрос JSON-эндпоинта.
+    """
+    pubsub = get_async_redis().pubsub()
+    try:
+        await pubsub.subscribe(status_channel(file_id))
+    except Exception as e:
+        logger.warning(f"Could not subscribe to status of file {file_id}: {e}")
+        await pubsub.aclose()
+        return None
+    return pubsub
+
+
+async def stream_file_status(file, pubsub):
+    """
+    Асинхронный генератор SSE-сообщений о статусе файла.
+
+    pubsub уже подписан на канал (subscribe_file_status): статус
+    перечитывается из БД после подписки, чтобы не потерять переход,
+    случившийся между загрузкой строки во view и подпиской. Закрывается
+    после финального статуса.
+    """
+    try:
+        try:
+            await file.arefresh_from_db(fields=['processed', 'processing_status'])
+        except file.DoesNotExist:
+            return
+        current = status_payload(file)
+        yield format_sse(current)
+        if current['status'] in FINAL_STATUSES:
+            return
+
+        while True:
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.FILE_STATUS_SSE_HEARTBEAT,
+            )
+            if message is None:
+                # Комментарий держит соединение открытым через прокси
+                yield ": keep-alive\n\n"
+                continue
+
+            data = json.loads(message['data'])
+            yield format_sse(data, event=data.get('event', 'status'))
+            if data.get('status') in FINAL_STATUSES:
+                return
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.aclose()
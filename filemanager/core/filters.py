@@ -0,0 +1,56 @@
+# core/filters.py
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Exists, OuterRef
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from ml_api.models import ExtractedAmount, ExtractedDate
+
+
+def _parse(params, name, parser):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parser(value)
+    except (ValueError, InvalidOperation):
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: f'Некорректное значение: {value}'})
+    return parsed
+
+
+def filter_by_extracted_values(queryset, params):
+    """
+    Фильтрует файлы по датам и суммам, найденным в тексте.
+
+    Параметры: date_from, date_to (ISO), amount_min, amount_max, currency.
+    Каждое условие - EXISTS по B-tree индексу (value, file) или
+    (currency, amount, file), без чтения JSON результатов.
+    """
+    date_from = _parse(params, 'date_from', parse_date)
+    date_to = _parse(params, 'date_to', parse_date)
+    amount_min = _parse(params, 'amount_min', Decimal)
+    amount_max = _parse(params, 'amount_max', Decimal)
+    currency = params.get('currency', '').upper()
+
+    if date_from or date_to:
+        dates = ExtractedDate.objects.filter(file=OuterRef('pk'))
+        if date_from:
+            dates = dates.filter(value__gte=date_from)
+        if date_to:
+            dates = dates.filter(value__lte=date_to)
+        queryset = queryset.filter(Exists(dates))
+
+    if amount_min is not None or amount_max is not None or currency:
+        amounts = ExtractedAmount.objects.filter(file=OuterRef('pk'))
+        if currency:
+            amounts = amounts.filter(currency=currency)
+        if amount_min is not None:
+            amounts = amounts.filter(amount__gte=amount_min)
+        if amount_max is not None:
+            amounts = amounts.filter(amount__lte=amount_max)
+        queryset = queryset.filter(Exists(amounts))
+
+    return queryset
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.3 on 2026-10-19 12:00
+
+import core.models
+from django.db import migrations, models
+
+
+def backfill_file_metadata(apps, schema_editor):
+    """Однократно заполняет размер и MIME-тип уже загруженных файлов"""
+    import mimetypes
+
+    StoredFile = apps.get_model('core', 'StoredFile')
+    batch = []
+    for stored in StoredFile.objects.only('id', 'file').iterator(chunk_size=500):
+        try:
+            stored.size_bytes = stored.file.size
+        except Exception:
+            stored.size_bytes = 0
+        stored.content_type = mimetypes.guess_type(stored.file.name)[0] or ''
+        batch.append(stored)
+        if len(batch) >= 500:
+            StoredFile.objects.bulk_update(batch, ['size_bytes', 'content_type'])
+            batch = []
+    if batch:
+        StoredFile.objects.bulk_update(batch, ['size_bytes', 'content_type'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_alter_storedfile_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='processed',
+            field=models.BooleanField(default=False, verbose_name='Обработан'),
+        ),
+        migrations.AddField(
+            model_name='storedfile',
+            name='processing_status',
+            field=models.CharField(default='pending', max_length=20, verbose_name='Статус обработки'),
+        ),
+        migrations.AlterField(
+            model_name='storedfile',
+            name='file',
+            field=models.FileField(storage=core.models.OverwriteStorage(), upload_to='uploads/%Y/%m/%d/', verbose_name='Файл'),
+        ),
+        migrations.AddField(
+            model_name='storedfile',
+            name='size_bytes',
+            field=models.BigIntegerField(default=0, verbose_name='Размер, байт'),
+        ),
+        migrations.AddField(
+            model_name='storedfile',
+            name='content_type',
+            field=models.CharField(blank=True, max_length=100, verbose_name='MIME-тип'),
+        ),
+        migrations.AddField(
+            model_name='storedfile',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Количество страниц'),
+        ),
+        migrations.AddIndex(
+            model_name='storedfile',
+            index=models.Index(fields=['user', '-uploaded_at', '-id'], name='core_file_user_uploaded_idx'),
+        ),
+        migrations.RunPython(backfill_file_metadata, migrations.RunPython.noop),
+    ]
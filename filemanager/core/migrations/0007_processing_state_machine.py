@@ -0,0 +1,37 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='storedfile',
+            name='processing_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Версия статуса'),
+        ),
+        migrations.CreateModel(
+            name='FileStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(max_length=20, verbose_name='Исходный статус')),
+                ('to_status', models.CharField(max_length=20, verbose_name='Новый статус')),
+                ('version', models.PositiveIntegerField(verbose_name='Версия статуса')),
+                ('reason', models.CharField(blank=True, max_length=255, verbose_name='Причина')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата перехода')),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='core.storedfile', verbose_name='Файл')),
+            ],
+            options={
+                'verbose_name': 'Переход статуса',
+                'verbose_name_plural': 'История статусов',
+                'ordering': ['file', 'version'],
+                'indexes': [models.Index(fields=['file', 'version'], name='core_status_history_file_idx')],
+            },
+        ),
+    ]
@@ -1,12 +1,15 @@
 # core/models.py
 import os
+import re
 import logging
-from django.db import models
+import mimetypes
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.core.files.storage import FileSystemStorage
 from pathlib import Path
 from django.conf import settings
 from django.utils import timezone
+from .events import publish_file_status
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +19,97 @@ class OverwriteStorage(FileSystemStorage):
             os.remove(os.path.join(settings.MEDIA_ROOT, name))
         return name
 
+
+PDF_OBJECT_RE = re.compile(rb'\bobj\b(.*?)\bendobj\b', re.S)
+PDF_PAGES_RE = re.compile(rb'/Type\s*/Pages\b')
+PDF_COUNT_RE = re.compile(rb'/Count\s+(\d+)')
+PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+
+def count_pages(upload, extension):
+    """Число страниц документа без рендеринга (None, если определить нельзя)"""
+    if extension in ('.png', '.jpg', '.jpeg', '.bmp'):
+        return 1
+    if extension != '.pdf':
+        return None
+    try:
+        upload.seek(0)
+        content = upload.read()
+        upload.seek(0)
+    except Exception as e:
+        logger.warning(f"Could not read upload to count pages: {e}")
+        return None
+    # Корневой узел /Pages хранит общее число страниц; иначе считаем объекты /Page.
+    # Для PDF со сжатыми потоками объектов вернётся None - число страниц
+    # уточнится при обработке
+    counts = []
+    for body in PDF_OBJECT_RE.findall(content):
+        if PDF_PAGES_RE.search(body):
+            match = PDF_COUNT_RE.search(body)
+            if match:
+                counts.append(int(match.group(1)))
+    if counts:
+        return max(counts)
+    return len(PDF_PAGE_RE.findall(content)) or None
+
+
+# Допустимые переходы статуса обработки: целевой статус -> исходные.
+# В processing можно перейти из любого статуса: повторная доставка задачи
+# забирает файл себе, а завершение устаревшей задачи отклоняется по версии
+STATUS_TRANSITIONS = {
+    'pending': ('pending', 'processing', 'completed', 'failed'),
+    'processing': ('pending', 'processing', 'completed', 'failed'),
+    'completed': ('processing',),
+    'failed': ('processing',),
+}
+
+
+def status_updates(to_status):
+    """Значения колонок статуса для UPDATE перехода в to_status"""
+    updates = {
+        'processing_status': to_status,
+        'processing_version': models.F('processing_version') + 1,
+    }
+    if to_status == 'completed':
+        updates['processed'] = True
+    elif to_status == 'pending':
+        updates['processed'] = False
+    return updates
+
+
+class StoredFileQuerySet(models.QuerySet):
+    def transition(self, to_status, reason=''):
+        """
+        Массовый переход статуса для файлов выборки.
+
+        Подходят только файлы в допустимом исходном статусе; строки
+        блокируются, обновляются одним UPDATE, и для каждой в историю
+        пишется переход. Возвращает id перешедших файлов.
+        """
+        from_statuses = STATUS_TRANSITIONS[to_status]
+        with transaction.atomic():
+            rows = list(
+                self.filter(processing_status__in=from_statuses)
+                .select_for_update()
+                .values_list('id', 'processing_status', 'processing_version')
+            )
+            if not rows:
+                return []
+            ids = [file_id for file_id, _, _ in rows]
+            StoredFile.objects.filter(id__in=ids, processing_status__in=from_statuses).update(
+                **status_updates(to_status)
+            )
+            FileStatusHistory.objects.bulk_create([
+                FileStatusHistory(file_id=file_id, from_status=from_status, to_status=to_status,
+                                  version=version + 1, reason=reason)
+                for file_id, from_status, version in rows
+            ], batch_size=500)
+        return ids
+
+
 class StoredFile(models.Model):
+    objects = StoredFileQuerySet.as_manager()
+
     user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Пользователь')
     file = models.FileField(
         upload_to='uploads/%Y/%m/%d/',
@@ -27,11 +120,19 @@ class StoredFile(models.Model):
     description = models.CharField(max_length=100, blank=True, verbose_name='Описание')
     processed = models.BooleanField(default=False, verbose_name='Обработан')
     processing_status = models.CharField(max_length=20, default='pending', verbose_name='Статус обработки')
+    processing_version = models.PositiveIntegerField(default=0, verbose_name='Версия статуса')
+    size_bytes = models.BigIntegerField(default=0, verbose_name='Размер, байт')
+    content_type = models.CharField(max_length=100, blank=True, verbose_name='MIME-тип')
+    page_count = models.PositiveIntegerField(null=True, blank=True, verbose_name='Количество страниц')
 
     class Meta:
         verbose_name = 'Файл'
         verbose_name_plural = 'Файлы'
         ordering = ['-uploaded_at']
+        indexes = [
+            # Keyset-пагинация списка файлов: (user, -uploaded_at, -id)
+            models.Index(fields=['user', '-uploaded_at', '-id'], name='core_file_user_uploaded_idx'),
+        ]
 
     def __str__(self):
         return self.filename()
@@ -48,18 +149,78 @@ class StoredFile(models.Model):
     def is_text(self):
         return self.extension() in settings.SUPPORTED_TEXT_TYPES
 
-    def mark_processing(self):
-        self.processing_status = 'processing'
-        self.save()
+    def populate_file_metadata(self):
+        """Заполняет размер, MIME-тип и число страниц из только что загруженного файла"""
+        upload = self.file.file
+        self.size_bytes = upload.size or 0
+        self.content_type = (
+            getattr(upload, 'content_type', None)
+            or mimetypes.guess_type(self.file.name)[0]
+            or ''
+        )[:100]
+        self.page_count = count_pages(upload, self.extension())
+
+    def save(self, *args, **kwargs):
+        # Метаданные снимаются только с нового (ещё не сохранённого в хранилище)
+        # файла, чтобы список файлов не делал stat()/HEAD на каждую строку
+        if self.file and not self.file._committed:
+            self.populate_file_metadata()
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'file', 'description'} & set(update_fields):
+            SearchDocument.index_title(self)
+
+    def transition(self, to_status, reason=''):
+        """
+        Переводит файл в to_status одним условным UPDATE.
+
+        Обновление проходит, только если в БД все еще тот статус и та версия,
+        что видел вызывающий код; меняются только колонки статуса, поэтому
+        параллельная замена файла не перезаписывается. Возвращает False,
+        если файл уже изменен другим процессом.
+        """
+        from_status = self.processing_status
+        if from_status not in STATUS_TRANSITIONS[to_status]:
+            logger.warning(f"File {self.pk}: transition {from_status} -> {to_status} is not allowed")
+            return False
+
+        with transaction.atomic():
+            updated = StoredFile.objects.filter(
+                pk=self.pk, processing_status=from_status, processing_version=self.processing_version,
+            ).update(**status_updates(to_status))
+            if not updated:
+                logger.info(f"File {self.pk}: stale transition to {to_status} skipped (version {self.processing_version})")
+                return False
+            FileStatusHistory.objects.create(
+                file_id=self.pk, from_status=from_status, to_status=to_status,
+                version=self.processing_version + 1, reason=reason,
+            )
+
+        self.processing_status = to_status
+        self.processing_version += 1
+        if to_status == 'completed':
+            self.processed = True
+        elif to_status == 'pending':
+            self.processed = False
+        publish_file_status(self)
+        return True
 
-    def mark_completed(self):
-        self.processed = True
-        self.processing_status = 'completed'
-        self.save()
+    def is_current(self):
+        """Не сменилась ли версия статуса с момента загрузки экземпляра"""
+        return StoredFile.objects.filter(pk=self.pk, processing_version=self.processing_version).exists()
 
-    def mark_failed(self):
-        self.processing_status = 'failed'
-        self.save()
+    def mark_pending(self, reason=''):
+        return self.transition('pending', reason)
+
+    def mark_processing(self, reason=''):
+        return self.transition('processing', reason)
+
+    def mark_completed(self, reason=''):
+        return self.transition('completed', reason)
+
+    def mark_failed(self, reason=''):
+        return self.transition('failed', reason)
 
     def delete(self, *args, **kwargs):
         if self.file:
@@ -67,4 +228,74 @@ class StoredFile(models.Model):
                 os.remove(self.file.path)
             except Exception as e:
                 logger.error(f"Error deleting file {self.file.path}: {e}")
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        super().delete(*args, **kwargs)
+
+
+class FileStatusHistory(models.Model):
+    """Журнал переходов статуса обработки файла"""
+    file = models.ForeignKey(StoredFile, on_delete=models.CASCADE, related_name='status_history',
+                             verbose_name='Файл')
+    from_status = models.CharField(max_length=20, verbose_name='Исходный статус')
+    to_status = models.CharField(max_length=20, verbose_name='Новый статус')
+    version = models.PositiveIntegerField(verbose_name='Версия статуса')
+    reason = models.CharField(max_length=255, blank=True, verbose_name='Причина')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата перехода')
+
+    class Meta:
+        verbose_name = 'Переход статуса'
+        verbose_name_plural = 'История статусов'
+        ordering = ['file', 'version']
+        indexes = [
+            models.Index(fields=['file', 'version'], name='core_status_history_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.file_id}: {self.from_status} -> {self.to_status}"
+
+
+class SearchDocument(models.Model):
+    """
+    Поисковый документ файла: имя, описание и извлеченный текст.
+
+    Полнотекстовый индекс создается миграцией в зависимости от СУБД:
+    в PostgreSQL - генерируемая колонка search_vector (tsvector, словари
+    russian и english) с GIN-индексом, в SQLite - внешняя таблица FTS5
+    core_searchdocument_fts, синхронизируемая триггерами.
+    """
+    file = models.OneToOneField(StoredFile, on_delete=models.CASCADE, primary_key=True,
+                                related_name='search_document', verbose_name='Файл')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Пользователь')
+    title = models.CharField(max_length=400, blank=True, verbose_name='Заголовок')
+    body = models.TextField(blank=True, verbose_name='Текст')
+    language = models.CharField(max_length=10, blank=True, verbose_name='Язык')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Дата обновления')
+
+    class Meta:
+        verbose_name = 'Поисковый документ'
+        verbose_name_plural = 'Поисковые документы'
+
+    @staticmethod
+    def title_for(file):
+        return f"{file.filename()} {file.description}".strip()
+
+    @classmethod
+    def index_title(cls, file):
+        """Обновляет заголовок документа одним INSERT ... ON CONFLICT"""
+        cls.objects.bulk_create(
+            [cls(file=file, user_id=file.user_id, title=cls.title_for(file), updated_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['file'],
+            update_fields=['user', 'title', 'updated_at'],
+        )
+
+    @classmethod
+    def index_text(cls, file, text, language=''):
+        """Добавляет в индекс извлеченный при обработке текст"""
+        body = text[:settings.SEARCH_MAX_BODY_CHARS]
+        cls.objects.bulk_create(
+            [cls(file=file, user_id=file.user_id, title=cls.title_for(file),
+                 body=body, language=language, updated_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['file'],
+            update_fields=['user', 'title', 'body', 'language', 'updated_at'],
+        )
\ No newline at end of file
@@ -0,0 +1,78 @@
+# core/pagination.py
+import base64
+import binascii
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """Кодирует значения ключа последней строки страницы в непрозрачный курсор"""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Обратное преобразование курсора в список значений ключа"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    if not isinstance(values, list) or len(values) != 2:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+    return values
+
+
+class KeysetPage:
+    """Страница keyset-пагинации: строки и курсор следующей страницы"""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def paginate_keyset(queryset, cursor=None, page_size=50, date_field='uploaded_at'):
+    """
+    Keyset-пагинация по (date_field DESC, id DESC).
+
+    Вместо OFFSET следующая страница начинается строго после последней
+    строки предыдущей, поэтому стоимость запроса не зависит от глубины
+    страницы при наличии составного индекса (..., -date_field, -id).
+    """
+    queryset = queryset.order_by(f'-{date_field}', '-id')
+
+    if cursor:
+        raw_date, last_id = decode_cursor(cursor)
+        last_date = parse_datetime(raw_date) if isinstance(raw_date, str) else None
+        if last_date is None or not isinstance(last_id, int):
+            raise InvalidCursor(f"Invalid cursor: {cursor!r}")
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__lt': last_date})
+            | Q(**{date_field: last_date, 'id__lt': last_id})
+        )
+
+    # Одна лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, date_field).isoformat(), last.id])
+
+    return KeysetPage(rows, next_cursor)
@@ -0,0 +1,159 @@
+# core/search.py
+import html
+import logging
+import re
+
+from django.db import connection
+
+from .models import SearchDocument
+
+logger = logging.getLogger(__name__)
+
+# Маркеры подсветки из области Private Use: не встречаются в тексте и
+# позволяют экранировать фрагмент целиком, оставив только <mark>
+HL_START = '\ue000'
+HL_STOP = '\ue001'
+SNIPPET_WORDS = 16
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+POSTGRES_QUERY = "(websearch_to_tsquery('russian', %s) || websearch_to_tsquery('english', %s))"
+
+POSTGRES_COUNT_SQL = f"""
+    SELECT count(*) FROM core_searchdocument d
+    WHERE d.user_id = %s AND d.search_vector @@ {POSTGRES_QUERY}
+"""
+
+# Фрагменты ts_headline строятся только для строк текущей страницы
+POSTGRES_PAGE_SQL = f"""
+    SELECT page.file_id, page.rank,
+           ts_headline(
+               CASE WHEN page.language = 'en' THEN 'english'::regconfig ELSE 'russian'::regconfig END,
+               CASE WHEN page.body <> '' THEN page.body ELSE page.title END,
+               {POSTGRES_QUERY},
+               %s
+           )
+    FROM (
+        SELECT d.file_id, d.title, d.body, d.language,
+               ts_rank_cd(d.search_vector, {POSTGRES_QUERY}) AS rank
+        FROM core_searchdocument d
+        WHERE d.user_id = %s AND d.search_vector @@ {POSTGRES_QUERY}
+        ORDER BY rank DESC, d.file_id DESC
+        LIMIT %s OFFSET %s
+    ) page
+    ORDER BY page.rank DESC, page.file_id DESC
+"""
+
+SQLITE_COUNT_SQL = """
+    SELECT count(*) FROM core_searchdocument_fts
+    JOIN core_searchdocument d ON d.file_id = core_searchdocument_fts.rowid
+    WHERE core_searchdocument_fts MATCH %s AND d.user_id = %s
+"""
+
+# bm25: меньше - лучше; заголовок весит больше текста
+SQLITE_PAGE_SQL = f"""
+    SELECT d.file_id, -bm25(core_searchdocument_fts, 10.0, 1.0) AS rank,
+           snippet(core_searchdocument_fts, -1, %s, %s, '…', {SNIPPET_WORDS})
+    FROM core_searchdocument_fts
+    JOIN core_searchdocument d ON d.file_id = core_searchdocument_fts.rowid
+    WHERE core_searchdocument_fts MATCH %s AND d.user_id = %s
+    ORDER BY bm25(core_searchdocument_fts, 10.0, 1.0), d.file_id DESC
+    LIMIT %s OFFSET %s
+"""
+
+
+def render_snippet(snippet):
+    """Экранирует фрагмент текста и превращает маркеры в <mark>"""
+    escaped = html.escape(snippet or '')
+    return escaped.replace(HL_START, '<mark>').replace(HL_STOP, '</mark>')
+
+
+def fts5_query(query):
+    """Запрос пользователя -> безопасное выражение FTS5 (все слова, по префиксу)"""
+    words = WORD_RE.findall(query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchHit:
+    def __init__(self, file_id, rank, snippet):
+        self.file_id = file_id
+        self.rank = float(rank or 0)
+        self.snippet = render_snippet(snippet)
+
+
+class SearchResults:
+    """
+    Ленивая выборка результатов поиска для Paginator.
+
+    count() выполняет один COUNT по индексу, срез - один ранжированный
+    запрос с LIMIT/OFFSET и подсветкой только для строк страницы.
+    """
+
+    def __init__(self, user, query):
+        self.user = user
+        self.query = query.strip()
+        self.vendor = connection.vendor
+        self._count = None
+
+    def _fts5(self):
+        return fts5_query(self.query)
+
+    def count(self):
+        if self._count is None:
+            self._count = self._execute_count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            raise TypeError('SearchResults supports only slicing')
+        offset = item.start or 0
+        limit = (item.stop - offset) if item.stop is not None else self.count() - offset
+        if limit <= 0:
+            return []
+        return self._execute_page(limit, offset)
+
+    def _execute_count(self):
+        if not self.query:
+            return 0
+        with connection.cursor() as cursor:
+            if self.vendor == 'postgresql':
+                cursor.execute(POSTGRES_COUNT_SQL, [self.user.id, self.query, self.query])
+            elif self.vendor == 'sqlite':
+                if not self._fts5():
+                    return 0
+                cursor.execute(SQLITE_COUNT_SQL, [self._fts5(), self.user.id])
+            else:
+                return self._fallback_queryset().count()
+            return cursor.fetchone()[0]
+
+    def _execute_page(self, limit, offset):
+        if not self.query:
+            return []
+        with connection.cursor() as cursor:
+            if self.vendor == 'postgresql':
+                options = (
+                    f'StartSel={HL_START}, StopSel={HL_STOP}, '
+                    f'MaxWords={SNIPPET_WORDS}, MinWords=5, MaxFragments=2'
+                )
+                cursor.execute(POSTGRES_PAGE_SQL, [
+                    self.query, self.query, options,
+                    self.query, self.query, self.user.id, self.query, self.query,
+                    limit, offset,
+                ])
+            elif self.vendor == 'sqlite':
+                if not self._fts5():
+                    return []
+                cursor.execute(SQLITE_PAGE_SQL, [
+                    HL_START, HL_STOP, self._fts5(), self.user.id, limit, offset,
+                ])
+            else:
+                rows = self._fallback_queryset().values_list('file_id', 'title')[offset:offset + limit]
+                return [SearchHit(file_id, 0, title) for file_id, title in rows]
+            return [SearchHit(*row) for row in cursor.fetchall()]
+
+    def _fallback_queryset(self):
+        logger.warning(f"Full-text search is not supported on {self.vendor}, using LIKE")
+        return SearchDocument.objects.filter(user=self.user, title__icontains=self.query).order_by('-file_id')
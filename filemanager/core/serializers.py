@@ -3,12 +3,13 @@ from .models import StoredFile
 
 class FileSerializer(serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
-    uploaded_at = serializers.DateTimeField(format='%d.%m.%Y %H:%M')
+    uploaded_at = serializers.DateTimeField(format='%d.%m.%Y %H:%M', read_only=True)
 
     class Meta:
         model = StoredFile
         fields = '__all__'
-        read_only_fields = ('user', 'uploaded_at')
+        read_only_fields = ('user', 'uploaded_at', 'size_bytes', 'content_type', 'page_count',
+                            'processed', 'processing_status', 'processing_version')
 
     def get_file_url(self, obj):
         return obj.file.url if obj.file else None
\ No newline at end of file
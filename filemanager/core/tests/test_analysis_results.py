@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from core.models import StoredFile
+from ml_api.models import AnalysisResult, AnalysisEntity
+
+
+class AnalysisResultStoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.file = StoredFile.objects.create(user=self.user, file='test.txt')
+        self.result = {
+            'status': 'success',
+            'type': 'ner',
+            'data': {
+                'text': 'ООО Ромашка, Москва. ' * 200,
+                'language': 'ru',
+                'entities': [
+                    {'text': 'Ромашка', 'type': 'ORG', 'start': 4, 'end': 11},
+                    {'text': 'Москва', 'type': 'LOC', 'start': 13, 'end': 19},
+                ],
+                'sentiment': 'neutral',
+                'keywords': ['Ромашка'],
+            },
+            'metadata': {'model': 'ru_core_news_sm'},
+        }
+
+    def test_store_result(self):
+        """Тест сохранения заголовка, сжатого текста и сущностей"""
+        header = AnalysisResult.objects.store(self.file, self.result, pipeline_version='1.0')
+
+        self.assertEqual(header.entity_count, 2)
+        self.assertEqual(header.text_length, len(self.result['data']['text']))
+        self.assertLess(len(header.text_payload.data), header.text_payload.size)
+        self.assertEqual(AnalysisResult.objects.get().text, self.result['data']['text'])
+        self.assertEqual(
+            AnalysisEntity.objects.filter(file=self.file, entity_type='ORG').count(), 1
+        )
+
+    def test_header_listing_skips_payload(self):
+        """Тест: список заголовков не читает текст и сущности"""
+        AnalysisResult.objects.store(self.file, self.result, pipeline_version='1.0')
+
+        with self.assertNumQueries(1):
+            headers = list(AnalysisResult.objects.filter(file=self.file))
+        self.assertEqual(headers[0].language, 'ru')
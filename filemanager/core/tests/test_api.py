@@ -1,7 +1,8 @@
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.contrib.auth.models import User
-from core.models import StoredFile  # Изменено с .models
+from django.core.files.uploadedfile import SimpleUploadedFile
+from core.models import StoredFile, SearchDocument  # Изменено с .models
 
 class FileAPITests(APITestCase):
     def setUp(self):
@@ -19,8 +20,46 @@ class FileAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
 
+    def test_file_upload_api(self):
+        """Тест загрузки файла через API (используется нагрузочным прогоном)"""
+        response = self.client.post('/api/files/', {
+            'file': SimpleUploadedFile('upload.txt', 'Договор поставки'.encode('utf-8')),
+            'description': 'loadtest',
+        }, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(StoredFile.objects.get(id=response.data['id']).user, self.user)
+
     def test_file_search(self):
         """Тест поиска по описанию"""
         response = self.client.get('/api/files/?search=Test')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)
+
+class FileFullTextSearchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.invoice = StoredFile.objects.create(user=self.user, file='invoice.pdf')
+        self.letter = StoredFile.objects.create(user=self.user, file='letter.txt')
+        SearchDocument.index_text(self.invoice, 'Счет на оплату от компании Ромашка за поставку <b>товара</b>', 'ru')
+        SearchDocument.index_text(self.letter, 'Письмо партнерам о новой поставке', 'ru')
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        foreign = StoredFile.objects.create(user=other, file='foreign.txt')
+        SearchDocument.index_text(foreign, 'Ромашка', 'ru')
+
+    def test_search_extracted_text(self):
+        """Тест поиска по извлеченному тексту только среди своих файлов"""
+        response = self.client.get('/api/files/?search=Ромашка')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        result = response.data['results'][0]
+        self.assertEqual(result['id'], self.invoice.id)
+        self.assertIn('<mark>Ромашка</mark>', result['snippet'])
+        self.assertNotIn('<b>', result['snippet'])
+
+    def test_search_pagination(self):
+        """Тест постраничной выдачи результатов поиска"""
+        response = self.client.get('/api/files/?search=постав')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['results']), 2)
@@ -0,0 +1,39 @@
+import tempfile
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from ml_api.benchmarks import corpus
+from ml_api.benchmarks.suite import Case, compare, run_suite
+from ml_api.extraction import extract_dates, extract_money
+
+
+class BenchmarkSuiteTests(SimpleTestCase):
+    def test_corpus_is_deterministic(self):
+        """Тест: корпус одинаков между запусками и содержит даты и суммы"""
+        text = corpus.make_text('ru', 5000)
+        self.assertEqual(text, corpus.make_text('ru', 5000))
+        self.assertGreaterEqual(len(text), 5000)
+        self.assertTrue(extract_dates(text))
+        self.assertTrue(extract_money(text))
+
+    def test_case_runs_in_isolated_process(self):
+        """Тест: случай замеряется, недоступные зависимости пропускаются"""
+        cases = [
+            Case('dates', lambda workdir: ('01.02.2024 ' * 100,), extract_dates, 1100, 'chars'),
+            Case('needs-poppler', lambda workdir: (), lambda: None, 1, 'files', ('poppler',)),
+        ]
+        with tempfile.TemporaryDirectory() as workdir, \
+                patch('ml_api.benchmarks.suite.shutil.which', return_value=None):
+            results = run_suite(cases, workdir, repeat=2, warmup=0)
+        self.assertEqual(results['needs-poppler'], {'skipped': 'poppler is not available'})
+        self.assertEqual(results['dates']['repeat'], 2)
+        self.assertGreater(results['dates']['throughput'], 0)
+        self.assertGreater(results['dates']['peak_rss_bytes'], 0)
+
+    def test_regressions_against_baseline(self):
+        """Тест: рост медианы или памяти сверх допуска - регрессия"""
+        baseline = {'cases': {'a': {'median_s': 1.0, 'peak_rss_bytes': 100}}}
+        self.assertEqual(compare({'a': {'median_s': 1.2, 'peak_rss_bytes': 100}}, baseline, 0.25), [])
+        regressions = compare({'a': {'median_s': 1.5, 'peak_rss_bytes': 100}, 'b': {'median_s': 9}},
+                              baseline, 0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('a: median_s', regressions[0])
@@ -0,0 +1,61 @@
+from unittest.mock import patch
+import fakeredis
+from django.test import SimpleTestCase
+from ml_api import services
+from ml_api.checkpoints import StageCheckpoint
+from ml_api.services import STAGE_VERSIONS, extract_text_from_pdf
+
+
+class StageCheckpointTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.checkpoint = StageCheckpoint('abc123', STAGE_VERSIONS, redis=self.redis, ttl=60)
+
+    def test_completed_stage_is_not_recomputed(self):
+        """Тест: завершенный этап берется из контрольной точки"""
+        calls = []
+        compute = lambda: calls.append(1) or {'status': 'success', 'data': {'text': 'текст'}}
+        first = self.checkpoint.run('analysis', compute)
+        second = StageCheckpoint('abc123', STAGE_VERSIONS, redis=self.redis).run('analysis', compute)
+        self.assertEqual(first, second)
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_are_not_checkpointed(self):
+        """Тест: ошибочный результат не сохраняется"""
+        self.checkpoint.run('analysis', lambda: {'status': 'error', 'message': 'boom'})
+        self.assertIsNone(self.checkpoint.load('analysis'))
+
+    def test_stage_version_change_invalidates(self):
+        """Тест: новая версия этапа не видит старых данных"""
+        self.checkpoint.save('text', 'старый текст')
+        bumped = StageCheckpoint('abc123', {**STAGE_VERSIONS, 'text': '2'}, redis=self.redis)
+        self.assertIsNone(bumped.load('text'))
+
+    def test_pdf_resumes_from_completed_pages(self):
+        """Тест: повторное извлечение PDF распознает только недостающие страницы"""
+        ocr_calls = []
+
+        def failing_ocr(path, number):
+            ocr_calls.append(number)
+            if number == 3:
+                raise RuntimeError('tesseract crashed')
+            return f'страница {number}'
+
+        with patch.object(services, 'pdf_page_count', return_value=4), \
+                patch.object(services, 'ocr_pdf_page', side_effect=failing_ocr):
+            self.assertIsNone(extract_text_from_pdf('doc.pdf', checkpoint=self.checkpoint))
+
+        ocr_calls.clear()
+        with patch.object(services, 'pdf_page_count', return_value=4), \
+                patch.object(services, 'ocr_pdf_page', side_effect=lambda path, number: ocr_calls.append(number) or f'страница {number}'):
+            text = extract_text_from_pdf('doc.pdf', checkpoint=self.checkpoint)
+
+        self.assertEqual(ocr_calls, [3, 4])
+        self.assertEqual(text, '\n\n'.join(f'Page {n}:\nстраница {n}' for n in range(1, 5)))
+
+    def test_clear_removes_all_stages(self):
+        """Тест: после успеха контрольные точки удаляются"""
+        self.checkpoint.save('text', 'текст')
+        self.checkpoint.save_page(1, 'страница')
+        self.checkpoint.clear()
+        self.assertEqual(self.redis.keys('checkpoint:*'), [])
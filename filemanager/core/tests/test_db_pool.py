@@ -0,0 +1,64 @@
+from unittest.mock import patch
+from django.db import connections
+from django.test import SimpleTestCase
+from prometheus_client import CollectorRegistry
+from filemanager.db import PoolCollector, configure_database
+
+POSTGRES = {'ENGINE': 'django_prometheus.db.backends.postgresql', 'NAME': 'filemanager'}
+
+
+class FakePool:
+    def get_stats(self):
+        return {'pool_max': 10, 'pool_size': 6, 'pool_available': 1, 'requests_waiting': 4,
+                'requests_queued': 12, 'requests_wait_ms': 2500, 'requests_errors': 1}
+
+
+class ConfigureDatabaseTests(SimpleTestCase):
+    @patch('filemanager.db.django.VERSION', (5, 2, 3, 'final', 0))
+    def test_pool_mode(self):
+        """Тест: режим пула ограничивает размер и отключает CONN_MAX_AGE"""
+        config = configure_database(POSTGRES, env={'DB_POOL_MAX_SIZE': '8'})
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['pool']['max_size'], 8)
+        self.assertIn('check', config['OPTIONS']['pool'])
+
+    @patch('filemanager.db.django.VERSION', (5, 0, 6, 'final', 0))
+    def test_pool_falls_back_on_old_django(self):
+        """Тест: на Django < 5.1 без пула соединения не удерживаются гринлетами"""
+        config = configure_database(POSTGRES, env={})
+        self.assertNotIn('pool', config['OPTIONS'])
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+
+        with self.assertRaises(ValueError):
+            configure_database(POSTGRES, env={'DB_CONNECTION_MODE': 'pool'})
+
+    def test_pgbouncer_mode(self):
+        """Тест: режим PgBouncer отключает серверные курсоры и подготовленные выражения"""
+        config = configure_database(POSTGRES, mode='pgbouncer', env={})
+        self.assertTrue(config['DISABLE_SERVER_SIDE_CURSORS'])
+        self.assertIsNone(config['OPTIONS']['prepare_threshold'])
+        self.assertNotIn('pool', config['OPTIONS'])
+
+    def test_other_engines_untouched(self):
+        """Тест: настройки SQLite не меняются"""
+        sqlite = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'db.sqlite3'}
+        self.assertEqual(configure_database(sqlite, env={}), sqlite)
+
+    def test_unknown_mode(self):
+        """Тест: неизвестный режим отклоняется"""
+        with self.assertRaises(ValueError):
+            configure_database(POSTGRES, mode='transaction', env={})
+
+
+class PoolCollectorTests(SimpleTestCase):
+    def test_saturation_metrics(self):
+        """Тест: метрики заполненности читаются из статистики пула"""
+        registry = CollectorRegistry()
+        registry.register(PoolCollector())
+        wrapper = type(connections['default'])
+        with patch.object(wrapper, '_connection_pools', {'default': FakePool()}, create=True):
+            sample = lambda name, **labels: registry.get_sample_value(name, {'alias': 'default', **labels})
+            self.assertEqual(sample('db_pool_connections', state='in_use'), 5)
+            self.assertEqual(sample('db_pool_connections', state='idle'), 1)
+            self.assertEqual(sample('db_pool_requests_waiting'), 4)
+            self.assertEqual(sample('db_pool_wait_seconds_total'), 2.5)
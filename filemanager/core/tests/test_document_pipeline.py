@@ -0,0 +1,74 @@
+from unittest.mock import patch
+import fakeredis
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from core.models import StoredFile
+from filemanager.celery import app as celery_app
+from ml_api import tasks
+from ml_api.checkpoints import StageCheckpoint, file_content_hash
+from ml_api.models import AnalysisResult
+from ml_api.services import STAGE_VERSIONS
+from ml_api.status import fetch_file_states
+
+
+def fake_ner(text):
+    return {'status': 'success', 'type': 'ner', 'data': {'text': text, 'language': 'ru', 'entities': []},
+            'metadata': {}}
+
+
+class DocumentPipelineTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='pipeline', password='pass')
+        self.file = StoredFile.objects.create(
+            user=self.user, file=SimpleUploadedFile('scan.pdf', b'%PDF-1.4 fake')
+        )
+        self.redis = fakeredis.FakeRedis()
+        for target in ('ml_api.checkpoints.get_redis', 'ml_api.progress.get_redis', 'core.events.get_redis'):
+            patcher = patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for name, value in (
+            ('pdf_page_count', lambda path: 3),
+            ('process_text', fake_ner),
+            ('record_processing_result', lambda *args: None),
+        ):
+            patcher = patch.object(tasks, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Настройки Celery читаются из Django с префиксом CELERY_
+        celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=True)
+        self.addCleanup(celery_app.conf.update, CELERY_TASK_ALWAYS_EAGER=False)
+
+    def test_pages_fan_out_and_join(self):
+        """Тест: страницы распознаются отдельными задачами и склеиваются по порядку"""
+        # Первая страница уже распознана прошлой попыткой
+        StageCheckpoint(file_content_hash(self.file.file.path), STAGE_VERSIONS).save_page(1, 'первая')
+        recognized = []
+
+        def ocr(path, number):
+            recognized.append(number)
+            return f'страница {number}'
+
+        with patch.object(tasks, 'ocr_pdf_page', ocr):
+            dispatched = tasks.process_file_task.apply(args=[self.file.id, self.user.id]).get()
+
+        self.assertEqual(dispatched['status'], 'processing')
+        self.assertEqual(dispatched['pages'], 3)
+        self.assertEqual(sorted(recognized), [2, 3])
+
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.processing_status, 'completed')
+        result = AnalysisResult.objects.get(file=self.file)
+        self.assertEqual(
+            result.text_payload.text,
+            'Page 1:\nпервая\n\nPage 2:\nстраница 2\n\nPage 3:\nстраница 3',
+        )
+        self.assertEqual(self.redis.keys('checkpoint:*'), [])
+
+    def test_progress_in_batch_status(self):
+        """Тест: пакетный статус показывает прогресс по страницам"""
+        tasks.start_progress(self.file.id, 10, done=3)
+        StoredFile.objects.filter(id=self.file.id).update(processing_status='processing')
+        state = fetch_file_states(self.user, [self.file.id])[self.file.id]
+        self.assertEqual((state['pages_done'], state['pages_total']), (3, 10))
@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from core.models import StoredFile
+from ml_api.entities import normalize_entity
+from ml_api.models import AnalysisResult, EntityTerm
+
+
+def ner_result(*entities):
+    return {
+        'status': 'success',
+        'type': 'ner',
+        'data': {'text': 'ООО Ромашка, Москва', 'language': 'ru', 'entities': list(entities)},
+    }
+
+
+class EntityIndexTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.first = StoredFile.objects.create(user=self.user, file='first.txt')
+        self.second = StoredFile.objects.create(user=self.user, file='second.txt')
+        self.moscow = {'text': 'Москвы', 'lemma': 'Москва', 'type': 'LOC', 'start': 13, 'end': 19}
+        self.romashka = {'text': 'Ромашка', 'lemma': 'ромашка', 'type': 'ORG', 'start': 4, 'end': 11}
+
+    def test_normalize_entity(self):
+        """Тест нормализации: регистр, ё, пунктуация и пробелы"""
+        self.assertEqual(normalize_entity('  ООО «Ёлка»,  Москва '), 'ооо елка москва')
+
+    def test_counts_maintained_incrementally(self):
+        """Тест пересчета счетчиков при повторном анализе и удалении файла"""
+        AnalysisResult.objects.store(
+            self.first, ner_result(self.moscow, self.moscow, self.romashka), pipeline_version='1.0'
+        )
+        AnalysisResult.objects.store(self.second, ner_result(self.moscow), pipeline_version='1.0')
+
+        term = EntityTerm.objects.get(norm='москва')
+        self.assertEqual((term.file_count, term.mention_count), (2, 3))
+
+        # Повторный анализ заменяет упоминания файла, а не добавляет их
+        AnalysisResult.objects.store(self.first, ner_result(self.moscow), pipeline_version='1.0')
+        term.refresh_from_db()
+        self.assertEqual((term.file_count, term.mention_count), (2, 2))
+        self.assertEqual(EntityTerm.objects.get(norm='ромашка').file_count, 0)
+
+        self.second.delete()
+        term.refresh_from_db()
+        self.assertEqual((term.file_count, term.mention_count), (1, 1))
+
+    def test_prefix_lookup_api(self):
+        """Тест поиска сущностей по префиксу и списка файлов с позициями"""
+        AnalysisResult.objects.store(self.first, ner_result(self.moscow, self.romashka), pipeline_version='1.0')
+
+        response = self.client.get(reverse('entity_terms'), {'q': 'МОСК', 'type': 'loc'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['norm'] for r in results], ['москва'])
+
+        response = self.client.get(reverse('entity_term_files', args=[results[0]['id']]))
+        files = response.json()['files']
+        self.assertEqual(files[0]['file_id'], self.first.id)
+        self.assertEqual(files[0]['mentions'], [{'text': 'Москвы', 'start': 13, 'end': 19}])
@@ -0,0 +1,78 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import StoredFile
+from ml_api.extraction import extract_dates, extract_money
+from ml_api.models import AnalysisResult
+
+
+def stored_result(file, text):
+    result = {
+        'status': 'success',
+        'type': 'ner',
+        'data': {'text': text, 'dates': extract_dates(text), 'amounts': extract_money(text)},
+    }
+    return AnalysisResult.objects.store(file, result, pipeline_version='1.1')
+
+
+class ExtractionTests(SimpleTestCase):
+    def test_dates_normalized(self):
+        """Тест приведения дат к ISO и отбрасывания несуществующих дат"""
+        dates = extract_dates('Счет от 15 марта 2024, оплата до 01.04.24; 31.02.2024')
+        self.assertEqual([d['value'] for d in dates], ['2024-03-15', '2024-04-01'])
+        self.assertEqual(dates[0]['raw'], '15 марта 2024')
+
+    def test_money_normalized(self):
+        """Тест разбора сумм с разделителями разрядов, множителями и валютами"""
+        amounts = extract_money('Итого 150 000 руб, аванс $1,500.50 и 2,5 млн евро')
+        self.assertEqual(
+            [(a['amount'], a['currency']) for a in amounts],
+            [('150000.00', 'RUB'), ('1500.50', 'USD'), ('2500000.00', 'EUR')],
+        )
+
+    def test_money_separators_and_overlaps(self):
+        """Тест: точка как разделитель разрядов, одна сумма при двух валютах"""
+        amounts = extract_money('сумма 1.000.000 руб')
+        self.assertEqual([(a['raw'], a['amount']) for a in amounts], [('1.000.000 руб', '1000000.00')])
+        amounts = extract_money('$100 руб')
+        self.assertEqual([(a['raw'], a['amount'], a['currency']) for a in amounts], [('$100', '100.00', 'USD')])
+
+    def test_money_too_large_is_skipped(self):
+        """Тест: числа больше поля суммы (номера, реквизиты) не считаются суммами"""
+        self.assertEqual(extract_money('номер 123456789012345678901234567 руб'), [])
+        self.assertEqual(extract_money('12345678901234567 руб'), [])
+        self.assertEqual(extract_money('9999999999999999,99 руб')[0]['amount'], '9999999999999999.99')
+
+
+class ExtractedValueFilterTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.q1_invoice = StoredFile.objects.create(user=self.user, file='q1.txt')
+        self.q2_invoice = StoredFile.objects.create(user=self.user, file='q2.txt')
+        self.small = StoredFile.objects.create(user=self.user, file='small.txt')
+        stored_result(self.q1_invoice, 'Счет от 15 марта 2024 на сумму 250 000 руб.')
+        stored_result(self.q2_invoice, 'Счет от 10.05.2024 на сумму 300 000 руб.')
+        stored_result(self.small, 'Счет от 20.02.2024 на сумму 5 000 руб.')
+
+    def test_range_query(self):
+        """Тест выборки счетов больше 100 тыс. рублей за первый квартал"""
+        response = self.client.get('/api/files/', {
+            'date_from': '2024-01-01', 'date_to': '2024-03-31',
+            'amount_min': '100000', 'currency': 'rub',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([f['id'] for f in response.data['results']], [self.q1_invoice.id])
+
+    def test_reprocessing_replaces_values(self):
+        """Тест замены значений файла при повторной обработке"""
+        stored_result(self.small, 'Счет от 20.02.2024 на сумму 500 тыс. руб.')
+        response = self.client.get('/api/files/', {'amount_min': '100000', 'currency': 'RUB'})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(self.small.extracted_amounts.count(), 1)
+
+    def test_invalid_value(self):
+        """Тест отклонения некорректной даты"""
+        response = self.client.get('/api/files/', {'date_from': '2024-13-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
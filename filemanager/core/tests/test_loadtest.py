@@ -0,0 +1,61 @@
+import asyncio
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.test import SimpleTestCase
+from ml_api.loadtest import MLServiceScenario, compare_reports, percentile, run_load, save_report
+
+
+class StubProcess(BaseHTTPRequestHandler):
+    """ml_service: тексты обрабатываются, остальное - ошибка 500"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        code = 200 if b'document.txt' in body else 500
+        data = json.dumps({'status': 'success' if code == 200 else 'error'}).encode()
+        self.send_response(code)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class LoadTestTests(SimpleTestCase):
+    def test_percentile(self):
+        """Тест: перцентили по ближайшему рангу"""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 95), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_run_against_stub_service(self):
+        """Тест: прогон против заглушки ml_service дает сводку, ряд и ошибки"""
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubProcess)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        payloads = {'text': ('document.txt', b'text'), 'image': ('scan.png', b'png')}
+        report = asyncio.run(run_load(
+            MLServiceScenario(f'http://127.0.0.1:{server.server_port}'), payloads,
+            {'text': 1, 'image': 1}, concurrency=4, duration=0.5, sample_interval=0.1,
+        ))
+
+        text, image = report['summary']['process[text]'], report['summary']['process[image]']
+        self.assertGreater(text['count'], 0)
+        self.assertEqual(text['error_rate'], 0)
+        self.assertLessEqual(text['p50_s'], text['p99_s'])
+        self.assertEqual(image['error_rate'], 1)
+        self.assertIn('process[image]: HTTP 500', report['errors'])
+        self.assertTrue(report['timeseries'])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = save_report(report, output_dir)
+            saved = json.loads(path.read_text(encoding='utf-8'))
+        self.assertEqual(saved['config']['concurrency'], 4)
+        self.assertTrue(compare_reports(saved, report)[0].startswith('process['))
@@ -0,0 +1,113 @@
+import json
+import socketserver
+import threading
+from unittest.mock import patch
+import fakeredis
+from django.test import SimpleTestCase, override_settings
+from ml_api import mailer
+from ml_api.mailer import OUTBOX_KEY, PooledMailer, drain_outbox
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """Минимальный SMTP-сервер: принимает письма, может оборвать сессию"""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 stub ESMTP')
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line.split(' ')[0].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 stub')
+            elif command == 'MAIL' and server.reject_sender and server.reject_sender in line:
+                self.reply('550 sender rejected')
+            elif command in ('MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                data = []
+                while (chunk := self.rfile.readline().decode()) != '.\r\n':
+                    data.append(chunk)
+                server.messages.append(''.join(data))
+                self.reply('250 queued')
+                if server.drop_after and len(server.messages) == server.drop_after:
+                    return
+            else:
+                self.reply('502 not implemented')
+
+
+class PooledMailerTests(SimpleTestCase):
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), StubSMTPHandler)
+        self.server.daemon_threads = True
+        self.server.messages = []
+        self.server.connections = 0
+        self.server.drop_after = None
+        self.server.reject_sender = None
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        settings_override = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.server.server_address[1],
+            EMAIL_USE_SSL=False,
+            EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_DEFAULT_RATE_LIMIT=1000,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.redis = fakeredis.FakeRedis()
+        redis_patch = patch('ml_api.mailer.get_redis', return_value=self.redis)
+        redis_patch.start()
+        self.addCleanup(redis_patch.stop)
+
+        mailer_patch = patch.object(mailer, 'mailer', PooledMailer())
+        mailer_patch.start()
+        self.addCleanup(lambda: mailer.mailer.close())
+        self.addCleanup(mailer_patch.stop)
+        mailer.provider_buckets.clear()
+
+    def enqueue(self, count, from_email='noreply@example.com'):
+        for i in range(count):
+            self.redis.lpush(OUTBOX_KEY, json.dumps({
+                'subject': f'Файл {i}', 'body': 'Готово', 'from_email': from_email,
+                'to': ['user@example.com'],
+            }))
+
+    def test_batch_uses_one_connection(self):
+        """Тест: пачка писем уходит через одно SMTP-соединение"""
+        self.enqueue(5)
+        self.assertEqual(drain_outbox(batch_size=2), 5)
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.redis.llen(OUTBOX_KEY), 0)
+
+    def test_reconnect_after_disconnect(self):
+        """Тест: при обрыве соединения письмо повторяется через новое"""
+        self.server.drop_after = 2
+        self.enqueue(4)
+        self.assertEqual(drain_outbox(), 4)
+        self.assertEqual(len(self.server.messages), 4)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_permanent_rejection_is_dropped(self):
+        """Тест: письмо с отказом 5xx пропускается без повтора и не держит очередь"""
+        self.server.reject_sender = 'bad@example.com'
+        self.enqueue(1, from_email='bad@example.com')
+        self.enqueue(2)
+        self.assertEqual(drain_outbox(), 3)
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.redis.llen(OUTBOX_KEY), 0)
@@ -0,0 +1,86 @@
+import threading
+import time
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from ml_api.caching import MLCache
+from ml_api.models import MLRequest
+from ml_api.views import PredictView
+
+
+class MLCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_canonical_key(self):
+        """Тест: ключ не зависит от порядка полей и имеет фиксированную длину"""
+        ml_cache = MLCache('test')
+        first = ml_cache.make_key(1, {'a': 1, 'b': [1, 2], 'text': 'x' * 10000})
+        second = ml_cache.make_key(1, {'text': 'x' * 10000, 'b': [1, 2], 'a': 1})
+        self.assertEqual(first, second)
+        self.assertLess(len(first), 100)
+        self.assertNotEqual(first, ml_cache.make_key(2, {'a': 1}))
+
+    def test_single_flight(self):
+        """Тест: параллельные одинаковые запросы вычисляются один раз"""
+        ml_cache = MLCache('test', poll_interval=0.01)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(ml_cache.get_or_compute(('same',), compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [{'value': 42}] * 5)
+        self.assertEqual(sorted(state for _, state in results), ['miss'] + ['wait_hit'] * 4)
+
+    def test_stale_while_revalidate(self):
+        """Тест: устаревшее значение отдается сразу, а обновляется в фоне"""
+        ml_cache = MLCache('test', ttl=0, stale_ttl=60)
+        ml_cache.get_or_compute(('key',), lambda: 'old')
+
+        value, state = ml_cache.get_or_compute(('key',), lambda: 'new')
+        self.assertEqual((value, state), ('old', 'stale'))
+
+        for _ in range(100):
+            if cache.get(ml_cache.make_key('key'))['value'] == 'new':
+                break
+            time.sleep(0.01)
+        self.assertEqual(cache.get(ml_cache.make_key('key'))['value'], 'new')
+
+
+class PredictViewCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+
+    def test_repeated_request_served_from_cache(self):
+        """Тест: повторный запрос берется из кеша, но попадает в историю MLRequest"""
+        payload = {'request_type': 'ner', 'input_data': {'text': 'Москва', 'lang': 'ru'}}
+        with patch('ml_api.views.PredictView._predict', wraps=PredictView()._predict) as predict:
+            first = self.client.post('/ml/api/ml/predict/', payload, format='json')
+            second = self.client.post('/ml/api/ml/predict/', payload, format='json')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(predict.call_count, 1)
+        self.assertEqual(first.data['prediction'], second.data['prediction'])
+        self.assertEqual(
+            sorted(MLRequest.objects.values_list('id', flat=True)),
+            [first.data['request_id'], second.data['request_id']],
+        )
@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from ml_api.models import MLRequest
+
+
+class MLRequestListTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(self.user)
+        MLRequest.objects.bulk_create([
+            MLRequest(user=self.user, request_type='ocr' if i % 2 else 'ner', status='success',
+                      input_data={'text': 'x' * 1000}, result={'entities': list(range(100))})
+            for i in range(7)
+        ])
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.foreign = MLRequest.objects.create(user=other, request_type='ocr', input_data={})
+
+    def test_pages_cover_history_without_json(self):
+        """Тест: курсорные страницы покрывают историю и не читают JSON-поля"""
+        expected = list(MLRequest.objects.filter(user=self.user)
+                        .order_by('-created_at', '-id').values_list('id', flat=True))
+        seen, url, params = [], reverse('ml_requests'), {'page_size': 3}
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = self.client.get(url, params).json()
+                seen.extend(row['id'] for row in data['results'])
+                self.assertNotIn('input_data', data['results'][0])
+                url, params = data['next'], None
+
+        self.assertEqual(seen, expected)
+        listing = [q['sql'] for q in queries if 'ml_api_mlrequest' in q['sql']]
+        self.assertTrue(listing)
+        self.assertFalse(any('"input_data"' in sql or '"result"' in sql for sql in listing))
+
+    def test_filter_and_detail(self):
+        """Тест: фильтр по типу и полные данные в карточке запроса"""
+        rows = self.client.get(reverse('ml_requests'), {'type': 'ocr'}).json()['results']
+        self.assertEqual(len(rows), 3)
+        detail = self.client.get(rows[0]['detail_url']).json()
+        self.assertEqual(len(detail['result']['entities']), 100)
+
+    def test_foreign_request_and_bad_cursor(self):
+        """Тест: чужой запрос недоступен, поврежденный курсор - 400"""
+        response = self.client.get(reverse('ml_request_detail', args=[self.foreign.id]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('ml_requests'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
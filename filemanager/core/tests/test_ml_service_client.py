@@ -0,0 +1,156 @@
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+from django.test import SimpleTestCase, override_settings
+from ml_api import remote
+from ml_api.remote import CircuitBreaker, MLServiceClient, RemoteInferenceError, CircuitOpenError
+
+
+class StubMLService(BaseHTTPRequestHandler):
+    """Заглушка ml_service: POST /process/ отвечает как FastAPI-сервис"""
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        server.requests += 1
+        server.connections.add(self.client_address)
+        if server.fail_next > 0:
+            server.fail_next -= 1
+            return self.reply(503, {'detail': 'Service unavailable'})
+        if b'filename="blank.png"' in body:
+            # Как ml_service при пустом изображении
+            return self.reply(422, {'detail': 'Ошибка OCR обработки'})
+        if b'filename="document.txt"' in body:
+            payload = {'status': 'success', 'type': 'ner', 'result': {
+                'status': 'success',
+                'entities': [{'text': 'Москва', 'lemma': 'москва', 'type': 'LOC', 'start': 0, 'end': 6}],
+                'analysis': {'language': 'ru', 'dates': [], 'money_amounts': [],
+                             'sentiment': None, 'keywords': ['Москва']},
+            }}
+        else:
+            payload = {'status': 'success', 'type': 'ocr', 'result': {
+                'status': 'success', 'text': 'Москва',
+                'entities': [{'text': 'Москва', 'lemma': 'москва', 'type': 'LOC', 'start': 0, 'end': 6}],
+                'analysis': {'language': 'ru', 'keywords': ['Москва'],
+                             'processing': 'grayscale+contrast+threshold'},
+            }}
+        self.reply(200, payload)
+
+    def reply(self, code, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@override_settings(ML_SERVICE_MODE='remote')
+class MLServiceClientTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubMLService)
+        self.server.requests = 0
+        self.server.fail_next = 0
+        self.server.connections = set()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.clock = FakeClock()
+        self.client = MLServiceClient(
+            base_url=f'http://127.0.0.1:{self.server.server_port}', retries=1,
+            breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=self.clock),
+        )
+        patcher = patch.object(remote.time, 'sleep')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_text_result_matches_local_format(self):
+        """Тест: ответ ml_service приводится к формату локального NER"""
+        result = self.client.analyze_text('Москва')
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['type'], 'ner')
+        self.assertEqual(result['data']['text'], 'Москва')
+        self.assertEqual(result['data']['entities'][0]['lemma'], 'москва')
+        self.assertEqual(result['data']['sentiment'], 'neutral')
+
+    def test_image_is_one_request(self):
+        """Тест: OCR и NER изображения выполняются одним запросом"""
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / 'scan.png'
+            path.write_bytes(b'png')
+            result = self.client.analyze_image(str(path))
+        self.assertEqual(result['type'], 'ocr')
+        self.assertEqual(result['data']['entities'][0]['type'], 'LOC')
+        self.assertEqual(self.server.requests, 1)
+
+    def test_content_rejection_is_not_retried(self):
+        """Тест: 422 - отказ по содержимому, без повторов и без размыкания автомата"""
+        with tempfile.TemporaryDirectory() as workdir:
+            path = Path(workdir) / 'blank.png'
+            path.write_bytes(b'png')
+            for _ in range(3):
+                self.assertEqual(self.client.analyze_image(str(path))['status'], 'error')
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+    def test_connections_are_reused(self):
+        """Тест: запросы идут через одно keep-alive соединение"""
+        for _ in range(3):
+            self.client.analyze_text('Москва')
+        self.assertEqual(self.server.requests, 3)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_server_errors_are_retried(self):
+        """Тест: 5xx повторяется, успех после повтора"""
+        self.server.fail_next = 1
+        self.assertEqual(self.client.analyze_text('Москва')['status'], 'success')
+        self.assertEqual(self.server.requests, 2)
+
+    def test_circuit_opens_and_recovers(self):
+        """Тест: после серии неудач запросы не отправляются до истечения паузы"""
+        self.server.fail_next = 4
+        for _ in range(2):
+            with self.assertRaises(RemoteInferenceError):
+                self.client.analyze_text('Москва')
+        with self.assertRaises(CircuitOpenError):
+            self.client.analyze_text('Москва')
+        self.assertEqual(self.server.requests, 4)
+
+        self.clock.now = 31
+        self.assertEqual(self.client.analyze_text('Москва')['status'], 'success')
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+    def test_falls_back_to_local_processing(self):
+        """Тест: при недоступном ml_service текст обрабатывается локально"""
+        self.server.fail_next = 10
+        local = {'status': 'success', 'type': 'ner', 'data': {'text': 'Москва'}}
+        with patch.object(remote, 'get_client', return_value=self.client), \
+                patch.object(remote.services, 'process_text_with_ner', return_value=local) as local_ner:
+            self.assertEqual(remote.process_text('Москва'), local)
+            remote.process_text('Москва')
+        self.assertEqual(local_ner.call_count, 2)
+        self.assertEqual(self.server.requests, 4)
+        self.assertEqual(self.client.breaker.state, 'open')
+
+    def test_local_mode_skips_service(self):
+        """Тест: в режиме local ml_service не вызывается"""
+        with override_settings(ML_SERVICE_MODE='local'), \
+                patch.object(remote.services, 'process_text_with_ner', return_value={'status': 'success'}):
+            remote.process_text('Москва')
+        self.assertEqual(self.server.requests, 0)
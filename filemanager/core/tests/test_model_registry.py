@@ -0,0 +1,46 @@
+from unittest.mock import patch
+from django.test import SimpleTestCase
+from ml_api import services
+from ml_api.registry import ModelRegistry, process_memory
+
+
+class ModelRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = ModelRegistry()
+        self.loads = []
+        self.registry.register('fake', lambda: self.loads.append(1) or object())
+
+    def test_models_load_lazily_once(self):
+        """Тест: модель загружается при первом обращении и только один раз"""
+        self.assertFalse(self.registry.is_loaded('fake'))
+        model = self.registry.get('fake')
+        self.assertIs(self.registry.get('fake'), model)
+        self.assertEqual(len(self.loads), 1)
+        self.assertEqual(self.registry.loaded(), ['fake'])
+
+    def test_preload(self):
+        """Тест: предзагрузка по списку, неизвестные имена пропускаются"""
+        self.registry.preload(['fake', 'unknown'])
+        self.assertTrue(self.registry.is_loaded('fake'))
+
+    def test_load_failure_is_cached(self):
+        """Тест: неудачная загрузка не повторяется на каждом вызове"""
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise OSError('model not installed')
+
+        self.registry.register('broken', broken)
+        self.assertIsNone(self.registry.get('broken'))
+        self.assertIsNone(self.registry.get('broken'))
+        self.assertEqual(len(calls), 1)
+
+    def test_services_use_registry(self):
+        """Тест: NER берет модель из реестра в момент вызова"""
+        with patch.object(services, 'get_nlp', return_value=None):
+            self.assertEqual(services.run_spacy('текст')['status'], 'error')
+
+    def test_process_memory(self):
+        """Тест: память процесса читается"""
+        self.assertGreater(process_memory()['rss'], 0)
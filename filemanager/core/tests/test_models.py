@@ -1,6 +1,11 @@
+import asyncio
+from django.db import transaction
 from django.test import TestCase
 from django.contrib.auth.models import User
-from core.models import StoredFile
+from core.events import stream_file_status, subscribe_file_status
+from core.models import FileStatusHistory, StoredFile
+from unittest.mock import AsyncMock, MagicMock, patch
+import json
 import tempfile
 import os
 
@@ -29,4 +34,122 @@ class StoredFileModelTests(TestCase):
         file_path = self.file.file.path
         self.assertTrue(os.path.exists(file_path))
         self.file.delete()
-        self.assertFalse(os.path.exists(file_path))
\ No newline at end of file
+        self.assertFalse(os.path.exists(file_path))
+
+
+class StoredFileStatusEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.file = StoredFile.objects.create(user=self.user, file='test.txt', processing_status='processing')
+
+    @patch('core.events.get_redis')
+    def test_transition_publishes_status(self, mock_get_redis):
+        """Тест публикации события при смене статуса"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.file.mark_completed()
+
+        channel, payload = mock_get_redis.return_value.publish.call_args[0]
+        self.assertEqual(channel, f'file_status:{self.file.id}')
+        self.assertEqual(json.loads(payload)['status'], 'completed')
+
+    @patch('core.events.get_redis')
+    def test_publish_failure_does_not_break_transition(self, mock_get_redis):
+        """Тест: недоступный Redis не мешает смене статуса"""
+        mock_get_redis.return_value.publish.side_effect = ConnectionError
+        with self.captureOnCommitCallbacks(execute=True):
+            self.file.mark_failed()
+
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.processing_status, 'failed')
+
+    @patch('core.events.get_redis')
+    def test_rolled_back_transition_is_not_published(self, mock_get_redis):
+        """Тест: откаченный переход не доходит до подписчиков"""
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.file.mark_completed()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        mock_get_redis.return_value.publish.assert_not_called()
+
+    def test_stream_rereads_status_after_subscribe(self):
+        """Тест: поток отдает статус, перечитанный из БД после подписки"""
+        calls = []
+        pubsub = MagicMock(unsubscribe=AsyncMock(), aclose=AsyncMock())
+        pubsub.subscribe = AsyncMock(side_effect=lambda channel: calls.append('subscribe'))
+
+        async def refresh(fields):
+            # Переход случился между загрузкой строки во view и подпиской
+            calls.append('refresh')
+            self.file.processing_status, self.file.processed = 'completed', True
+
+        async def collect():
+            return [event async for event in stream_file_status(self.file, await subscribe_file_status(self.file.id))]
+
+        with patch('core.events.get_async_redis', return_value=MagicMock(pubsub=lambda: pubsub)), \
+                patch.object(self.file, 'arefresh_from_db', refresh):
+            events = asyncio.run(collect())
+
+        self.assertEqual(calls, ['subscribe', 'refresh'])
+        self.assertEqual(len(events), 1)
+        self.assertIn('"status": "completed"', events[0])
+
+    def test_subscribe_failure_closes_pubsub(self):
+        """Тест: без Redis подписка не открывается, view отвечает 503 до начала потока"""
+        pubsub = MagicMock(subscribe=AsyncMock(side_effect=ConnectionError), aclose=AsyncMock())
+
+        with patch('core.events.get_async_redis', return_value=MagicMock(pubsub=lambda: pubsub)):
+            self.assertIsNone(asyncio.run(subscribe_file_status(self.file.id)))
+
+        pubsub.aclose.assert_awaited_once()
+
+
+@patch('core.events.get_redis')
+class StoredFileTransitionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.file = StoredFile.objects.create(user=self.user, file='test.txt', description='Старое')
+
+    def test_transition_updates_only_status_columns(self, mock_get_redis):
+        """Тест: переход не перезаписывает параллельно измененное описание"""
+        StoredFile.objects.filter(id=self.file.id).update(description='Новое')
+        self.assertTrue(self.file.mark_processing())
+
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.description, 'Новое')
+        self.assertEqual((self.file.processing_status, self.file.processing_version), ('processing', 1))
+
+    def test_stale_task_cannot_complete_replaced_file(self, mock_get_redis):
+        """Тест: устаревшая задача не переводит замененный файл в completed"""
+        old_task_view = StoredFile.objects.get(id=self.file.id)
+        old_task_view.mark_processing()
+
+        replaced = StoredFile.objects.get(id=self.file.id)
+        replaced.mark_pending(reason='replace')
+
+        self.assertFalse(old_task_view.mark_completed())
+        self.file.refresh_from_db()
+        self.assertEqual(self.file.processing_status, 'pending')
+        self.assertFalse(self.file.processed)
+
+    def test_disallowed_transition(self, mock_get_redis):
+        """Тест: из pending нельзя сразу перейти в completed"""
+        self.assertFalse(self.file.mark_completed())
+        self.assertFalse(FileStatusHistory.objects.exists())
+
+    def test_history_and_bulk_transition(self, mock_get_redis):
+        """Тест: массовый переход затрагивает только допустимые файлы и пишет историю"""
+        other = StoredFile.objects.create(user=self.user, file='other.txt')
+        self.file.mark_processing()
+
+        moved = StoredFile.objects.filter(user=self.user).transition('failed', reason='worker lost')
+
+        self.assertEqual(moved, [self.file.id])
+        self.assertEqual(
+            list(FileStatusHistory.objects.filter(file=self.file).values_list('from_status', 'to_status', 'version')),
+            [('pending', 'processing', 1), ('processing', 'failed', 2)],
+        )
+        other.refresh_from_db()
+        self.assertEqual((other.processing_status, other.processing_version), ('pending', 0))
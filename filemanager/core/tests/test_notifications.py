@@ -0,0 +1,65 @@
+import json
+from unittest.mock import patch
+import fakeredis
+from django.contrib.auth.models import User
+from django.test import TestCase
+from core.models import StoredFile
+from ml_api import tasks
+from ml_api.notifications import collect_processing_results, record_processing_result
+
+
+class NotificationDigestTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='digest', password='pass', email='digest@example.com')
+        self.redis = fakeredis.FakeRedis()
+        for target in ('ml_api.notifications.get_redis', 'ml_api.mailer.get_redis'):
+            patcher = patch(target, return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_file(self, name, status='pending'):
+        return StoredFile.objects.create(
+            user=self.user,
+            file=name,
+            processing_status=status,
+        )
+
+    def test_single_upload_is_sent_immediately(self):
+        """Тест: одиночная загрузка уведомляется сразу, без окна"""
+        file = self.make_file('single.txt', status='completed')
+        with patch.object(tasks.send_processing_notification, 'delay') as delay, \
+                patch.object(tasks.send_notification_digest, 'apply_async') as digest:
+            self.assertEqual(record_processing_result(self.user.id, file.id, True), 'immediate')
+        delay.assert_called_once_with(self.user.id, file.id, True)
+        digest.assert_not_called()
+
+    def test_batch_is_coalesced_into_one_digest(self):
+        """Тест: пакет загрузок дает одну задачу дайджеста и одно письмо"""
+        files = [self.make_file(f'doc{i}.txt') for i in range(3)]
+        with patch.object(tasks.send_processing_notification, 'delay') as delay, \
+                patch.object(tasks.send_notification_digest, 'apply_async') as digest, \
+                patch.object(tasks.flush_email_outbox, 'apply_async'):
+            for file, success in zip(files, (True, False, True)):
+                file.processing_status = 'completed' if success else 'failed'
+                file.save(update_fields=['processing_status'])
+                self.assertEqual(record_processing_result(self.user.id, file.id, success), 'buffered')
+            # Повторная попытка того же файла не дублирует строку дайджеста
+            record_processing_result(self.user.id, files[1].id, False)
+
+            delay.assert_not_called()
+            self.assertEqual(digest.call_count, 1)
+            self.assertEqual(tasks.send_notification_digest(self.user.id), 3)
+
+        self.assertEqual(collect_processing_results(self.user.id), {})
+        queued = self.redis.lrange('email:outbox', 0, -1)
+        self.assertEqual(len(queued), 1)
+        self.assertIn('Успешно: 2, с ошибкой: 1', json.loads(queued[0])['body'])
+
+    def test_digest_with_single_event_uses_single_message(self):
+        """Тест: дайджест из одного файла оформляется как обычное уведомление"""
+        file = self.make_file('late.txt', status='completed')
+        self.redis.hset(f'notify:events:{self.user.id}', file.id, 1)
+        with patch.object(tasks, 'deliver_notification') as deliver:
+            self.assertEqual(tasks.send_notification_digest(self.user.id), 1)
+        subject = deliver.call_args.args[1]
+        self.assertEqual(subject, 'Обработка файла завершена')
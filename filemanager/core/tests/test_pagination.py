@@ -0,0 +1,71 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.utils import timezone
+from core.models import StoredFile
+from core.pagination import paginate_keyset, InvalidCursor
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        now = timezone.now()
+        files = [
+            StoredFile(user=self.user, file=f'file_{i}.txt', size_bytes=10)
+            for i in range(7)
+        ]
+        StoredFile.objects.bulk_create(files)
+        # Две пары файлов с одинаковым временем загрузки проверяют разрешение по id
+        for i, stored in enumerate(StoredFile.objects.order_by('id')):
+            stored.uploaded_at = now - timedelta(minutes=i // 2)
+            stored.save(update_fields=['uploaded_at'])
+
+    def test_pages_cover_all_files_in_order(self):
+        """Тест обхода всех страниц без пропусков и повторов"""
+        queryset = StoredFile.objects.filter(user=self.user)
+        expected = list(queryset.order_by('-uploaded_at', '-id').values_list('id', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            page = paginate_keyset(queryset, cursor=cursor, page_size=3)
+            seen.extend(f.id for f in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor(self):
+        """Тест отклонения поврежденного курсора"""
+        with self.assertRaises(InvalidCursor):
+            paginate_keyset(StoredFile.objects.all(), cursor='not-a-cursor')
+
+
+class FileMetadataTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def test_metadata_filled_on_upload(self):
+        """Тест заполнения размера и MIME-типа при загрузке"""
+        upload = SimpleUploadedFile('note.txt', b'hello world', content_type='text/plain')
+        stored = StoredFile.objects.create(user=self.user, file=upload)
+
+        self.assertEqual(stored.size_bytes, 11)
+        self.assertEqual(stored.content_type, 'text/plain')
+        self.assertIsNone(stored.page_count)
+        stored.file.delete(save=False)
+
+    def test_pdf_page_count(self):
+        """Тест подсчета страниц PDF по дереву страниц"""
+        content = (
+            b'%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n'
+            b'2 0 obj\n<< /Type /Pages /Kids [3 0 R 4 0 R] /Count 2 >>\nendobj\n'
+            b'3 0 obj\n<< /Type /Page /Parent 2 0 R >>\nendobj\n'
+            b'4 0 obj\n<< /Type /Page /Parent 2 0 R >>\nendobj\n%%EOF'
+        )
+        upload = SimpleUploadedFile('doc.pdf', content, content_type='application/pdf')
+        stored = StoredFile.objects.create(user=self.user, file=upload)
+
+        self.assertEqual(stored.page_count, 2)
+        stored.file.delete(save=False)
@@ -0,0 +1,106 @@
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+import fakeredis
+from celery.exceptions import Retry
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from prometheus_client import REGISTRY
+from filemanager.celery import app as celery_app
+from core.models import StoredFile
+from ml_api import tasks
+from ml_api.models import AnalysisResult
+from ml_api.timing import PipelineTimer, file_type_label, queue_wait, stage
+
+
+def stage_count(stage_name, file_type, outcome, queue='unknown'):
+    labels = {'stage': stage_name, 'file_type': file_type, 'queue': queue, 'outcome': outcome}
+    return REGISTRY.get_sample_value('pipeline_stage_seconds_count', labels) or 0
+
+
+def timed_ner(text):
+    with stage('spacy'):
+        time.sleep(0.01)
+    return {'status': 'success', 'type': 'ner', 'data': {'text': text, 'language': 'ru', 'entities': []},
+            'metadata': {}}
+
+
+class PipelineTimerTests(SimpleTestCase):
+    def test_stage_outside_task_is_noop(self):
+        """Тест: вне задачи stage() ничего не записывает"""
+        with stage('spacy'):
+            pass
+
+    def test_stages_accumulate(self):
+        """Тест: повторные этапы суммируются, разбивка в миллисекундах"""
+        with PipelineTimer('.png', 'ml') as timer:
+            for _ in range(2):
+                with stage('tesseract'):
+                    time.sleep(0.005)
+            breakdown = timer.breakdown()
+        self.assertGreaterEqual(breakdown['tesseract'], 10)
+        self.assertGreaterEqual(breakdown['total'], breakdown['tesseract'])
+
+    def test_retry_outcome(self):
+        """Тест: повтор задачи попадает в метрики с исходом retry"""
+        before = stage_count('decode', 'image', 'retry', 'ml')
+        with self.assertRaises(Retry):
+            with PipelineTimer('.png', 'ml'):
+                with stage('decode'):
+                    pass
+                raise Retry()
+        self.assertEqual(stage_count('decode', 'image', 'retry', 'ml'), before + 1)
+
+    def test_file_type_label_is_bounded(self):
+        """Тест: метка типа файла - из фиксированного набора, а не расширение загрузки"""
+        self.assertEqual(
+            [file_type_label(ext) for ext in ('.PDF', '.jpg', '.docx', '.txt', '.x7f3a', '')],
+            ['pdf', 'image', 'docx', 'text', 'other', 'other'],
+        )
+
+    def test_queue_wait_from_header(self):
+        """Тест: ожидание в очереди считается от заголовка enqueued_at"""
+        request = SimpleNamespace(enqueued_at=time.time() - 2, eta=None)
+        self.assertAlmostEqual(queue_wait(request), 2, delta=0.5)
+        self.assertIsNone(queue_wait(SimpleNamespace(headers=None)))
+
+    def test_queue_wait_excludes_countdown(self):
+        """Тест: отложенная задача ждет в очереди только после eta"""
+        now = time.time()
+        eta = time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(now - 1))
+        request = SimpleNamespace(enqueued_at=now - 60, eta=eta)
+        self.assertLess(queue_wait(request), 5)
+
+
+class PipelineTimingTaskTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='timing', password='pass')
+        self.file = StoredFile.objects.create(
+            user=self.user, file=SimpleUploadedFile('notes.txt', 'Текст документа'.encode('utf-8'))
+        )
+        redis = fakeredis.FakeRedis()
+        for target in ('ml_api.checkpoints.get_redis', 'core.events.get_redis'):
+            patcher = patch(target, return_value=redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for name, value in (('process_text', timed_ner), ('record_processing_result', lambda *args: None)):
+            patcher = patch.object(tasks, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=True)
+        self.addCleanup(celery_app.conf.update, CELERY_TASK_ALWAYS_EAGER=False)
+
+    def test_breakdown_saved_and_exported(self):
+        """Тест: разбивка по этапам сохраняется в metadata и попадает в гистограммы"""
+        spacy_before = stage_count('spacy', 'text', 'success')
+        db_before = stage_count('db_write', 'text', 'success')
+
+        response = tasks.process_file_task.apply(args=[self.file.id, self.user.id]).get()
+
+        self.assertEqual(response['status'], 'success')
+        timings = AnalysisResult.objects.get(file=self.file).metadata['timings_ms']
+        self.assertGreaterEqual(timings['spacy'], 10)
+        self.assertIn('total', timings)
+        self.assertEqual(stage_count('spacy', 'text', 'success'), spacy_before + 1)
+        self.assertEqual(stage_count('db_write', 'text', 'success'), db_before + 1)
@@ -0,0 +1,170 @@
+from datetime import timedelta
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from core.models import StoredFile
+from ml_api.models import AnalysisResult, AnalysisText, MLRequest, MLResult
+
+FILES_PER_USER = 300
+REQUESTS_PER_USER = 400
+FILES_WITH_RESULTS = 30
+
+# Упрощенные шаблоны обращаются к тем же полям, что и шаблоны сайта:
+# бюджет учитывает и ленивые выборки, вычисляемые при рендеринге
+BUDGET_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'OPTIONS': {'loaders': [('django.template.loaders.locmem.Loader', {
+        'list.html': (
+            '{% for file in files %}{{ file.filename }} {{ file.size_bytes }} '
+            '{{ file.processing_status }} {{ file.uploaded_at }}{% endfor %}{{ total_count }}'
+        ),
+        'core/view_file.html': (
+            '{{ file.filename }}{% for result in analysis_results %}'
+            '{{ result.language }} {{ result.text_payload.text }}{% endfor %}'
+        ),
+    })]},
+}]
+
+
+def seed_user(username):
+    """Крупный набор данных пользователя: файлы, результаты и ML-запросы"""
+    user = User.objects.create_user(username=username, password='pass')
+    now = timezone.now()
+    StoredFile.objects.bulk_create([
+        StoredFile(user=user, file=f'{username}/file_{i}.txt', size_bytes=i,
+                   processing_status='completed', processed=True)
+        for i in range(FILES_PER_USER)
+    ])
+    files = list(StoredFile.objects.filter(user=user).order_by('id'))
+    StoredFile.objects.filter(user=user).update(uploaded_at=now)
+
+    results = AnalysisResult.objects.bulk_create([
+        AnalysisResult(file=file, result_type='ner', pipeline_version='1.1', language='ru')
+        for file in files[:FILES_WITH_RESULTS]
+    ])
+    AnalysisText.objects.bulk_create([
+        AnalysisText(result=result, **AnalysisText.compress('текст')) for result in results
+    ])
+    requests = MLRequest.objects.bulk_create([
+        MLRequest(user=user, file=files[i % len(files)], request_type=('ocr', 'ner')[i % 2],
+                  status=('pending', 'success', 'failed')[i % 3], input_data={'i': i})
+        for i in range(REQUESTS_PER_USER)
+    ])
+    MLResult.objects.bulk_create([
+        MLResult(request=request, file=request.file, result_type=request.request_type, data={})
+        for request in requests[:FILES_WITH_RESULTS]
+    ])
+    for offset, request in enumerate(requests):
+        request.created_at = now - timedelta(seconds=offset)
+    MLRequest.objects.bulk_update(requests, ['created_at'], batch_size=500)
+    return user, files
+
+
+class QueryPlanMixin:
+    def explain(self, queryset):
+        """План запроса; в PostgreSQL последовательное чтение запрещено, чтобы проверять применимость индекса"""
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name, sorted_by_index=True):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan, f"Plan does not use {index_name}:\n{plan}")
+        if sorted_by_index:
+            # Сортировка должна читаться из индекса, без отдельного шага
+            self.assertNotIn('TEMP B-TREE', plan.upper(), plan)
+            if connection.vendor == 'postgresql':
+                self.assertNotIn('Sort', plan, plan)
+
+
+@override_settings(TEMPLATES=BUDGET_TEMPLATES)
+@patch('core.events.get_redis')
+class QueryBudgetTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.files = seed_user('budget')
+        seed_user('neighbour')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.file = self.files[0]
+
+    def test_file_list_page(self, mock_get_redis):
+        """Тест: HTML-список файлов укладывается в бюджет запросов"""
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('file_list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_file_api_list(self, mock_get_redis):
+        """Тест: API списка файлов - COUNT и одна страница, без N+1"""
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/files/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], FILES_PER_USER)
+
+    def test_file_api_detail(self, mock_get_redis):
+        """Тест: API карточки файла"""
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/files/{self.file.id}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_file_page_with_results(self, mock_get_redis):
+        """Тест: страница файла загружает результаты вместе с текстом одним запросом"""
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('view_file', args=[self.file.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_ml_request_list_and_detail(self, mock_get_redis):
+        """Тест: список ML-запросов - одна выборка страницы, карточка - одна строка"""
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('ml_requests'), {'type': 'ocr'})
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(3):
+            response = self.client.get(response.json()['next'])
+        self.assertEqual(response.status_code, 200)
+        ml_request = MLRequest.objects.filter(user=self.user).first()
+        with self.assertNumQueries(3):
+            self.client.get(reverse('ml_request_detail', args=[ml_request.id]))
+
+    def test_status_endpoints(self, mock_get_redis):
+        """Тест: опрос статуса одного и многих файлов"""
+        with self.assertNumQueries(3):
+            self.client.get(reverse('check_processing_status', args=[self.file.id]))
+        file_ids = ','.join(str(file.id) for file in self.files[:100])
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('batch_status'), {'file_ids': file_ids})
+        self.assertEqual(len(response.json()['files']), 100)
+
+
+class QueryPlanTests(QueryPlanMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.files = seed_user('plans')
+        seed_user('neighbour')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def test_file_listing_uses_composite_index(self):
+        """Тест: список файлов пользователя читается по (user, -uploaded_at, -id)"""
+        queryset = StoredFile.objects.filter(user=self.user).order_by('-uploaded_at', '-id')[:20]
+        self.assertUsesIndex(queryset, 'core_file_user_uploaded_idx')
+
+    def test_ml_request_listing_uses_composite_indexes(self):
+        """Тест: список ML-запросов с фильтрами и без них не сортирует строки отдельно"""
+        queryset = MLRequest.objects.filter(user=self.user).order_by('-created_at', '-id')[:20]
+        self.assertUsesIndex(queryset, 'ml_api_request_user_idx')
+        queryset = MLRequest.objects.filter(
+            user=self.user, request_type='ocr', status='success'
+        ).order_by('-created_at', '-id')[:20]
+        self.assertUsesIndex(queryset, 'ml_api_request_filter_idx')
+
+    def test_file_scoped_results_use_indexes(self):
+        """Тест: результаты файла ищутся по индексу (file, -created_at)"""
+        file = self.files[0]
+        self.assertUsesIndex(file.analysis_results.all(), 'ml_api_result_file_idx')
+        self.assertUsesIndex(MLResult.objects.filter(file=file), 'ml_api_mlresult_file_idx')
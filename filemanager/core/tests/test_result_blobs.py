@@ -0,0 +1,109 @@
+import shutil
+import tempfile
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from core.models import StoredFile
+from core.views import parse_byte_range
+from ml_api.blobs import TextBlob
+from ml_api.models import AnalysisResult, AnalysisText
+
+
+@override_settings(RESULT_BLOB_THRESHOLD=1024, RESULT_BLOB_CHUNK_SIZE=512)
+class ResultBlobTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.login(username='testuser', password='testpass123')
+        self.file = StoredFile.objects.create(user=self.user, file='scan.pdf')
+        self.text = ''.join(f'Страница {n}: договор поставки №{n}.\n' for n in range(200))
+
+    def store(self, text):
+        result = {'status': 'success', 'type': 'ocr', 'data': {'text': text, 'entities': []}}
+        return AnalysisResult.objects.store(self.file, result, pipeline_version='1.0')
+
+    def test_small_text_stays_inline(self):
+        """Тест: текст меньше порога хранится в строке БД"""
+        payload = self.store('короткий текст').text_payload
+        self.assertEqual(payload.compression, 'zlib')
+        self.assertEqual(payload.blob_path, '')
+
+    def test_large_text_is_offloaded(self):
+        """Тест: крупный текст уходит в блоб, в БД только указатель"""
+        payload = self.store(self.text).text_payload
+        self.assertEqual(payload.compression, 'zstd-blob')
+        self.assertEqual(bytes(payload.data), b'')
+        self.assertTrue(default_storage.exists(payload.blob_path))
+        self.assertEqual(len(payload.blob_frames) - 1, -(-payload.size // 512))
+        self.assertEqual(AnalysisText.objects.get().text, self.text)
+
+    def test_range_read_decompresses_only_needed_frames(self):
+        """Тест: чтение диапазона распаковывает только затронутые кадры"""
+        raw = self.text.encode('utf-8')
+        blob = TextBlob.write(raw, chunk_size=512)
+        self.assertEqual(blob.read(500, 1500), raw[500:1500])
+        self.assertEqual(blob.read(len(raw) - 10), raw[-10:])
+        self.assertEqual(blob.read(len(raw), len(raw) + 5), b'')
+
+    def test_preview_reads_first_chunk(self):
+        """Тест: превью на странице файла - начало текста"""
+        header = self.store(self.text)
+        self.assertTrue(self.text.startswith(header.text_preview))
+
+    def test_full_text_view_streams_and_serves_ranges(self):
+        """Тест: полный текст отдается потоком и по Range"""
+        header = self.store(self.text)
+        raw = self.text.encode('utf-8')
+        url = reverse('result_text', args=[header.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), raw)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=600-1199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, raw[600:1200])
+        self.assertEqual(response['Content-Range'], f'bytes 600-1199/{len(raw)}')
+
+        response = self.client.get(url, HTTP_RANGE=f'bytes={len(raw)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_other_users_text_is_hidden(self):
+        """Тест: чужой текст недоступен"""
+        header = self.store(self.text)
+        User.objects.create_user(username='other', password='testpass123')
+        self.client.login(username='other', password='testpass123')
+        self.assertEqual(self.client.get(reverse('result_text', args=[header.pk])).status_code, 404)
+
+    def test_blob_removed_with_file(self):
+        """Тест: блоб удаляется вместе с результатом"""
+        path = self.store(self.text).text_payload.blob_path
+        with self.captureOnCommitCallbacks(execute=True):
+            self.file.delete()
+        self.assertFalse(default_storage.exists(path))
+
+
+class ByteRangeTests(SimpleTestCase):
+    def test_parse_byte_range(self):
+        """Тест разбора Range: неверный синтаксис игнорируется, пустой текст - 416"""
+        cases = {
+            ('bytes=0-9', 100): (0, 9),
+            ('bytes=-5', 100): (95, 99),
+            ('bytes=90-', 100): (90, 99),
+            ('bytes=5-3', 100): None,
+            ('bytes=-', 100): None,
+            ('bytes=0-1,5-6', 100): None,
+            ('bytes=100-', 100): False,
+            ('bytes=-0', 100): False,
+            ('bytes=-5', 0): False,
+            ('bytes=0-', 0): False,
+        }
+        for (header, size), expected in cases.items():
+            with self.subTest(header=header, size=size):
+                self.assertEqual(parse_byte_range(header, size), expected)
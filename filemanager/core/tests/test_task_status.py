@@ -0,0 +1,48 @@
+from celery import states
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from core.models import StoredFile
+from filemanager.celery import app as celery_app
+
+
+class BatchStatusTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client.force_authenticate(user=self.user)
+        self.file = StoredFile.objects.create(user=self.user, file='test.txt')
+        self.other_file = StoredFile.objects.create(
+            user=User.objects.create_user(username='other', password='testpass123'),
+            file='other.txt'
+        )
+        self.backend = celery_app.backend
+        self.backend.store_result('task-ok', {'status': 'success', 'file_id': self.file.id}, states.SUCCESS)
+        self.backend.store_result('task-failed', ValueError('boom'), states.FAILURE)
+
+    def test_batch_status(self):
+        """Тест пакетного получения статусов задач и файлов"""
+        response = self.client.post(reverse('batch_status'), {
+            'task_ids': ['task-ok', 'task-failed', 'task-unknown'],
+            'file_ids': [self.file.id, self.other_file.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['tasks']['task-ok']['status'], states.SUCCESS)
+        self.assertEqual(data['tasks']['task-ok']['result']['file_id'], self.file.id)
+        self.assertEqual(data['tasks']['task-failed']['error'], 'boom')
+        self.assertEqual(data['tasks']['task-unknown']['status'], states.PENDING)
+        # Чужие файлы в ответ не попадают
+        self.assertEqual(list(data['files']), [str(self.file.id)])
+
+    def test_single_task_status(self):
+        """Тест статуса одной задачи через тот же путь чтения"""
+        response = self.client.get(reverse('check_task_status', args=['task-ok']))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.json()['successful'])
+
+    def test_batch_limit(self):
+        """Тест ограничения размера пакета"""
+        response = self.client.get(reverse('batch_status'), {'task_ids': ','.join(map(str, range(501)))})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
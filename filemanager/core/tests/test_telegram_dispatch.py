@@ -0,0 +1,120 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+import fakeredis
+from django.test import SimpleTestCase
+from ml_api.ratelimit import TokenBucket
+from ml_api.telegram_dispatch import TelegramDispatcher, enqueue_telegram_message, OUTBOX_KEY, PROCESSING_KEY
+
+
+class StubTelegramHandler(BaseHTTPRequestHandler):
+    """Локальная заглушка Bot API: первый запрос отвечает 429 с retry_after"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server = self.server
+        server.requests.append((time.monotonic(), self.path, body))
+        if len(server.requests) == 1:
+            status, payload = 429, {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 1}}
+        else:
+            status, payload = 200, {'ok': True, 'result': {}}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_reserve_spaces_out_requests(self):
+        """Тест: после исчерпания ведра каждый следующий токен ждет 1/rate секунд"""
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+
+        now[0] = 10.0
+        self.assertEqual(bucket.reserve(), 0.0)
+        bucket.pause(3)
+        self.assertAlmostEqual(bucket.reserve(), 3.5)
+
+
+class TelegramDispatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubTelegramHandler)
+        self.server.requests = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.api_url = f'http://127.0.0.1:{self.server.server_port}'
+
+    def test_retry_after_and_ordering(self):
+        """Тест: 429 повторяется после retry_after, сообщения чата уходят по порядку"""
+        dispatcher = TelegramDispatcher(api_url=self.api_url, token='TOKEN', chat_rate=100, global_rate=100)
+
+        async def send_all():
+            try:
+                return await asyncio.gather(*[
+                    dispatcher.send({'chat_id': 1, 'text': f'msg {i}'}) for i in range(3)
+                ])
+            finally:
+                await dispatcher.aclose()
+
+        self.assertEqual(asyncio.run(send_all()), [True, True, True])
+
+        requests = self.server.requests
+        self.assertEqual(requests[0][1], '/botTOKEN/sendMessage')
+        self.assertEqual([body['text'] for _, _, body in requests], ['msg 0', 'msg 0', 'msg 1', 'msg 2'])
+        self.assertGreaterEqual(requests[1][0] - requests[0][0], 0.9)
+
+    def test_bot_wide_429_pauses_all_chats(self):
+        """Тест: 429 без превышения лимита чата приостанавливает отправку во все чаты"""
+        dispatcher = TelegramDispatcher(api_url=self.api_url, token='TOKEN', chat_rate=100, global_rate=100)
+
+        async def send_two_chats():
+            async def second():
+                await asyncio.sleep(0.1)
+                return await dispatcher.send({'chat_id': 2, 'text': 'другой чат'})
+            try:
+                return await asyncio.gather(dispatcher.send({'chat_id': 1, 'text': 'первый'}), second())
+            finally:
+                await dispatcher.aclose()
+
+        self.assertEqual(asyncio.run(send_two_chats()), [True, True])
+        sent_at = {body['text']: at for at, _, body in self.server.requests[1:]}
+        self.assertGreaterEqual(sent_at['другой чат'] - self.server.requests[0][0], 0.9)
+
+    def test_in_flight_messages_survive_restart(self):
+        """Тест: сообщения в работе возвращаются в очередь при запуске и удаляются после отправки"""
+        redis = fakeredis.FakeAsyncRedis()
+        dispatcher = TelegramDispatcher(api_url=self.api_url, token='TOKEN', chat_rate=100, global_rate=100)
+
+        async def run_until_sent():
+            # Сообщение осталось в работе после падения прошлого запуска
+            await redis.lpush(PROCESSING_KEY, json.dumps({'chat_id': 1, 'text': 'в работе'}))
+            await redis.lpush(OUTBOX_KEY, json.dumps({'chat_id': 1, 'text': 'новое'}))
+            running = asyncio.create_task(dispatcher.run())
+            while len(self.server.requests) < 3:
+                await asyncio.sleep(0.05)
+            dispatcher.stop()
+            await running
+            return await redis.llen(OUTBOX_KEY), await redis.llen(PROCESSING_KEY)
+
+        with patch('ml_api.telegram_dispatch.get_async_redis', return_value=redis):
+            self.assertEqual(asyncio.run(run_until_sent()), (0, 0))
+        self.assertEqual([body['text'] for _, _, body in self.server.requests], ['в работе', 'в работе', 'новое'])
+
+    @patch('ml_api.telegram_dispatch.get_redis')
+    def test_enqueue(self, mock_get_redis):
+        """Тест: отправитель только кладет сообщение в очередь"""
+        self.assertTrue(enqueue_telegram_message(42, 'Привет'))
+        key, payload = mock_get_redis.return_value.lpush.call_args[0]
+        self.assertEqual(key, OUTBOX_KEY)
+        self.assertEqual(json.loads(payload)['chat_id'], 42)
@@ -0,0 +1,74 @@
+import json
+import threading
+from unittest.mock import patch
+import fakeredis
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from ml_api.telegram_updates import UpdateConsumerPool, UPDATES_STREAM
+
+
+@override_settings(TELEGRAM_WEBHOOK_SECRET='secret')
+class TelegramWebhookTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        patcher = patch('ml_api.telegram_updates.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_update(self, update, secret='secret'):
+        return self.client.post(
+            reverse('telegram_webhook'), json.dumps(update), content_type='application/json',
+            HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN=secret,
+        )
+
+    def test_update_acked_and_deduplicated(self):
+        """Тест: обновление сразу подтверждается, повторная доставка не дублируется"""
+        update = {'update_id': 1001, 'message': {'chat': {'id': 5}, 'text': '/help'}}
+        with self.assertNumQueries(0):
+            self.assertEqual(self.post_update(update).status_code, 200)
+        self.assertEqual(self.post_update(update).status_code, 200)
+
+        self.assertEqual(self.redis.xlen(UPDATES_STREAM), 1)
+
+    def test_secret_token_required(self):
+        """Тест отклонения обновления без секретного токена"""
+        response = self.post_update({'update_id': 1}, secret='wrong')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.redis.xlen(UPDATES_STREAM), 0)
+
+    def test_consumer_pool_processes_updates(self):
+        """Тест: потребители обрабатывают обновления и подтверждают их"""
+        for update_id in range(3):
+            self.post_update({'update_id': update_id, 'message': {'chat': {'id': 5}, 'text': '/help'}})
+
+        handled = []
+
+        def handler(update):
+            handled.append(update['update_id'])
+            if len(handled) == 3:
+                pool.stop()
+
+        pool = UpdateConsumerPool(handler, size=2, block_ms=50, redis=self.redis)
+        thread = threading.Thread(target=pool.run)
+        thread.start()
+        thread.join(timeout=5)
+
+        self.assertEqual(sorted(handled), [0, 1, 2])
+        pending = self.redis.xpending(UPDATES_STREAM, 'telegram-handlers')
+        self.assertEqual(pending['pending'], 0)
+
+    def test_stale_updates_reclaimed_in_pages(self):
+        """Тест: зависшие обновления упавшего потребителя забираются все, а не одна пачка"""
+        pool = UpdateConsumerPool(lambda update: None, size=1, claim_idle_ms=0, redis=self.redis)
+        pool.ensure_group()
+        for update_id in range(150):
+            self.post_update({'update_id': update_id})
+        # Потребитель прочитал обновления и упал, не подтвердив их
+        self.redis.xreadgroup('telegram-handlers', 'dead', {UPDATES_STREAM: '>'}, count=150)
+
+        handled = []
+        pool.handler = lambda update: handled.append(update['update_id'])
+        pool.claim_stale('alive')
+
+        self.assertEqual(len(handled), 150)
+        self.assertEqual(self.redis.xpending(UPDATES_STREAM, 'telegram-handlers')['pending'], 0)
@@ -0,0 +1,71 @@
+import time
+from unittest import mock
+import fakeredis
+from django.test import SimpleTestCase
+from filemanager.cache import LocalLRU, TieredCache
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class LocalLRUTests(SimpleTestCase):
+    def test_eviction_and_expiry(self):
+        """Тест вытеснения самой старой записи и истечения по TTL"""
+        lru = LocalLRU(max_entries=2, timeout=60)
+        lru.set('a', b'1')
+        lru.set('b', b'2')
+        lru.get('a')
+        lru.set('c', b'3')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), b'1')
+
+        lru.set('short', b'x', timeout=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(lru.get('short'))
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.server = server = fakeredis.FakeServer()
+        patcher = mock.patch.object(
+            TieredCache, '_connect', lambda self, **kwargs: fakeredis.FakeRedis(server=server)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Два «процесса» с общим L2 и общим каналом инвалидации
+        self.first = self._make_cache()
+        self.second = self._make_cache()
+        self.first._l2.clear()
+
+    def _make_cache(self):
+        # L2 - RedisCache поверх того же fakeredis-сервера, что и канал инвалидации
+        tiered = TieredCache('redis://test', {'OPTIONS': {
+            'L1_TIMEOUT': 60, 'connection_class': fakeredis.FakeConnection, 'server': self.server,
+        }})
+        tiered._ensure_subscriber()
+        return tiered
+
+    def test_value_visible_across_processes(self):
+        """Тест: значение из одного процесса видно в другом через L2"""
+        self.first.set('telegram_verify_abc', 42)
+        self.assertEqual(self.second.get('telegram_verify_abc'), 42)
+
+    def test_invalidation_keeps_l1_coherent(self):
+        """Тест: запись в одном процессе сбрасывает L1 другого"""
+        self.first.set('key', 'old')
+        self.assertEqual(self.second.get('key'), 'old')  # теперь в L1 второго
+
+        # Подписчики стартуют асинхронно - ждем, пока оба будут слушать канал
+        self.assertTrue(wait_for(lambda: self.first._redis().pubsub_numsub('cache:invalidate')[0][1] == 2))
+        self.first.set('key', 'new')
+        self.assertTrue(wait_for(lambda: self.second.get('key') == 'new'))
+
+        self.first.delete('key')
+        self.assertTrue(wait_for(lambda: self.second.get('key') is None))
@@ -14,7 +14,9 @@ urlpatterns = [
     path('files/<int:pk>/replace/', views.replace_file, name='replace_file'),
     path('files/<int:pk>/delete/', views.delete_file, name='delete_file'),
     path('files/<int:pk>/download/', views.download_file, name='download_file'),
+    path('results/<int:pk>/text/', views.result_text, name='result_text'),
     path('files/<int:pk>/status/', views.check_processing_status, name='check_processing_status'),
+    path('files/<int:pk>/events/', views.file_status_events, name='file_status_events'),
 ]
 
 urlpatterns += router.urls
\ No newline at end of file
@@ -2,11 +2,15 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404, HttpResponse, StreamingHttpResponse
 from django.conf import settings
+from django.db.models import Count, Sum
 from .forms import FileUploadForm, FileReplaceForm
 from .models import StoredFile
+from .pagination import paginate_keyset, InvalidCursor
+from .events import stream_file_status, subscribe_file_status
 import os
+import re
 from pathlib import Path
 from ml_api.tasks import process_file_task
 
@@ -15,12 +19,36 @@ from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from .models import StoredFile
 from .serializers import FileSerializer
+from .search import SearchResults
+from .filters import filter_by_extracted_values
+from ml_api.models import AnalysisText
+
+
+FILE_LIST_PAGE_SIZE = 50
+BYTE_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
 
 
 @login_required
 def file_list(request):
-    files = StoredFile.objects.filter(user=request.user).order_by('-uploaded_at')
-    return render(request, 'core/file_list.html', {'files': files})
+    user_files = StoredFile.objects.filter(user=request.user)
+
+    try:
+        page = paginate_keyset(
+            user_files,
+            cursor=request.GET.get('cursor'),
+            page_size=FILE_LIST_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        raise Http404('Некорректный курсор страницы')
+
+    totals = user_files.aggregate(total_count=Count('id'), total_size=Sum('size_bytes'))
+
+    return render(request, 'list.html', {
+        'files': page,
+        'next_cursor': page.next_cursor,
+        'total_count': totals['total_count'],
+        'total_size': totals['total_size'] or 0,
+    })
 
 
 @login_required
@@ -53,11 +81,11 @@ def replace_file(request, pk):
             if file.file and os.path.exists(file.file.path):
                 os.remove(file.file.path)
 
-            # Save new file
-            file = form.save()
-            file.processed = False
-            file.processing_status = 'pending'
-            file.save()
+            # Save new file: только колонки содержимого, статус меняется
+            # отдельным условным переходом и не перезаписывает работу задач
+            file = form.save(commit=False)
+            file.save(update_fields=['file', 'description', 'size_bytes', 'content_type', 'page_count'])
+            file.mark_pending(reason='replace')
 
             # Start processing task
             process_file_task.delay(file.id, request.user.id)
@@ -85,7 +113,12 @@ def delete_file(request, pk):
 @login_required
 def view_file(request, pk):
     file = get_object_or_404(StoredFile, pk=pk, user=request.user)
-    return render(request, 'core/view_file.html', {'file': file})
+    # Текст результата нужен только на странице файла, поэтому подгружается здесь
+    analysis_results = file.analysis_results.select_related('text_payload')
+    return render(request, 'core/view_file.html', {
+        'file': file,
+        'analysis_results': analysis_results,
+    })
 
 
 @login_required
@@ -95,6 +128,60 @@ def download_file(request, pk):
     return response
 
 
+@login_required
+def result_text(request, pk):
+    """
+    Полный текст результата анализа (text/plain, UTF-8).
+
+    Текст отдается потоком по блокам; заголовок Range: bytes=start-end
+    возвращает 206 с одним диапазоном, и у блоба распаковываются только
+    затронутые кадры.
+    """
+    payload = get_object_or_404(
+        AnalysisText.objects.select_related('result'), result_id=pk, result__file__user=request.user,
+    )
+    content_type = 'text/plain; charset=utf-8'
+    byte_range = parse_byte_range(request.headers.get('Range'), payload.size)
+    if byte_range is None:
+        response = StreamingHttpResponse(payload.iter_chunks(), content_type=content_type)
+        response['Content-Length'] = payload.size
+    elif byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{payload.size}'
+    else:
+        start, end = byte_range
+        response = HttpResponse(payload.read(start, end + 1), status=206, content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{payload.size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def parse_byte_range(header, size):
+    """
+    (start, end) включительно для заголовка Range, None без заголовка, для
+    неподдерживаемой формы (несколько диапазонов) или синтаксически
+    неверного диапазона (RFC 9110 велит его игнорировать), False - вне
+    текста (в том числе любой диапазон пустого текста).
+    """
+    match = BYTE_RANGE_RE.fullmatch((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if (not first and not last) or (first and last and int(first) > int(last)):
+        return None
+    if size == 0:
+        return False
+    if not first:
+        if int(last) == 0:
+            return False
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
 def check_processing_status(request, pk):
     file = get_object_or_404(StoredFile, pk=pk, user=request.user)
     return JsonResponse({
@@ -102,6 +189,28 @@ def check_processing_status(request, pk):
         'status': file.processing_status
     })
 
+
+async def file_status_events(request, pk):
+    """SSE-поток статуса обработки (запасной вариант - check_processing_status)"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=401)
+
+    file = await StoredFile.objects.filter(pk=pk, user=user).only(
+        'id', 'processed', 'processing_status'
+    ).afirst()
+    if file is None:
+        raise Http404('Файл не найден')
+
+    pubsub = await subscribe_file_status(file.id)
+    if pubsub is None:
+        return HttpResponse(status=503)
+
+    response = StreamingHttpResponse(stream_file_status(file, pubsub), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 class FileViewSet(viewsets.ModelViewSet):
     queryset = StoredFile.objects.all()
     serializer_class = FileSerializer
@@ -111,6 +220,32 @@ class FileViewSet(viewsets.ModelViewSet):
         """Возвращает только файлы текущего пользователя"""
         return self.queryset.filter(user=self.request.user)
 
+    def filter_queryset(self, queryset):
+        """Фильтры по датам и суммам из текста: ?date_from=&date_to=&amount_min=&currency="""
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list':
+            queryset = filter_by_extracted_values(queryset, self.request.query_params)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        """Список файлов; с ?search= - ранжированный полнотекстовый поиск"""
+        query = request.query_params.get('search', '').strip()
+        if not query:
+            return super().list(request, *args, **kwargs)
+
+        hits = self.paginate_queryset(SearchResults(request.user, query))
+        files = self.get_queryset().in_bulk([hit.file_id for hit in hits])
+
+        results = []
+        for hit in hits:
+            if hit.file_id not in files:
+                continue
+            item = self.get_serializer(files[hit.file_id]).data
+            item['rank'] = hit.rank
+            item['snippet'] = hit.snippet
+            results.append(item)
+        return self.get_paginated_response(results)
+
     def perform_create(self, serializer):
         """Привязывает файл к текущему пользователю при создании"""
         serializer.save(user=self.request.user)
\ No newline at end of file
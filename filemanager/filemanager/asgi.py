@@ -3,6 +3,11 @@ ASGI config for filemanager project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The SSE endpoint for processing status (``core.views.file_status_events``) is
+an async view: under ASGI each idle subscriber is a suspended coroutine waiting
+on Redis pub/sub instead of an occupied worker thread, so the site should be
+served through this module (e.g. ``gunicorn -k uvicorn.workers.UvicornWorker``).
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
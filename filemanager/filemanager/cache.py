@@ -0,0 +1,261 @@
+"""
+Двухуровневый кеш: LRU в памяти процесса (L1) перед общим Redis (L2).
+
+L1 снимает сетевой круг с горячих ключей, L2 делает значения видимыми
+всем процессам (gunicorn, Celery). Любая запись или удаление публикует
+ключ в канал Redis pub/sub, и остальные процессы выбрасывают его из L1.
+Если канал недоступен, устаревание L1 ограничено L1_TIMEOUT.
+
+Настройка:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'filemanager.cache.TieredCache',
+            'LOCATION': 'redis://redis:6379/1',
+            'OPTIONS': {'L1_MAX_ENTRIES': 1000, 'L1_TIMEOUT': 30},
+        }
+    }
+
+Остальные OPTIONS передаются в django.core.cache.backends.redis.RedisCache.
+"""
+import logging
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.redis import RedisCache
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+CACHE_TIER_REQUESTS = Counter(
+    'cache_tier_requests_total',
+    'Обращения к уровням кеша',
+    ['tier', 'result'],  # tier: l1, l2; result: hit, miss
+)
+
+TIERED_OPTIONS = ('L1_MAX_ENTRIES', 'L1_TIMEOUT', 'INVALIDATION_CHANNEL')
+CLEAR_ALL = '*'
+
+
+class LocalLRU:
+    """Потокобезопасный LRU с истечением записей; значения хранятся в pickle"""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, payload = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        return payload
+
+    def set(self, key, payload, timeout=None):
+        # L1 никогда не хранит дольше L1_TIMEOUT и дольше, чем сам ключ в L2
+        ttl = self.timeout if timeout is None else min(timeout, self.timeout)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache(BaseCache):
+    def __init__(self, server, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS') or {})
+        tiered = {name: options.pop(name) for name in TIERED_OPTIONS if name in options}
+        params['OPTIONS'] = options
+        super().__init__(params)
+
+        self._server = server
+        self._l2 = RedisCache(server, params)
+        self._l1_max_entries = int(tiered.get('L1_MAX_ENTRIES', 1000))
+        self._l1_timeout = float(tiered.get('L1_TIMEOUT', 30))
+        self._channel = tiered.get('INVALIDATION_CHANNEL', 'cache:invalidate')
+        self._l1 = LocalLRU(self._l1_max_entries, self._l1_timeout)
+        self._sender = uuid.uuid4().hex
+        self._pid = None
+        self._subscriber = None
+        self._publisher = None
+        self._start_lock = threading.Lock()
+
+    # --- pub/sub ---------------------------------------------------------
+
+    def _ensure_subscriber(self):
+        """Запускает слушателя инвалидаций; после fork - заново и с пустым L1"""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._sender = uuid.uuid4().hex
+            self._l1 = LocalLRU(self._l1_max_entries, self._l1_timeout)
+            self._publisher = None
+            self._subscriber = threading.Thread(
+                target=self._listen, name='cache-invalidation', daemon=True
+            )
+            self._subscriber.start()
+
+    def _connect(self, **kwargs):
+        url = self._server if isinstance(self._server, str) else self._server[0]
+        return redis.Redis.from_url(url.split(',')[0], socket_connect_timeout=2, **kwargs)
+
+    def _redis(self):
+        if self._publisher is None:
+            self._publisher = self._connect(socket_timeout=5)
+        return self._publisher
+
+    def _listen(self):
+        pid = os.getpid()
+        backoff = 1
+        while self._pid == pid:
+            try:
+                # Без socket_timeout: listen() ждет сообщений сколь угодно долго
+                pubsub = self._connect(health_check_interval=30).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                # Сообщения, пропущенные до подписки, неизвестны - начинаем с чистого L1
+                self._l1.clear()
+                backoff = 1
+                for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        self._on_invalidate(message['data'])
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error: {e}")
+                self._l1.clear()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _on_invalidate(self, data):
+        sender, _, key = data.decode('utf-8').partition(':')
+        if sender == self._sender:
+            return
+        if key == CLEAR_ALL:
+            self._l1.clear()
+        else:
+            self._l1.delete(key)
+
+    def _publish(self, *keys):
+        try:
+            client = self._redis()
+            for key in keys:
+                client.publish(self._channel, f"{self._sender}:{key}")
+        except Exception as e:
+            # Другие процессы увидят новое значение не позже чем через L1_TIMEOUT
+            logger.warning(f"Cache invalidation publish failed: {e}")
+
+    # --- уровни ----------------------------------------------------------
+
+    def _l1_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _l1_timeout_for(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        return self._l1_timeout if timeout is None else timeout
+
+    def _l1_store(self, l1_key, value, timeout):
+        self._l1.set(l1_key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), self._l1_timeout_for(timeout))
+
+    def get(self, key, default=None, version=None):
+        self._ensure_subscriber()
+        l1_key = self._l1_key(key, version)
+        payload = self._l1.get(l1_key)
+        if payload is not None:
+            CACHE_TIER_REQUESTS.labels('l1', 'hit').inc()
+            return pickle.loads(payload)
+        CACHE_TIER_REQUESTS.labels('l1', 'miss').inc()
+
+        sentinel = object()
+        value = self._l2.get(key, sentinel, version=version)
+        if value is sentinel:
+            CACHE_TIER_REQUESTS.labels('l2', 'miss').inc()
+            return default
+        CACHE_TIER_REQUESTS.labels('l2', 'hit').inc()
+        self._l1_store(l1_key, value, DEFAULT_TIMEOUT)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscriber()
+        l1_key = self._l1_key(key, version)
+        self._l2.set(key, value, timeout=timeout, version=version)
+        self._l1_store(l1_key, value, timeout)
+        self._publish(l1_key)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Атомарность add (блокировки) обеспечивает только L2
+        self._ensure_subscriber()
+        added = self._l2.add(key, value, timeout=timeout, version=version)
+        if added:
+            l1_key = self._l1_key(key, version)
+            self._l1.delete(l1_key)
+            self._publish(l1_key)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._ensure_subscriber()
+        touched = self._l2.touch(key, timeout=timeout, version=version)
+        l1_key = self._l1_key(key, version)
+        self._l1.delete(l1_key)
+        self._publish(l1_key)
+        return touched
+
+    def delete(self, key, version=None):
+        self._ensure_subscriber()
+        l1_key = self._l1_key(key, version)
+        self._l1.delete(l1_key)
+        deleted = self._l2.delete(key, version=version)
+        self._publish(l1_key)
+        return deleted
+
+    def incr(self, key, delta=1, version=None):
+        self._ensure_subscriber()
+        value = self._l2.incr(key, delta, version=version)
+        l1_key = self._l1_key(key, version)
+        self._l1.delete(l1_key)
+        self._publish(l1_key)
+        return value
+
+    def has_key(self, key, version=None):
+        self._ensure_subscriber()
+        if self._l1.get(self._l1_key(key, version)) is not None:
+            return True
+        return self._l2.has_key(key, version=version)
+
+    def clear(self):
+        self._ensure_subscriber()
+        self._l1.clear()
+        self._l2.clear()
+        self._publish(CLEAR_ALL)
+
+    def close(self, **kwargs):
+        self._l2.close(**kwargs)
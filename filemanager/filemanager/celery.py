@@ -5,6 +5,7 @@ from gevent import monkey
 monkey.patch_all()
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from django.conf import settings
 from celery.result import AsyncResult
 
@@ -35,6 +36,35 @@ app.conf.update(
     worker_cancel_long_running_tasks_on_connection_loss=True
 )
 
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """Метрики воркера (в т.ч. заполненность пула БД) на WORKER_METRICS_PORT"""
+    port = getattr(settings, 'WORKER_METRICS_PORT', None)
+    if port:
+        from prometheus_client import start_http_server
+        from filemanager.db import register_pool_metrics
+
+        register_pool_metrics()
+        start_http_server(int(port))
+
+
+@worker_init.connect
+def preload_models(**kwargs):
+    """Модели загружаются в главном процессе воркера до создания дочерних"""
+    from ml_api.registry import registry, parse_model_list
+
+    registry.preload(parse_model_list(settings.ML_WORKER_PRELOAD_MODELS))
+    registry.report('Celery worker')
+
+
+@worker_process_init.connect
+def report_child_process(**kwargs):
+    """Дочерний процесс prefork: модели унаследованы от родителя"""
+    from ml_api.registry import registry
+
+    registry.report('Celery child')
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'Request: {self.request!r}')
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Подключения к PostgreSQL для веб-процессов и воркеров Celery.
+
+Воркер Celery на gevent/eventlet держит по соединению на каждый гринлет,
+поэтому без пула сотня гринлетов открывает до сотни соединений. Режимы
+(DB_CONNECTION_MODE):
+
+    pool       - пул psycopg внутри процесса (Django 5.1+): гринлеты берут
+                 соединение на время задачи и возвращают его, размер пула
+                 ограничен DB_POOL_MAX_SIZE;
+    pgbouncer  - соединения через PgBouncer в режиме транзакций: без
+                 серверных курсоров и подготовленных выражений;
+    persistent - постоянные соединения с проверкой перед повторным
+                 использованием (по соединению на гринлет - не для gevent).
+
+На Django < 5.1 пула нет: явный DB_CONNECTION_MODE=pool - ошибка, а без
+настройки соединения закрываются после каждого запроса и задачи
+(CONN_MAX_AGE=0), а не остаются открытыми у каждого гринлета.
+
+Метрики заполненности пула экспортируются коллектором PoolCollector.
+"""
+import logging
+import os
+
+import django
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+POOL_MODES = ('pool', 'pgbouncer', 'persistent')
+
+
+def configure_database(config, mode=None, env=os.environ):
+    """Дополняет настройки БД из dj_database_url параметрами выбранного режима"""
+    config = dict(config)
+    options = dict(config.get('OPTIONS') or {})
+    requested = mode or env.get('DB_CONNECTION_MODE')
+    mode = requested or 'pool'
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_CONNECTION_MODE must be one of {POOL_MODES}, got {mode!r}")
+    if 'postgresql' not in config.get('ENGINE', ''):
+        return config
+
+    if mode == 'pool' and django.VERSION < (5, 1):
+        if requested:
+            raise ValueError("DB_CONNECTION_MODE=pool requires Django 5.1+; use pgbouncer instead")
+        logger.warning("Connection pooling requires Django 5.1+, closing connections after each use")
+        config['CONN_MAX_AGE'] = 0
+    elif mode == 'pool':
+        from psycopg_pool import ConnectionPool
+
+        # Пул несовместим с CONN_MAX_AGE: соединение возвращается в пул при close()
+        config['CONN_MAX_AGE'] = 0
+        options['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE', 10)),
+            # Сколько гринлет ждет свободное соединение, прежде чем получить ошибку
+            'timeout': float(env.get('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(env.get('DB_POOL_MAX_IDLE', 300)),
+            'max_lifetime': float(env.get('DB_POOL_MAX_LIFETIME', 1800)),
+            # Проверка соединения при выдаче из пула
+            'check': ConnectionPool.check_connection,
+        }
+    elif mode == 'pgbouncer':
+        # Пулом управляет PgBouncer; соединения к нему дешевые, но в режиме
+        # транзакций курсор или подготовленное выражение может оказаться на
+        # другом серверном соединении
+        config['CONN_MAX_AGE'] = int(env.get('DB_CONN_MAX_AGE', 60))
+        config['CONN_HEALTH_CHECKS'] = True
+        config['DISABLE_SERVER_SIDE_CURSORS'] = True
+        options['prepare_threshold'] = None
+    else:
+        config['CONN_MAX_AGE'] = int(env.get('DB_CONN_MAX_AGE', 60))
+        config['CONN_HEALTH_CHECKS'] = True
+
+    config['OPTIONS'] = options
+    return config
+
+
+class PoolCollector:
+    """Заполненность пулов соединений процесса для Prometheus"""
+
+    def _pools(self):
+        from django.db import connections
+
+        for alias in connections:
+            # Свойство pool создает пул при первом обращении, поэтому читаем
+            # только уже созданные пулы
+            pools = getattr(type(connections[alias]), '_connection_pools', {})
+            if alias in pools:
+                yield alias, pools[alias]
+
+    def collect(self):
+        size = GaugeMetricFamily('db_pool_connections', 'Соединения в пуле', labels=['alias', 'state'])
+        limit = GaugeMetricFamily('db_pool_max_connections', 'Размер пула', labels=['alias'])
+        waiting = GaugeMetricFamily('db_pool_requests_waiting', 'Ожидающие соединения', labels=['alias'])
+        queued = CounterMetricFamily('db_pool_requests_queued', 'Запросы, вставшие в очередь', labels=['alias'])
+        wait = CounterMetricFamily('db_pool_wait_seconds', 'Суммарное ожидание соединения', labels=['alias'])
+        errors = CounterMetricFamily('db_pool_request_errors', 'Запросы, не дождавшиеся соединения', labels=['alias'])
+
+        for alias, pool in self._pools():
+            stats = pool.get_stats()
+            available = stats.get('pool_available', 0)
+            size.add_metric([alias, 'in_use'], stats.get('pool_size', 0) - available)
+            size.add_metric([alias, 'idle'], available)
+            limit.add_metric([alias], stats.get('pool_max', 0))
+            waiting.add_metric([alias], stats.get('requests_waiting', 0))
+            queued.add_metric([alias], stats.get('requests_queued', 0))
+            wait.add_metric([alias], stats.get('requests_wait_ms', 0) / 1000)
+            errors.add_metric([alias], stats.get('requests_errors', 0))
+
+        yield from (size, limit, waiting, queued, wait, errors)
+
+
+_collector = None
+
+
+def register_pool_metrics(registry=REGISTRY):
+    global _collector
+    if _collector is None:
+        _collector = PoolCollector()
+        registry.register(_collector)
+    return _collector
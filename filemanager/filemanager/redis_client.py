@@ -0,0 +1,42 @@
+"""
+Общие клиенты Redis для процесса.
+
+Пул соединений создается один раз на процесс и переиспользуется всеми
+модулями проекта (события статуса, очереди уведомлений, кеш и т.д.).
+"""
+import threading
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+_lock = threading.Lock()
+_client = None
+_async_client = None
+
+
+def get_redis():
+    """Синхронный клиент Redis с общим пулом соединений"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.Redis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=5,
+                    socket_connect_timeout=2,
+                    health_check_interval=30,
+                )
+    return _client
+
+
+def get_async_redis():
+    """Асинхронный клиент Redis для ASGI-обработчиков"""
+    global _async_client
+    if _async_client is None:
+        _async_client = aioredis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_connect_timeout=2,
+            health_check_interval=30,
+        )
+    return _async_client
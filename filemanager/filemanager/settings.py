@@ -1,7 +1,10 @@
 import os
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 import dj_database_url
 
+from filemanager.db import configure_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -94,9 +97,11 @@ WSGI_APPLICATION = 'filemanager.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL', 'sqlite:///' + str(BASE_DIR / 'db.sqlite3')),
-}
+    )
 }
 DATABASES['default']['ENGINE'] = 'django_prometheus.db.backends.postgresql'
+# Пул соединений / PgBouncer / постоянные соединения (см. filemanager/db.py)
+DATABASES['default'] = configure_database(DATABASES['default'])
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -155,6 +160,7 @@ ACCOUNT_RATE_LIMITS = {
     'signup': '20/1h',
 }
 LOGIN_REDIRECT_URL = '/'
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
 LOGOUT_REDIRECT_URL = '/accounts/login/'
 SITE_ID = 1
 
@@ -167,12 +173,59 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', 'artiom.petrov1102200@mail.ru')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', 'oyrivhyJAXKn1oV5Wfrh')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'artiom.petrov1102200@mail.ru')
 SERVER_EMAIL = os.getenv('SERVER_EMAIL', 'artiom.petrov1102200@mail.ru')
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 30))
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv('NOTIFICATION_DIGEST_WINDOW', 120))  # секунд
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 100))
+EMAIL_FLUSH_DELAY = int(os.getenv('EMAIL_FLUSH_DELAY', 5))  # секунд между постановкой и отправкой пачки
+EMAIL_CONNECTION_MAX_IDLE = int(os.getenv('EMAIL_CONNECTION_MAX_IDLE', 60))  # секунд
+EMAIL_DEFAULT_RATE_LIMIT = float(os.getenv('EMAIL_DEFAULT_RATE_LIMIT', 5))  # писем в секунду
+EMAIL_PROVIDER_RATE_LIMITS = {
+    'smtp.mail.ru': 2,
+    'smtp.gmail.com': 5,
+    'smtp.yandex.ru': 3,
+}
 
 # ML Services
 ML_SERVICE_URL = os.getenv('ML_SERVICE_URL', 'http://ml_service:5000')
+# local - spaCy/Tesseract в процессе; remote - инференс в ml_service,
+# при его недоступности - локально
+ML_SERVICE_MODE = os.getenv('ML_SERVICE_MODE', 'local')
+ML_SERVICE_TIMEOUT = float(os.getenv('ML_SERVICE_TIMEOUT', 60))  # секунд на ответ
+ML_SERVICE_CONNECT_TIMEOUT = float(os.getenv('ML_SERVICE_CONNECT_TIMEOUT', 2))  # секунд
+ML_SERVICE_RETRIES = int(os.getenv('ML_SERVICE_RETRIES', 2))  # повторов после первой попытки
+ML_SERVICE_MAX_CONNECTIONS = int(os.getenv('ML_SERVICE_MAX_CONNECTIONS', 10))  # на процесс
+# Автомат размыкается после N неудач подряд и пробует снова через RESET секунд
+ML_SERVICE_BREAKER_THRESHOLD = int(os.getenv('ML_SERVICE_BREAKER_THRESHOLD', 5))
+ML_SERVICE_BREAKER_RESET = float(os.getenv('ML_SERVICE_BREAKER_RESET', 30))
 TESSERACT_CMD = os.getenv('TESSERACT_CMD',
                           r'C:\Program Files\Tesseract-OCR\tesseract.exe' if os.name == 'nt' else '/usr/bin/tesseract')
 SPACY_MODEL = os.getenv('SPACY_MODEL', 'ru_core_news_sm')
+# Модели, загружаемые при старте (через запятую, см. ml_api/registry.py);
+# остальные загружаются при первом обращении. Веб-процессам spaCy по
+# умолчанию не нужен, воркеры Celery загружают его до fork
+ML_PRELOAD_MODELS = os.getenv('ML_PRELOAD_MODELS', '')
+ML_WORKER_PRELOAD_MODELS = os.getenv('ML_WORKER_PRELOAD_MODELS', 'spacy')
+ML_CACHE_TTL = int(os.getenv('ML_CACHE_TTL', 3600))  # секунд
+ML_CACHE_STALE_TTL = int(os.getenv('ML_CACHE_STALE_TTL', 600))  # отдается устаревшим, пока идет обновление
+# Контрольные точки этапов обработки живут до успеха или этого срока
+PROCESSING_CHECKPOINT_TTL = int(os.getenv('PROCESSING_CHECKPOINT_TTL', 86400))  # секунд
+# Текст результата крупнее порога хранится блобом zstd в хранилище файлов,
+# блоками по RESULT_BLOB_CHUNK_SIZE байт (единица чтения диапазона)
+RESULT_BLOB_THRESHOLD = int(os.getenv('RESULT_BLOB_THRESHOLD', 256 * 1024))  # байт
+RESULT_BLOB_CHUNK_SIZE = int(os.getenv('RESULT_BLOB_CHUNK_SIZE', 256 * 1024))  # байт
+
+# Telegram
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+TELEGRAM_WEBHOOK_URL = os.getenv('TELEGRAM_WEBHOOK_URL', '')
+TELEGRAM_WEBHOOK_SECRET = os.getenv('TELEGRAM_WEBHOOK_SECRET', '')
+TELEGRAM_UPDATE_DEDUPE_TTL = int(os.getenv('TELEGRAM_UPDATE_DEDUPE_TTL', 24 * 3600))  # секунд
+TELEGRAM_UPDATES_MAXLEN = int(os.getenv('TELEGRAM_UPDATES_MAXLEN', 100000))
+TELEGRAM_CONSUMERS = int(os.getenv('TELEGRAM_CONSUMERS', 4))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))  # сообщений в секунду на бота
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))  # сообщений в секунду в один чат
+TELEGRAM_DISPATCH_CONCURRENCY = int(os.getenv('TELEGRAM_DISPATCH_CONCURRENCY', 10))
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv('TELEGRAM_MAX_ATTEMPTS', 5))
 
 # File processing
 MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 10 * 1024 * 1024))  # 10MB
@@ -180,6 +233,42 @@ PROCESSABLE_EXTENSIONS = ['.pdf', '.docx', '.doc', '.pptx', '.ppt', '.png', '.jp
 SUPPORTED_IMAGE_TYPES = ['.png', '.jpg', '.jpeg', '.pdf', '.tiff']
 SUPPORTED_TEXT_TYPES = ['.txt', '.docx', '.odt', '.rtf']
 
+# Full-text search
+SEARCH_MAX_BODY_CHARS = int(os.getenv('SEARCH_MAX_BODY_CHARS', 500000))  # tsvector ограничен 1MB
+
+# Redis (pub/sub событий статуса обработки)
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/0')
+FILE_STATUS_CHANNEL_PREFIX = 'file_status'
+FILE_STATUS_SSE_HEARTBEAT = int(os.getenv('FILE_STATUS_SSE_HEARTBEAT', 15))  # секунд
+
+# Кеш: CACHE_BACKEND=tiered - LRU процесса (L1) перед общим Redis (L2),
+# см. filemanager/cache.py; по умолчанию (разработка, тесты) - память процесса
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND == 'tiered':
+    CACHES = {
+        'default': {
+            'BACKEND': 'filemanager.cache.TieredCache',
+            'LOCATION': os.getenv('CACHE_REDIS_URL', 'redis://redis:6379/1'),
+            'TIMEOUT': 300,
+            'KEY_PREFIX': 'filemanager',
+            'OPTIONS': {
+                'L1_MAX_ENTRIES': int(os.getenv('CACHE_L1_MAX_ENTRIES', 1000)),
+                'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', 30)),  # секунд
+                'INVALIDATION_CHANNEL': 'cache:invalidate',
+            },
+        }
+    }
+elif CACHE_BACKEND == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'TIMEOUT': 300,
+            'KEY_PREFIX': 'filemanager',
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown CACHE_BACKEND: {CACHE_BACKEND}")
+
 # Celery settings
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
@@ -191,8 +280,13 @@ CELERY_TASK_CREATE_MISSING_QUEUES = True
 CELERY_TASK_ROUTES = {
     "ml_api.tasks.process_file_task": {"queue": "high_priority"},
     "ml_api.tasks.process_large_file_task": {"queue": "low_priority"},
+    "ml_api.tasks.flush_email_outbox": {"queue": "io"},
 }
 CELERY_WORKER_CONCURRENCY = int(os.getenv('CELERY_WORKER_CONCURRENCY', 3))
+# Порт HTTP-метрик Prometheus воркера Celery (пусто - не запускать)
+WORKER_METRICS_PORT = os.getenv('WORKER_METRICS_PORT')
+# PDF начиная с этого числа страниц распознается группой задач по страницам
+OCR_FANOUT_MIN_PAGES = int(os.getenv('OCR_FANOUT_MIN_PAGES', 2))
 
 # Logging
 LOG_DIR = os.path.join(BASE_DIR, 'logs')
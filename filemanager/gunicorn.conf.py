@@ -0,0 +1,12 @@
+# gunicorn.conf.py
+"""Настройки gunicorn; файл читается автоматически из рабочего каталога"""
+
+# Приложение и модели из ML_PRELOAD_MODELS загружаются в мастере до fork,
+# страницы моделей воркеры делят с мастером (copy-on-write)
+preload_app = True
+
+
+def post_fork(server, worker):
+    from ml_api.registry import registry
+
+    registry.report('Gunicorn worker')
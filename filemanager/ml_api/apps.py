@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class MlApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ml_api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # При gunicorn --preload ready() выполняется в мастере до fork,
+        # и модели делятся между воркерами
+        from django.conf import settings
+        from .registry import registry, parse_model_list
+        models = parse_model_list(settings.ML_PRELOAD_MODELS)
+        if models:
+            registry.preload(models)
+            registry.report('Preload')
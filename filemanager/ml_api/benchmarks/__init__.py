@@ -0,0 +1,2 @@
+# ml_api/benchmarks
+"""Бенчмарки конвейера обработки: manage.py run_benchmarks"""
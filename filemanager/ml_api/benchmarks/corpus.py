@@ -0,0 +1,128 @@
+# ml_api/benchmarks/corpus.py
+"""
+Детерминированный синтетический корпус для бенчмарков.
+
+Тексты собираются из фиксированных словарей генератором с постоянным
+зерном, поэтому при одинаковых параметрах корпус побайтно совпадает
+между запусками. Изображения - тот же текст, отрисованный шрифтом
+DejaVu Sans (если найден) на странице A4 при заданном DPI.
+"""
+import random
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFont
+
+SEED = 20261019
+
+RU_WORDS = (
+    'договор', 'поставка', 'оплата', 'сторона', 'покупатель', 'продавец', 'товар', 'счет',
+    'акт', 'услуга', 'срок', 'обязательство', 'компания', 'директор', 'москва', 'банк',
+    'реквизиты', 'приложение', 'исполнитель', 'заказчик', 'работа', 'стоимость', 'налог',
+    'хороший', 'отличный', 'плохой', 'рекомендуем', 'согласно', 'настоящий', 'пункт',
+)
+EN_WORDS = (
+    'agreement', 'supply', 'payment', 'party', 'buyer', 'seller', 'goods', 'invoice',
+    'act', 'service', 'term', 'obligation', 'company', 'director', 'london', 'bank',
+    'details', 'appendix', 'contractor', 'customer', 'work', 'price', 'tax',
+    'good', 'excellent', 'bad', 'recommend', 'according', 'present', 'clause',
+)
+RU_NAMES = ('ООО Ромашка', 'АО Вектор', 'Иван Петров', 'Санкт-Петербург', 'Мария Иванова')
+EN_NAMES = ('Acme Ltd', 'John Smith', 'New York', 'Globex Corporation', 'Mary Jones')
+RU_MONTHS = ('января', 'февраля', 'марта', 'апреля', 'мая', 'июня',
+             'июля', 'августа', 'сентября', 'октября', 'ноября', 'декабря')
+
+FONT_PATHS = (
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/dejavu/DejaVuSans.ttf',
+    '/Library/Fonts/DejaVuSans.ttf',
+    'C:/Windows/Fonts/arial.ttf',
+)
+A4_INCHES = (8.27, 11.69)
+FONT_POINTS = 12
+
+
+def _sentence(rng, words, names, language):
+    parts = [rng.choice(words) for _ in range(rng.randint(6, 14))]
+    roll = rng.random()
+    if roll < 0.2:
+        parts.append(rng.choice(names))
+    elif roll < 0.35:
+        day, month, year = rng.randint(1, 28), rng.randint(1, 12), rng.randint(2015, 2026)
+        if language == 'ru' and rng.random() < 0.5:
+            parts.append(f'{day} {RU_MONTHS[month - 1]} {year}')
+        else:
+            parts.append(f'{day:02d}.{month:02d}.{year}')
+    elif roll < 0.5:
+        amount = f'{rng.randint(1, 999)} {rng.randint(0, 999):03d},{rng.randint(0, 99):02d}'
+        parts.append(f'{amount} руб.' if language == 'ru' else f'${amount}')
+    return ' '.join(parts).capitalize() + '.'
+
+
+def make_text(language='ru', chars=10000, seed=SEED):
+    """Связный по форме текст длиной не меньше chars символов"""
+    rng = random.Random(f'{seed}:{language}:{chars}')
+    words, names = (RU_WORDS, RU_NAMES) if language == 'ru' else (EN_WORDS, EN_NAMES)
+    sentences, length = [], 0
+    while length < chars:
+        sentence = _sentence(rng, words, names, language)
+        sentences.append(sentence)
+        length += len(sentence) + 1
+        if rng.random() < 0.15:
+            sentences.append('\n')
+    return ' '.join(sentences).replace(' \n ', '\n')
+
+
+def load_font(size):
+    for path in FONT_PATHS:
+        if Path(path).exists():
+            return ImageFont.truetype(path, size)
+    return ImageFont.load_default(size)
+
+
+def render_page(text, dpi=300):
+    """Страница A4 с текстом, перенесенным по ширине; лишнее обрезается"""
+    width, height = (int(inches * dpi) for inches in A4_INCHES)
+    margin = dpi // 2
+    font = load_font(int(FONT_POINTS * dpi / 72))
+    line_height = int(FONT_POINTS * dpi / 72 * 1.4)
+
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    y = margin
+    for paragraph in text.split('\n'):
+        line = ''
+        for word in paragraph.split():
+            candidate = f'{line} {word}'.strip()
+            if draw.textlength(candidate, font=font) > width - 2 * margin and line:
+                draw.text((margin, y), line, fill=0, font=font)
+                y += line_height
+                line = word
+            else:
+                line = candidate
+            if y > height - margin - line_height:
+                return image
+        draw.text((margin, y), line, fill=0, font=font)
+        y += line_height
+    return image
+
+
+def write_image(path, language='ru', dpi=300, seed=SEED):
+    render_page(make_text(language, 3000, seed), dpi).save(path, dpi=(dpi, dpi))
+    return path
+
+
+def write_pdf(path, pages=3, language='ru', dpi=200, seed=SEED):
+    """PDF из отрисованных страниц (как скан): текстового слоя нет, нужен OCR"""
+    images = [render_page(make_text(language, 3000, f'{seed}:{page}'), dpi) for page in range(pages)]
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=dpi)
+    return path
+
+
+def write_docx(path, language='ru', chars=20000, seed=SEED):
+    from docx import Document
+
+    document = Document()
+    for paragraph in make_text(language, chars, seed).split('\n'):
+        document.add_paragraph(paragraph)
+    document.save(path)
+    return path
@@ -0,0 +1,220 @@
+# ml_api/benchmarks/suite.py
+"""
+Бенчмарки горячих путей обработки и сравнение с сохраненной базой.
+
+Каждый случай выполняется в отдельном дочернем процессе (fork): так пик
+RSS относится к одному случаю, а не ко всему прогону. Данные корпуса
+готовятся в родителе и в замер не входят, модель spaCy загружается
+до fork. Случаи, которым не хватает Tesseract, poppler или модели,
+пропускаются с указанием причины.
+"""
+import json
+import multiprocessing
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from .. import services
+from ..extraction import extract_dates, extract_money
+from ..registry import registry
+from . import corpus
+
+
+class Case:
+    def __init__(self, name, setup, func, units, unit, requires=()):
+        self.name = name
+        self.setup = setup  # setup(workdir) -> аргументы func
+        self.func = func
+        self.units = units  # объем работы одного вызова (для пропускной способности)
+        self.unit = unit
+        self.requires = requires
+
+
+def text_args(language, chars):
+    return lambda workdir: (corpus.make_text(language, chars),)
+
+
+def image_args(dpi):
+    return lambda workdir: (str(corpus.write_image(workdir / f'page-{dpi}.png', dpi=dpi)),)
+
+
+def pdf_args(pages):
+    return lambda workdir: (str(corpus.write_pdf(workdir / f'scan-{pages}.pdf', pages=pages)),)
+
+
+def docx_args(workdir):
+    return (str(corpus.write_docx(workdir / 'document.docx')),)
+
+
+def txt_args(workdir):
+    path = workdir / 'document.txt'
+    path.write_text(corpus.make_text('ru', 20000), encoding='utf-8')
+    return (str(path),)
+
+
+def process_pdf(path):
+    text = services.extract_text_from_pdf(path)
+    return services.process_text_with_ner(text)
+
+
+def process_docx(path):
+    return services.process_text_with_ner(services.extract_text_from_docx(path))
+
+
+def process_txt(path):
+    with open(path, encoding='utf-8') as f:
+        return services.process_text_with_ner(f.read())
+
+
+CASES = [
+    # Микро: отдельные функции
+    Case('extract_dates[ru-100k]', text_args('ru', 100000), extract_dates, 100000, 'chars'),
+    Case('extract_dates[en-100k]', text_args('en', 100000), extract_dates, 100000, 'chars'),
+    Case('extract_money[ru-100k]', text_args('ru', 100000), extract_money, 100000, 'chars'),
+    Case('extract_money[en-100k]', text_args('en', 100000), extract_money, 100000, 'chars'),
+    Case('preprocess_image[150dpi]', image_args(150), services.preprocess_image, 1, 'pages'),
+    Case('preprocess_image[300dpi]', image_args(300), services.preprocess_image, 1, 'pages'),
+    Case('run_tesseract[150dpi]', image_args(150), services.run_tesseract, 1, 'pages', ('tesseract',)),
+    Case('run_tesseract[300dpi]', image_args(300), services.run_tesseract, 1, 'pages', ('tesseract',)),
+    Case('run_spacy[ru-10k]', text_args('ru', 10000), services.run_spacy, 10000, 'chars', ('spacy',)),
+    Case('run_spacy[ru-100k]', text_args('ru', 100000), services.run_spacy, 100000, 'chars', ('spacy',)),
+    Case('run_spacy[en-10k]', text_args('en', 10000), services.run_spacy, 10000, 'chars', ('spacy',)),
+    Case('extract_text_from_pdf[3p]', pdf_args(3), services.extract_text_from_pdf, 3, 'pages',
+         ('tesseract', 'poppler')),
+    # Макро: файл целиком по форматам, как в process_file_task
+    Case('e2e[png]', image_args(300), services.process_image_with_ocr, 1, 'files', ('tesseract', 'spacy')),
+    Case('e2e[pdf-3p]', pdf_args(3), process_pdf, 1, 'files', ('tesseract', 'poppler', 'spacy')),
+    Case('e2e[docx]', docx_args, process_docx, 1, 'files', ('spacy',)),
+    Case('e2e[txt]', txt_args, process_txt, 1, 'files', ('spacy',)),
+]
+
+
+def missing_requirement(requires):
+    """Имя недоступной зависимости случая или None"""
+    for requirement in requires:
+        if requirement == 'tesseract' and not shutil.which(settings.TESSERACT_CMD):
+            return 'tesseract'
+        if requirement == 'poppler' and not shutil.which('pdftoppm'):
+            return 'poppler'
+        if requirement == 'spacy' and registry.get('spacy') is None:
+            return f'spacy model {settings.SPACY_MODEL}'
+    return None
+
+
+def peak_rss():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS - байты
+    return usage if sys.platform == 'darwin' else usage * 1024
+
+
+def measure(func, args, repeat, warmup):
+    for _ in range(warmup):
+        func(*args)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return {'timings': timings, 'peak_rss_bytes': peak_rss()}
+
+
+def _measure_child(connection, func, args, repeat, warmup):
+    try:
+        connection.send(measure(func, args, repeat, warmup))
+    except Exception as e:
+        connection.send({'error': f'{type(e).__name__}: {e}'})
+    finally:
+        connection.close()
+
+
+def measure_isolated(func, args, repeat, warmup):
+    """Замер в дочернем процессе; без fork (Windows) - в текущем"""
+    if 'fork' not in multiprocessing.get_all_start_methods():
+        return measure(func, args, repeat, warmup)
+    context = multiprocessing.get_context('fork')
+    parent, child = context.Pipe(duplex=False)
+    process = context.Process(target=_measure_child, args=(child, func, args, repeat, warmup))
+    process.start()
+    child.close()
+    try:
+        return parent.recv()
+    except EOFError:
+        process.join()
+        return {'error': f'benchmark process exited with code {process.exitcode}'}
+    finally:
+        process.join()
+
+
+def summarize(case, measured):
+    timings = measured['timings']
+    median = statistics.median(timings)
+    return {
+        'unit': case.unit,
+        'units': case.units,
+        'repeat': len(timings),
+        'min_s': min(timings),
+        'median_s': median,
+        'mean_s': statistics.fmean(timings),
+        'throughput': case.units / median if median else None,
+        'peak_rss_bytes': measured['peak_rss_bytes'],
+    }
+
+
+def run_suite(cases, workdir, repeat=5, warmup=1):
+    """{имя случая: результат или {'skipped': причина} / {'error': ...}}"""
+    workdir = Path(workdir)
+    results = {}
+    for case in cases:
+        missing = missing_requirement(case.requires)
+        if missing:
+            results[case.name] = {'skipped': f'{missing} is not available'}
+            continue
+        measured = measure_isolated(case.func, case.setup(workdir), repeat, warmup)
+        results[case.name] = measured if 'error' in measured else summarize(case, measured)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': multiprocessing.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Регрессии относительно базы: медиана времени или пик RSS выросли
+    больше чем на tolerance (доля). Случаи без базы не сравниваются.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('cases', {}).get(name)
+        if not base or 'median_s' not in result or 'median_s' not in base:
+            continue
+        for metric in ('median_s', 'peak_rss_bytes'):
+            if result[metric] > base[metric] * (1 + tolerance):
+                change = result[metric] / base[metric] - 1
+                regressions.append(f'{name}: {metric} {base[metric]:.4g} -> {result[metric]:.4g} (+{change:.0%})')
+    return regressions
+
+
+def load_baseline(path):
+    path = Path(path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def write_results(path, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {'environment': environment(), 'cases': results}
+    path.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding='utf-8')
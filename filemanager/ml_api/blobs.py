@@ -0,0 +1,83 @@
+# ml_api/blobs.py
+"""
+Крупные тексты результатов в хранилище файлов (storage backend).
+
+Текст режется на блоки по RESULT_BLOB_CHUNK_SIZE байт UTF-8, каждый блок
+сжимается отдельным кадром zstd. В БД хранятся только путь и смещения
+кадров, поэтому диапазон текста читается без распаковки всего блоба:
+открывается файл, делается seek к нужным кадрам и распаковываются только
+они (для S3-подобных хранилищ это Range-запрос).
+"""
+import uuid
+
+import zstandard
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+BLOB_PREFIX = 'results'
+ZSTD_LEVEL = 6
+
+
+class TextBlob:
+    """Указатель на текст в хранилище: путь, размер текста и смещения кадров"""
+
+    def __init__(self, path, size, chunk_size, frames, storage=None):
+        self.path = path
+        self.size = size
+        self.chunk_size = chunk_size
+        # frames[i] - смещение i-го кадра в файле, последний элемент - длина файла
+        self.frames = frames
+        self.storage = storage or default_storage
+
+    @classmethod
+    def write(cls, raw, chunk_size=None, storage=None):
+        """Сжимает байты текста по блокам и сохраняет в хранилище"""
+        storage = storage or default_storage
+        chunk_size = chunk_size or settings.RESULT_BLOB_CHUNK_SIZE
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+
+        frames, parts, offset = [0], [], 0
+        for start in range(0, len(raw), chunk_size):
+            frame = compressor.compress(raw[start:start + chunk_size])
+            parts.append(frame)
+            offset += len(frame)
+            frames.append(offset)
+
+        name = f"{BLOB_PREFIX}/{uuid.uuid4().hex[:2]}/{uuid.uuid4().hex}.zst"
+        path = storage.save(name, ContentFile(b''.join(parts)))
+        return cls(path, len(raw), chunk_size, frames, storage)
+
+    def read(self, start=0, end=None):
+        """Байты текста [start, end) с распаковкой только затронутых кадров"""
+        end = self.size if end is None else min(end, self.size)
+        if start >= end:
+            return b''
+        first = start // self.chunk_size
+        last = (end - 1) // self.chunk_size
+
+        decompressor = zstandard.ZstdDecompressor()
+        with self.storage.open(self.path, 'rb') as f:
+            f.seek(self.frames[first])
+            data = f.read(self.frames[last + 1] - self.frames[first])
+
+        chunks = []
+        for index in range(first, last + 1):
+            begin = self.frames[index] - self.frames[first]
+            stop = self.frames[index + 1] - self.frames[first]
+            chunks.append(decompressor.decompress(data[begin:stop]))
+        raw = b''.join(chunks)
+        skip = start - first * self.chunk_size
+        return raw[skip:skip + (end - start)]
+
+    def iter_chunks(self):
+        """Текст по блокам - для потоковой отдачи без загрузки целиком"""
+        for start in range(0, self.size, self.chunk_size):
+            yield self.read(start, start + self.chunk_size)
+
+    def delete(self):
+        self.delete_path(self.path, self.storage)
+
+    @staticmethod
+    def delete_path(path, storage=None):
+        (storage or default_storage).delete(path)
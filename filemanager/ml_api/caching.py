@@ -0,0 +1,157 @@
+# ml_api/caching.py
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connections, models
+
+from .metrics import ML_CACHE_COMPUTE, ML_CACHE_LATENCY, ML_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical_default(value):
+    if isinstance(value, models.Model):
+        return [value._meta.label_lower, value.pk]
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if hasattr(value, 'read'):
+        raise TypeError('File objects cannot be part of a cache key')
+    return str(value)
+
+
+def canonical_json(value):
+    """Детерминированный JSON: сортированные ключи, без пробелов, модели -> (label, pk)"""
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False,
+                      default=_canonical_default)
+
+
+class MLCache:
+    """
+    Кеш результатов ML-вызовов поверх Django cache.
+
+    - ключ: sha256 от канонического JSON, длина не зависит от входных данных;
+    - single-flight: вычисляет только владелец блокировки (cache.add),
+      остальные ждут результата с растущим интервалом опроса, а по
+      таймауту или после снятия блокировки вычисляют сами;
+    - stale-while-revalidate: после ttl значение еще stale_ttl секунд
+      отдается сразу, а обновление выполняется в фоне.
+
+    compute() должен быть чистым: при фоновом обновлении он вызывается
+    вне запроса, а при попадании в кеш не вызывается вовсе.
+    """
+
+    def __init__(self, namespace, ttl=3600, stale_ttl=600, lock_timeout=60,
+                 wait_timeout=10, poll_interval=0.05, max_poll_interval=1.0, backend=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.backend = backend or cache
+
+    def make_key(self, *parts):
+        digest = hashlib.sha256(canonical_json(parts).encode('utf-8')).hexdigest()
+        return f"ml:{self.namespace}:{digest}"
+
+    def _lock_key(self, key):
+        return f"{key}:lock"
+
+    def _store(self, key, value):
+        entry = {'value': value, 'fresh_until': time.time() + self.ttl}
+        self.backend.set(key, entry, timeout=self.ttl + self.stale_ttl)
+
+    def _acquire(self, key):
+        token = uuid.uuid4().hex
+        if self.backend.add(self._lock_key(key), token, timeout=self.lock_timeout):
+            return token
+        return None
+
+    def _release(self, key, token):
+        # Не снимаем чужую блокировку, если своя успела истечь
+        if self.backend.get(self._lock_key(key)) == token:
+            self.backend.delete(self._lock_key(key))
+
+    def _compute(self, key, compute):
+        started = time.perf_counter()
+        value = compute()
+        ML_CACHE_COMPUTE.labels(self.namespace).observe(time.perf_counter() - started)
+        self._store(key, value)
+        return value
+
+    def _revalidate(self, key, compute, token):
+        try:
+            self._compute(key, compute)
+        except Exception as e:
+            logger.warning(f"Background revalidation of {key} failed: {e}")
+        finally:
+            self._release(key, token)
+            connections.close_all()
+
+    def _record(self, result, started):
+        ML_CACHE_REQUESTS.labels(self.namespace, result).inc()
+        ML_CACHE_LATENCY.labels(self.namespace, result).observe(time.perf_counter() - started)
+
+    def get_or_compute(self, key_parts, compute):
+        """
+        Значение по ключу или результат compute().
+
+        Возвращает пару (value, result), где result - hit, stale, miss,
+        wait_hit или wait_timeout.
+        """
+        started = time.perf_counter()
+        key = self.make_key(*key_parts)
+
+        entry = self.backend.get(key)
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                self._record('hit', started)
+                return entry['value'], 'hit'
+            token = self._acquire(key)
+            if token:
+                threading.Thread(
+                    target=self._revalidate, args=(key, compute, token), daemon=True
+                ).start()
+            self._record('stale', started)
+            return entry['value'], 'stale'
+
+        token = self._acquire(key)
+        if token:
+            try:
+                value = self._compute(key, compute)
+            finally:
+                self._release(key, token)
+            self._record('miss', started)
+            return value, 'miss'
+
+        deadline = time.monotonic() + self.wait_timeout
+        delay = self.poll_interval
+        while (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.max_poll_interval)
+            entry = self.backend.get(key)
+            if entry is not None:
+                self._record('wait_hit', started)
+                return entry['value'], 'wait_hit'
+            if self.backend.get(self._lock_key(key)) is None:
+                break
+
+        # Владелец блокировки не успел или упал - считаем сами
+        value = self._compute(key, compute)
+        self._record('wait_timeout', started)
+        return value, 'wait_timeout'
+
+    def invalidate(self, *key_parts):
+        self.backend.delete(self.make_key(*key_parts))
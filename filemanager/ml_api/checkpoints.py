@@ -0,0 +1,124 @@
+# ml_api/checkpoints.py
+"""
+Контрольные точки этапов обработки файла.
+
+Промежуточные результаты (текст страниц PDF, извлеченный текст, анализ)
+сохраняются в Redis по ключу хеш содержимого + этап + версия этапа.
+Повторная попытка задачи пропускает завершенные этапы и страницы, а не
+распознает документ заново. После успешного сохранения результата точки
+удаляются, неиспользованные истекают через PROCESSING_CHECKPOINT_TTL.
+"""
+import hashlib
+import json
+import logging
+import zlib
+
+from django.conf import settings
+
+from filemanager.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+PAGE_STAGE = 'page'
+
+
+def file_content_hash(path):
+    """SHA-256 содержимого файла, читается блоками"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _dumps(value):
+    return zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+
+
+def _loads(payload):
+    return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+
+def _is_complete(value):
+    """Пустые и ошибочные результаты не сохраняются - их нужно пересчитать"""
+    if not value:
+        return False
+    return not (isinstance(value, dict) and value.get('status') == 'error')
+
+
+class StageCheckpoint:
+    """
+    Контрольные точки одного содержимого файла.
+
+    Ошибки Redis не прерывают обработку: этап просто вычисляется заново.
+    """
+
+    def __init__(self, content_hash, stage_versions, redis=None, ttl=None):
+        self.content_hash = content_hash
+        self.stage_versions = stage_versions
+        self.redis = redis or get_redis()
+        self.ttl = ttl or settings.PROCESSING_CHECKPOINT_TTL
+        self.restored = []
+
+    @classmethod
+    def for_file(cls, path, stage_versions, **kwargs):
+        return cls(file_content_hash(path), stage_versions, **kwargs)
+
+    def key(self, stage):
+        return f"checkpoint:{self.content_hash}:{stage}:{self.stage_versions[stage]}"
+
+    def load(self, stage):
+        try:
+            payload = self.redis.get(self.key(stage))
+        except Exception as e:
+            logger.warning(f"Checkpoint read failed ({stage}): {e}")
+            return None
+        return _loads(payload) if payload is not None else None
+
+    def save(self, stage, value):
+        try:
+            self.redis.set(self.key(stage), _dumps(value), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Checkpoint write failed ({stage}): {e}")
+
+    def run(self, stage, compute):
+        """Результат этапа из контрольной точки или вычисленный и сохраненный"""
+        value = self.load(stage)
+        if value is not None:
+            self.restored.append(stage)
+            logger.info(f"Resuming {self.content_hash[:12]} from checkpoint '{stage}'")
+            return value
+        value = compute()
+        if _is_complete(value):
+            self.save(stage, value)
+        return value
+
+    def pages(self):
+        """Уже распознанные страницы: {номер: текст}"""
+        try:
+            stored = self.redis.hgetall(self.key(PAGE_STAGE))
+        except Exception as e:
+            logger.warning(f"Checkpoint read failed ({PAGE_STAGE}): {e}")
+            return {}
+        return {int(number): _loads(payload) for number, payload in stored.items()}
+
+    def save_page(self, number, text):
+        """Сохраняет текст страницы; False, если Redis недоступен"""
+        key = self.key(PAGE_STAGE)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hset(key, number, _dumps(text))
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Checkpoint write failed ({PAGE_STAGE} {number}): {e}")
+            return False
+        return True
+
+    def clear(self):
+        """Удаляет все точки содержимого после успешного сохранения результата"""
+        try:
+            self.redis.delete(*(self.key(stage) for stage in self.stage_versions))
+        except Exception as e:
+            logger.warning(f"Checkpoint cleanup failed: {e}")
@@ -0,0 +1,63 @@
+# ml_api/entities.py
+import re
+import unicodedata
+
+from .models import AnalysisEntity, EntityTerm
+
+MAX_TERM_RESULTS = 50
+MAX_FILE_RESULTS = 100
+
+PUNCT_RE = re.compile(r'[^\w\s]+', re.UNICODE)
+SPACE_RE = re.compile(r'\s+', re.UNICODE)
+
+
+def normalize_entity(text):
+    """
+    Нормализованная форма сущности для индекса.
+
+    Текст (обычно лемма spaCy) приводится к NFKC и casefold, «ё» заменяется
+    на «е», пунктуация и лишние пробелы удаляются.
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold().replace('ё', 'е')
+    text = PUNCT_RE.sub(' ', text)
+    return SPACE_RE.sub(' ', text).strip()[:255]
+
+
+def search_terms(user, prefix='', entity_type=None, limit=MAX_TERM_RESULTS):
+    """
+    Термины пользователя по префиксу нормализованного текста.
+
+    Фильтр norm__startswith по уже нормализованному префиксу использует
+    индекс (user, norm) и не требует LOWER() на стороне БД.
+    """
+    queryset = EntityTerm.objects.filter(user=user, file_count__gt=0)
+    norm = normalize_entity(prefix)
+    if norm:
+        queryset = queryset.filter(norm__startswith=norm)
+    if entity_type:
+        queryset = queryset.filter(entity_type=entity_type.upper())
+    return queryset.order_by('-file_count', '-mention_count', 'norm')[:limit]
+
+
+def term_postings(term, limit=MAX_FILE_RESULTS):
+    """Файлы, в которых встречается термин, со смещениями упоминаний"""
+    mentions = (
+        AnalysisEntity.objects.filter(term=term)
+        .select_related('file')
+        .only('file__id', 'file__file', 'file__description', 'text', 'start', 'end')
+        .order_by('-file_id', 'start')
+    )
+    files = {}
+    for mention in mentions.iterator():
+        if mention.file_id not in files:
+            if len(files) >= limit:
+                break
+            files[mention.file_id] = {
+                'file_id': mention.file_id,
+                'name': mention.file.filename(),
+                'mentions': [],
+            }
+        files[mention.file_id]['mentions'].append(
+            {'text': mention.text, 'start': mention.start, 'end': mention.end}
+        )
+    return list(files.values())
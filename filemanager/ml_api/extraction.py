@@ -0,0 +1,127 @@
+# ml_api/extraction.py
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+# Основы названий месяцев в любом падеже: «15 марта», «май 2024», «мая»
+MONTH_STEMS = (
+    ('январ', 1), ('феврал', 2), ('март', 3), ('апрел', 4), ('ма', 5), ('июн', 6),
+    ('июл', 7), ('август', 8), ('сентябр', 9), ('октябр', 10), ('ноябр', 11), ('декабр', 12),
+)
+
+NUMERIC_DATE_RE = re.compile(r'\b(\d{1,2})[./](\d{1,2})[./](\d{4}|\d{2})\b')
+ISO_DATE_RE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+TEXT_DATE_RE = re.compile(r'\b(\d{1,2})\s+([а-яё]+)\s+(\d{4})\b', re.IGNORECASE)
+
+# Число с разделителями разрядов (пробелы, запятая или точка) и копейками;
+# начинается не в середине другого числа
+NUMBER = r'(?<![\d.,])(?:\d{1,3}(?:[ \u00a0\u202f,.]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?)'
+SCALE = r'(?:\s*(тыс|млн|млрд)\.?)?'
+CURRENCY_AFTER = r'руб\w*|р\.|₽|rub|евро|eur|€|usd|долл\w*|\$'
+CURRENCY_BEFORE = r'\$|€|₽'
+
+MONEY_AFTER_RE = re.compile(rf'({NUMBER}){SCALE}\s*({CURRENCY_AFTER})', re.IGNORECASE)
+MONEY_BEFORE_RE = re.compile(rf'({CURRENCY_BEFORE})\s*({NUMBER}){SCALE}', re.IGNORECASE)
+
+SCALES = {'тыс': 1000, 'млн': 1000000, 'млрд': 1000000000}
+
+# Целая часть ExtractedAmount.amount (max_digits=18, decimal_places=2)
+MAX_AMOUNT = Decimal(10) ** 16
+
+
+def month_number(word):
+    word = word.lower()
+    if word in ('май', 'мая', 'мае'):
+        return 5
+    for stem, number in MONTH_STEMS:
+        if stem != 'ма' and word.startswith(stem):
+            return number
+    return None
+
+
+def make_date(year, month, day):
+    """ISO-строка даты или None для несуществующей даты (31.02, 13-й месяц)"""
+    if year < 100:
+        year += 2000 if year < 70 else 1900
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+def currency_code(symbol):
+    symbol = symbol.lower()
+    if symbol.startswith(('руб', 'р.', '₽', 'rub')):
+        return 'RUB'
+    if symbol in ('евро', 'eur', '€'):
+        return 'EUR'
+    return 'USD'
+
+
+def parse_amount(number, scale=None):
+    """
+    Decimal из «1 500,50», «1,500.50» или «1.000.000» с учетом множителя
+    «тыс»/«млн». Слишком большие числа (номера, реквизиты) - None.
+    """
+    number = re.sub(r'[ \u00a0\u202f]|[.,](?=\d{3})', '', number).replace(',', '.')
+    try:
+        amount = Decimal(number)
+        if scale:
+            amount *= SCALES[scale.lower()]
+        amount = amount.quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+    return amount if amount < MAX_AMOUNT else None
+
+
+def extract_dates(text):
+    """
+    Даты из текста в нормализованном виде.
+
+    Числовые даты читаются в порядке день.месяц.год, как принято в
+    русскоязычных документах. Значение - ISO-строка (YYYY-MM-DD).
+    """
+    dates = []
+    for match in NUMERIC_DATE_RE.finditer(text):
+        day, month, year = (int(group) for group in match.groups())
+        dates.append((match, make_date(year, month, day)))
+    for match in ISO_DATE_RE.finditer(text):
+        year, month, day = (int(group) for group in match.groups())
+        dates.append((match, make_date(year, month, day)))
+    for match in TEXT_DATE_RE.finditer(text):
+        month = month_number(match.group(2))
+        if month:
+            dates.append((match, make_date(int(match.group(3)), month, int(match.group(1)))))
+
+    return [
+        {'raw': match.group(0), 'value': value, 'start': match.start(), 'end': match.end()}
+        for match, value in sorted(dates, key=lambda item: item[0].start())
+        if value
+    ]
+
+
+def extract_money(text):
+    """Денежные суммы из текста: сумма (строка Decimal) и код валюты ISO 4217"""
+    amounts = []
+    for match in MONEY_BEFORE_RE.finditer(text):
+        symbol, number, scale = match.groups()
+        amounts.append((match, parse_amount(number, scale), currency_code(symbol)))
+    prefixed = [(match.start(), match.end()) for match, _, _ in amounts]
+    for match in MONEY_AFTER_RE.finditer(text):
+        # «$100 руб» - одна сумма: валюта перед числом важнее
+        if any(match.start() < end and start < match.end() for start, end in prefixed):
+            continue
+        number, scale, symbol = match.groups()
+        amounts.append((match, parse_amount(number, scale), currency_code(symbol)))
+
+    return [
+        {
+            'raw': match.group(0),
+            'amount': str(amount),
+            'currency': currency,
+            'start': match.start(),
+            'end': match.end(),
+        }
+        for match, amount, currency in sorted(amounts, key=lambda item: item[0].start())
+        if amount is not None
+    ]
@@ -0,0 +1,336 @@
+# ml_api/loadtest.py
+"""
+Нагрузочное тестирование ml_service и цепочки загрузки/обработки Django.
+
+N клиентов в замкнутом цикле отправляют смесь изображений, PDF и текстов
+из синтетического корпуса (ml_api/benchmarks/corpus.py):
+
+- ml_service: POST /process/ - задержка одного ответа;
+- django: POST /api/files/ -> POST /ml/files/<id>/process/ -> ожидание
+  статуса completed/failed через /ml/api/status/ (один общий опрос на
+  все файлы в обработке) - задержка каждого шага и полного пути.
+
+Раз в sample_interval снимаются завершенные операции, ошибки, число
+файлов в обработке и длины очередей Celery в брокере. Отчет
+(перцентили, пропускная способность, доля ошибок, временной ряд)
+сохраняется в JSON для сравнения прогонов до и после изменений.
+"""
+import asyncio
+import json
+import logging
+import math
+import platform
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+from .benchmarks import corpus
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+DEFAULT_MIX = 'image:4,pdf:3,text:3'
+STATUS_BATCH_SIZE = 100  # не больше MAX_BATCH_STATUS_IDS
+FINAL_STATUSES = ('completed', 'failed')
+
+
+def percentile(sorted_values, p):
+    """Перцентиль по ближайшему рангу (значения уже отсортированы)"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def parse_mix(value):
+    """'image:4,pdf:3,text:3' -> {'image': 4, 'pdf': 3, 'text': 3}"""
+    mix = {}
+    for part in value.split(','):
+        kind, _, weight = part.partition(':')
+        if kind.strip() not in PAYLOAD_BUILDERS:
+            raise ValueError(f'Unknown payload kind: {kind}')
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def _image_payload(workdir):
+    path = corpus.write_image(workdir / 'scan.png', dpi=150)
+    return 'scan.png', path.read_bytes()
+
+
+def _pdf_payload(workdir):
+    path = corpus.write_pdf(workdir / 'scan.pdf', pages=2, dpi=150)
+    return 'scan.pdf', path.read_bytes()
+
+
+def _text_payload(workdir):
+    return 'document.txt', corpus.make_text('ru', 20000).encode('utf-8')
+
+
+PAYLOAD_BUILDERS = {'image': _image_payload, 'pdf': _pdf_payload, 'text': _text_payload}
+
+
+def build_payloads(mix):
+    """Файлы смеси в памяти: {вид: (имя файла, содержимое)}"""
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as workdir:
+        return {kind: PAYLOAD_BUILDERS[kind](Path(workdir)) for kind in mix}
+
+
+class Recorder:
+    """Замеры операций и временной ряд прогона"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.samples = defaultdict(list)  # операция -> [(задержка, успех)]
+        self.errors = Counter()
+        self.timeseries = []
+        self.in_flight = 0
+        self._window = defaultdict(lambda: {'done': 0, 'errors': 0})  # с прошлой точки ряда
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def record(self, operation, latency, ok=True, error=None):
+        self.samples[operation].append((latency, ok))
+        self._window[operation]['done'] += 1
+        if not ok:
+            self._window[operation]['errors'] += 1
+            self.errors[f'{operation}: {error}'[:200]] += 1
+
+    def sample(self, queues):
+        """Точка временного ряда: операции с прошлой точки, файлы в работе, очереди"""
+        point = {'t': round(self.elapsed(), 2), 'in_flight': self.in_flight, 'queues': queues}
+        point.update(self._window)
+        self._window = defaultdict(lambda: {'done': 0, 'errors': 0})
+        self.timeseries.append(point)
+
+    def summary(self, duration):
+        summary = {}
+        for operation, samples in self.samples.items():
+            latencies = sorted(latency for latency, ok in samples if ok)
+            errors = sum(1 for _, ok in samples if not ok)
+            summary[operation] = {
+                'count': len(samples),
+                'errors': errors,
+                'error_rate': errors / len(samples) if samples else 0,
+                'throughput': len(latencies) / duration if duration else None,
+                'mean_s': sum(latencies) / len(latencies) if latencies else None,
+                'max_s': latencies[-1] if latencies else None,
+                **{f'p{p}_s': percentile(latencies, p) for p in PERCENTILES},
+            }
+        return summary
+
+
+class QueueSampler:
+    """Длины очередей Celery в брокере Redis (LLEN списка очереди)"""
+
+    def __init__(self, broker_url, queues):
+        self.queues = queues
+        self._redis = None
+        if broker_url and broker_url.startswith(('redis://', 'rediss://')):
+            import redis.asyncio as aioredis
+            self._redis = aioredis.Redis.from_url(broker_url, socket_connect_timeout=2, socket_timeout=2)
+
+    async def sample(self):
+        if self._redis is None:
+            return {}
+        try:
+            pipe = self._redis.pipeline()
+            for queue in self.queues:
+                pipe.llen(queue)
+            return dict(zip(self.queues, await pipe.execute()))
+        except Exception as e:
+            logger.warning(f"Queue depth sampling failed: {e}")
+            return {}
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+class MLServiceScenario:
+    name = 'ml_service'
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    async def start(self, client, recorder):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def run_once(self, client, kind, payload, recorder):
+        filename, content = payload
+        started = time.monotonic()
+        try:
+            response = await client.post(f'{self.base_url}/process/', files={'file': (filename, content)})
+            ok = response.status_code == 200
+            error = None if ok else f'HTTP {response.status_code}'
+        except httpx.HTTPError as e:
+            ok, error = False, type(e).__name__
+        recorder.record(f'process[{kind}]', time.monotonic() - started, ok, error)
+
+
+class DjangoScenario:
+    """Загрузка через API файлов, постановка в обработку и ожидание результата"""
+    name = 'django'
+
+    def __init__(self, base_url, token, completion_timeout=300, poll_interval=0.5):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Authorization': f'Token {token}'}
+        self.completion_timeout = completion_timeout
+        self.poll_interval = poll_interval
+        self._waiting = {}  # file_id -> Future со статусом
+        self._poller = None
+
+    async def start(self, client, recorder):
+        self._poller = asyncio.create_task(self._poll(client, recorder))
+
+    async def stop(self):
+        if self._poller:
+            self._poller.cancel()
+
+    async def _poll(self, client, recorder):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            file_ids = list(self._waiting)
+            for start in range(0, len(file_ids), STATUS_BATCH_SIZE):
+                batch = file_ids[start:start + STATUS_BATCH_SIZE]
+                began = time.monotonic()
+                try:
+                    response = await client.get(
+                        f'{self.base_url}/ml/api/status/', headers=self.headers,
+                        params={'file_ids': ','.join(map(str, batch))},
+                    )
+                    response.raise_for_status()
+                except httpx.HTTPError as e:
+                    recorder.record('status_poll', time.monotonic() - began, False, type(e).__name__)
+                    continue
+                recorder.record('status_poll', time.monotonic() - began)
+                for file_id, state in response.json().get('files', {}).items():
+                    future = self._waiting.get(int(file_id))
+                    if future and not future.done() and state['status'] in FINAL_STATUSES:
+                        future.set_result(state['status'])
+
+    async def _step(self, recorder, operation, request):
+        started = time.monotonic()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            recorder.record(operation, time.monotonic() - started, False, type(e).__name__)
+            return None
+        ok = response.status_code < 400
+        recorder.record(operation, time.monotonic() - started, ok, None if ok else f'HTTP {response.status_code}')
+        return response if ok else None
+
+    async def run_once(self, client, kind, payload, recorder):
+        filename, content = payload
+        started = time.monotonic()
+        response = await self._step(recorder, 'upload', client.post(
+            f'{self.base_url}/api/files/', headers=self.headers,
+            files={'file': (filename, content)}, data={'description': 'loadtest'},
+        ))
+        if response is None:
+            return
+        file_id = response.json()['id']
+
+        if await self._step(recorder, 'enqueue', client.post(
+            f'{self.base_url}/ml/files/{file_id}/process/', headers=self.headers,
+        )) is None:
+            return
+
+        future = self._waiting[file_id] = asyncio.get_running_loop().create_future()
+        try:
+            final = await asyncio.wait_for(future, self.completion_timeout)
+            recorder.record(f'end_to_end[{kind}]', time.monotonic() - started,
+                            final == 'completed', None if final == 'completed' else 'processing failed')
+        except asyncio.TimeoutError:
+            recorder.record(f'end_to_end[{kind}]', time.monotonic() - started, False, 'timeout')
+        finally:
+            self._waiting.pop(file_id, None)
+
+
+async def run_load(scenario, payloads, mix, concurrency, duration, ramp_up=0, sample_interval=1.0,
+                   queue_sampler=None, seed=corpus.SEED, request_timeout=120):
+    """Прогон на duration секунд; возвращает отчет (dict)"""
+    recorder = Recorder()
+    kinds, weights = list(mix), list(mix.values())
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency + 4, max_keepalive_connections=concurrency + 4)
+
+    async def client_loop(client, number):
+        rng = random.Random(f'{seed}:{number}')
+        if ramp_up:
+            await asyncio.sleep(ramp_up * number / concurrency)
+        while time.monotonic() < deadline:
+            kind = rng.choices(kinds, weights)[0]
+            recorder.in_flight += 1
+            try:
+                await scenario.run_once(client, kind, payloads[kind], recorder)
+            finally:
+                recorder.in_flight -= 1
+
+    async def sampler():
+        while True:
+            await asyncio.sleep(sample_interval)
+            queues = await queue_sampler.sample() if queue_sampler else {}
+            recorder.sample(queues)
+
+    async with httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(request_timeout, connect=5)) as client:
+        await scenario.start(client, recorder)
+        sampling = asyncio.create_task(sampler())
+        try:
+            await asyncio.gather(*(client_loop(client, number) for number in range(concurrency)))
+        finally:
+            sampling.cancel()
+            await scenario.stop()
+            if queue_sampler:
+                await queue_sampler.close()
+
+    elapsed = recorder.elapsed()
+    return {
+        'config': {
+            'target': scenario.name, 'concurrency': concurrency, 'duration_s': duration,
+            'ramp_up_s': ramp_up, 'mix': mix, 'seed': seed,
+        },
+        'environment': {'python': platform.python_version(), 'platform': platform.platform()},
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'elapsed_s': round(elapsed, 2),
+        'summary': recorder.summary(elapsed),
+        'errors': dict(recorder.errors.most_common(20)),
+        'timeseries': recorder.timeseries,
+    }
+
+
+def save_report(report, output_dir):
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    config = report['config']
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = output_dir / f"{stamp}-{config['target']}-c{config['concurrency']}.json"
+    path.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+    return path
+
+
+def compare_reports(previous, current):
+    """Строки сравнения p95, пропускной способности и доли ошибок по операциям"""
+    lines = []
+    for operation, now in current['summary'].items():
+        before = previous['summary'].get(operation)
+        if not before:
+            continue
+        parts = []
+        for metric in ('p95_s', 'throughput', 'error_rate'):
+            old, new = before.get(metric), now.get(metric)
+            if old is None or new is None:
+                continue
+            change = f' ({new / old - 1:+.0%})' if old else ''
+            parts.append(f'{metric} {old:.3g} -> {new:.3g}{change}')
+        lines.append(f"{operation}: {'; '.join(parts)}")
+    return lines
@@ -0,0 +1,156 @@
+# ml_api/mailer.py
+"""
+Отправка уведомлений по email через долгоживущее SMTP-соединение.
+
+Задачи кладут письма в список Redis, а flush_email_outbox (очередь io)
+отправляет их пачками через одно открытое соединение get_connection():
+одно TLS-рукопожатие и один вход на пачку вместо одного на письмо.
+"""
+import json
+import logging
+import smtplib
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from filemanager.redis_client import get_redis
+from .ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = 'email:outbox'
+FLUSH_FLAG_KEY = 'email:flush_scheduled'
+
+# Лимиты отправки по SMTP-провайдеру (EMAIL_HOST), писем в секунду
+provider_buckets = {}
+
+
+def provider_bucket(host):
+    if host not in provider_buckets:
+        rate = settings.EMAIL_PROVIDER_RATE_LIMITS.get(host, settings.EMAIL_DEFAULT_RATE_LIMIT)
+        provider_buckets[host] = TokenBucket(rate)
+    return provider_buckets[host]
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """
+    Ставит письмо в очередь и планирует отправку пачкой.
+
+    Отправка запускается не чаще одного раза за EMAIL_FLUSH_DELAY секунд:
+    все письма, поставленные за это время, уходят в одной задаче.
+    """
+    payload = {
+        'subject': subject,
+        'body': message,
+        'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+        'to': list(recipient_list),
+    }
+    redis = get_redis()
+    redis.lpush(OUTBOX_KEY, json.dumps(payload))
+    if redis.set(FLUSH_FLAG_KEY, 1, nx=True, ex=settings.EMAIL_FLUSH_DELAY * 10):
+        from .tasks import flush_email_outbox
+        flush_email_outbox.apply_async(countdown=settings.EMAIL_FLUSH_DELAY)
+
+
+class PooledMailer:
+    """SMTP-соединение процесса: открывается один раз и переоткрывается при сбое"""
+
+    # Только обрыв соединения: SMTPException - тоже OSError, но отказ сервера
+    # повторной отправкой через новое соединение не исправить
+    RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, socket.timeout)
+
+    def __init__(self, max_idle=None):
+        self.max_idle = settings.EMAIL_CONNECTION_MAX_IDLE if max_idle is None else max_idle
+        self.connection = None
+        self.last_used = 0
+        self.lock = threading.Lock()
+
+    def _connection(self):
+        # Провайдеры закрывают простаивающие сессии - не ждем ошибки на первом письме
+        if self.connection is not None and time.monotonic() - self.last_used > self.max_idle:
+            self.close()
+        if self.connection is None:
+            self.connection = get_connection(fail_silently=False)
+            self.connection.open()
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def _send_one(self, message):
+        try:
+            self._connection().send_messages([message])
+        except self.RECONNECT_ERRORS as e:
+            logger.warning(f"SMTP connection lost ({e}), reconnecting")
+            self.close()
+            self._connection().send_messages([message])
+
+    def send(self, messages):
+        """
+        Отправляет письма через общее соединение с учетом лимита провайдера.
+
+        При обрыве соединение открывается заново и письмо повторяется один
+        раз. Письма с отклоненными адресатами или постоянным отказом сервера
+        (ответ 5xx) пропускаются - иначе одно письмо навсегда задержало бы
+        очередь; временные отказы (4xx) пробрасываются. Возвращает число
+        обработанных писем; у проброшенного исключения атрибут processed
+        говорит, сколько писем из начала списка уже обработано.
+        """
+        bucket = provider_bucket(settings.EMAIL_HOST)
+        processed = 0
+        with self.lock:
+            try:
+                for message in messages:
+                    bucket.wait()
+                    try:
+                        self._send_one(message)
+                    except smtplib.SMTPRecipientsRefused as e:
+                        logger.error(f"Recipients refused, dropping email: {e.recipients}")
+                    except smtplib.SMTPResponseException as e:
+                        if e.smtp_code < 500:
+                            raise
+                        logger.error(f"Email rejected with {e.smtp_code}, dropping: {e.smtp_error!r} to {message.to}")
+                    self.last_used = time.monotonic()
+                    processed += 1
+            except Exception as e:
+                e.processed = processed
+                raise
+        return processed
+
+
+mailer = PooledMailer()
+
+
+def build_message(payload):
+    return EmailMessage(
+        subject=payload['subject'],
+        body=payload['body'],
+        from_email=payload['from_email'],
+        to=payload['to'],
+    )
+
+
+def drain_outbox(batch_size=None):
+    """Отправляет письма из очереди пачками, пока она не опустеет"""
+    redis = get_redis()
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    total = 0
+    while True:
+        raw = redis.rpop(OUTBOX_KEY, batch_size)
+        if not raw:
+            return total
+        try:
+            total += mailer.send([build_message(json.loads(item)) for item in raw])
+        except Exception as e:
+            # Неотправленные письма возвращаются в хвост - они уйдут первыми
+            unsent = raw[getattr(e, 'processed', 0):]
+            redis.rpush(OUTBOX_KEY, *reversed(unsent))
+            raise
@@ -0,0 +1,59 @@
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_api.benchmarks.suite import CASES, compare, load_baseline, run_suite, write_results
+
+
+class Command(BaseCommand):
+    help = 'Бенчмарки OCR/NER и разбора текста; сравнение с сохраненной базой'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-k', '--filter', default='', help='Только случаи, имя которых содержит строку')
+        parser.add_argument('--repeat', type=int, default=5, help='Замеров на случай (после прогрева)')
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--baseline', default=str(Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'))
+        parser.add_argument('--save-baseline', action='store_true', help='Записать результаты как новую базу')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Допустимый рост медианы времени и пика RSS (доля)')
+        parser.add_argument('--output', help='Файл JSON для результатов прогона')
+
+    def handle(self, *args, **options):
+        cases = [case for case in CASES if options['filter'] in case.name]
+        if not cases:
+            raise CommandError(f"No benchmarks match {options['filter']!r}")
+
+        with tempfile.TemporaryDirectory(prefix='bench-') as workdir:
+            results = run_suite(cases, workdir, repeat=options['repeat'], warmup=options['warmup'])
+        self._print(results)
+
+        if options['output']:
+            write_results(options['output'], results)
+        if options['save_baseline']:
+            measured = {name: result for name, result in results.items() if 'median_s' in result}
+            write_results(options['baseline'], measured)
+            self.stdout.write(f"Baseline saved to {options['baseline']} ({len(measured)} cases)")
+            return
+
+        baseline = load_baseline(options['baseline'])
+        if baseline is None:
+            self.stdout.write(f"No baseline at {options['baseline']}; run with --save-baseline")
+            return
+        regressions = compare(results, baseline, options['tolerance'])
+        if regressions:
+            raise CommandError('Performance regressions:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
+
+    def _print(self, results):
+        self.stdout.write(f"{'case':32} {'median':>10} {'min':>10} {'throughput':>18} {'peak RSS':>10}")
+        for name, result in results.items():
+            if 'median_s' not in result:
+                self.stdout.write(f"{name:32} {result.get('skipped') or result.get('error')}")
+                continue
+            throughput = f"{result['throughput']:.1f} {result['unit']}/s"
+            self.stdout.write(
+                f"{name:32} {result['median_s'] * 1000:>8.1f}ms {result['min_s'] * 1000:>8.1f}ms "
+                f"{throughput:>18} {result['peak_rss_bytes'] / 2 ** 20:>8.0f}MB"
+            )
@@ -0,0 +1,91 @@
+import asyncio
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from ml_api.loadtest import (
+    DEFAULT_MIX, DjangoScenario, MLServiceScenario, QueueSampler, build_payloads,
+    compare_reports, parse_mix, run_load, save_report,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон ml_service (/process/) или загрузки и обработки в Django; '
+        'Postgres и Redis для локального стенда - docker-compose.loadtest.yml'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['ml_service', 'django'], default='django')
+        parser.add_argument('--base-url', help='По умолчанию ML_SERVICE_URL или SITE_URL')
+        parser.add_argument('-c', '--concurrency', type=int, default=50, help='Одновременных клиентов')
+        parser.add_argument('-d', '--duration', type=float, default=60, help='Длительность, секунд')
+        parser.add_argument('--ramp-up', type=float, default=0, help='Клиенты стартуют равномерно за N секунд')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help='Доли видов файлов: image:4,pdf:3,text:3')
+        parser.add_argument('--sample-interval', type=float, default=1.0, help='Шаг временного ряда, секунд')
+        parser.add_argument('--completion-timeout', type=float, default=300,
+                            help='Сколько ждать окончания обработки файла (django)')
+        parser.add_argument('--username', default='loadtest', help='Пользователь для загрузок (django)')
+        parser.add_argument('--output-dir', default=str(Path(settings.BASE_DIR) / 'loadtest-results'))
+        parser.add_argument('--compare', help='Отчет прошлого прогона для сравнения')
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['target'] == 'ml_service':
+            scenario = MLServiceScenario(options['base_url'] or settings.ML_SERVICE_URL)
+        else:
+            scenario = DjangoScenario(
+                options['base_url'] or settings.SITE_URL, self._token(options['username']),
+                completion_timeout=options['completion_timeout'],
+            )
+        queues = sorted({route['queue'] for route in settings.CELERY_TASK_ROUTES.values()}
+                        | {settings.CELERY_TASK_DEFAULT_QUEUE})
+
+        self.stdout.write(f"{scenario.name}: {options['concurrency']} clients for {options['duration']}s")
+        report = asyncio.run(run_load(
+            scenario, build_payloads(mix), mix, options['concurrency'], options['duration'],
+            ramp_up=options['ramp_up'], sample_interval=options['sample_interval'],
+            queue_sampler=QueueSampler(settings.CELERY_BROKER_URL, queues),
+        ))
+
+        self._print(report)
+        path = save_report(report, options['output_dir'])
+        self.stdout.write(f"Report saved to {path}")
+        if options['compare']:
+            previous = json.loads(Path(options['compare']).read_text(encoding='utf-8'))
+            self.stdout.write('Compared with ' + options['compare'])
+            for line in compare_reports(previous, report):
+                self.stdout.write('  ' + line)
+
+    def _token(self, username):
+        user, created = User.objects.get_or_create(username=username)
+        if created:
+            user.set_unusable_password()
+            user.save(update_fields=['password'])
+        return Token.objects.get_or_create(user=user)[0].key
+
+    def _print(self, report):
+        self.stdout.write(
+            f"{'operation':24} {'count':>7} {'err%':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}"
+        )
+        for operation, stats in sorted(report['summary'].items()):
+            latencies = ' '.join(
+                f"{stats[key] * 1000:>7.0f}ms" if stats[key] is not None else f"{'-':>9}"
+                for key in ('p50_s', 'p95_s', 'p99_s')
+            )
+            self.stdout.write(
+                f"{operation:24} {stats['count']:>7} {stats['error_rate'] * 100:>5.1f}% "
+                f"{stats['throughput']:>8.2f} {latencies}"
+            )
+        peak = max((sum(point['queues'].values()) for point in report['timeseries']), default=0)
+        self.stdout.write(f"Peak queue depth: {peak}")
+        for error, count in report['errors'].items():
+            self.stdout.write(self.style.WARNING(f"  {count} x {error}"))
@@ -0,0 +1,21 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from ml_api.telegram import process_update
+from ml_api.telegram_updates import UpdateConsumerPool
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает входящие обновления Telegram из потока Redis'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--consumers', type=int, default=None, help='Число потоков-обработчиков')
+
+    def handle(self, *args, **options):
+        pool = UpdateConsumerPool(process_update, size=options['consumers'])
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: pool.stop())
+        self.stdout.write(f'Telegram consumers started ({pool.size})')
+        pool.run()
+        self.stdout.write('Telegram consumers stopped')
@@ -0,0 +1,22 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from ml_api.telegram_dispatch import TelegramDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Отправляет сообщения из очереди Telegram с соблюдением лимитов Bot API'
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run())
+
+    async def _run(self):
+        dispatcher = TelegramDispatcher()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, dispatcher.stop)
+        self.stdout.write('Telegram dispatcher started')
+        await dispatcher.run()
+        self.stdout.write('Telegram dispatcher stopped')
@@ -0,0 +1,57 @@
+# ml_api/metrics.py
+"""
+Метрики Prometheus для ML-конвейера.
+
+Экспортируются через django_prometheus (/metrics) в веб-процессах и
+HTTP-сервером на WORKER_METRICS_PORT в воркерах Celery.
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+ML_CACHE_REQUESTS = Counter(
+    'ml_cache_requests_total',
+    'Обращения к кешу ML-вызовов',
+    ['namespace', 'result'],  # hit, stale, miss, wait_hit, wait_timeout
+)
+
+ML_CACHE_LATENCY = Histogram(
+    'ml_cache_latency_seconds',
+    'Время ответа через кеш ML-вызовов',
+    ['namespace', 'result'],
+)
+
+ML_CACHE_COMPUTE = Histogram(
+    'ml_cache_compute_seconds',
+    'Время вычисления значения при промахе кеша',
+    ['namespace'],
+)
+
+ML_MODEL_LOAD_SECONDS = Gauge(
+    'ml_model_load_seconds',
+    'Время загрузки модели в процессе',
+    ['model'],
+)
+
+# Этапы обработки файла (ml_api/timing.py): decode, threshold, denoise,
+# pdf_render, tesseract, docx_parse, spacy, extract_values, ml_service, db_write
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    'pipeline_stage_seconds',
+    'Длительность этапа обработки файла',
+    ['stage', 'file_type', 'queue', 'outcome'],  # file_type: pdf, image, docx, text, other
+    buckets=STAGE_BUCKETS,
+)
+
+PIPELINE_TASK_SECONDS = Histogram(
+    'pipeline_task_seconds',
+    'Длительность задачи обработки целиком',
+    ['file_type', 'queue', 'outcome'],  # outcome: success, failed, stale, skipped, processing, retry, error
+    buckets=STAGE_BUCKETS,
+)
+
+QUEUE_WAIT_SECONDS = Histogram(
+    'celery_queue_wait_seconds',
+    'Время от постановки задачи в очередь до начала выполнения',
+    ['task', 'queue'],
+    buckets=STAGE_BUCKETS,
+)
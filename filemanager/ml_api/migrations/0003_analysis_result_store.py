@@ -0,0 +1,198 @@
+# Generated by Django 5.2.3 on 2026-10-19 12:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models.functions import Left
+
+
+def copy_result_type(apps, schema_editor):
+    """Переносит тип сервиса уже сохраненных ML-результатов в result_type"""
+    MLResult = apps.get_model('ml_api', 'MLResult')
+    MLResult.objects.update(result_type=models.F('service'))
+
+
+def restore_service(apps, schema_editor):
+    MLResult = apps.get_model('ml_api', 'MLResult')
+    MLResult.objects.update(service=Left('result_type', 3))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_storedfile_metadata_and_list_index'),
+        ('ml_api', '0002_alter_mlrequest_options_mlrequest_error_message_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnalysisEntity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(max_length=20, verbose_name='Тип сущности')),
+                ('text', models.CharField(max_length=255, verbose_name='Текст')),
+                ('start', models.PositiveIntegerField(verbose_name='Начало')),
+                ('end', models.PositiveIntegerField(verbose_name='Конец')),
+            ],
+            options={
+                'verbose_name': 'Сущность',
+                'verbose_name_plural': 'Сущности',
+            },
+        ),
+        migrations.CreateModel(
+            name='AnalysisResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('result_type', models.CharField(choices=[('ocr', 'Распознавание текста (OCR)'), ('ner', 'Извлечение сущностей (NER)')], max_length=10, verbose_name='Тип результата')),
+                ('pipeline_version', models.CharField(max_length=20, verbose_name='Версия конвейера')),
+                ('language', models.CharField(blank=True, max_length=10, verbose_name='Язык')),
+                ('sentiment', models.CharField(blank=True, max_length=10, verbose_name='Тональность')),
+                ('keywords', models.JSONField(blank=True, default=list, verbose_name='Ключевые слова')),
+                ('metadata', models.JSONField(blank=True, default=dict, verbose_name='Метаданные')),
+                ('text_length', models.PositiveIntegerField(default=0, verbose_name='Длина текста')),
+                ('entity_count', models.PositiveIntegerField(default=0, verbose_name='Количество сущностей')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начало обработки')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Окончание обработки')),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Длительность, мс')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Результат анализа',
+                'verbose_name_plural': 'Результаты анализа',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='mlresult',
+            name='ml_api_mlre_file_id_787c9d_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='mlresult',
+            name='ml_api_mlre_created_0775ef_idx',
+        ),
+        # Сохраненные результаты переносятся, а не пересоздаются с пустыми значениями
+        migrations.RenameField(
+            model_name='mlresult',
+            old_name='result',
+            new_name='data',
+        ),
+        migrations.AlterField(
+            model_name='mlresult',
+            name='data',
+            field=models.JSONField(),
+        ),
+        migrations.AddField(
+            model_name='mlresult',
+            name='result_type',
+            field=models.CharField(default='', max_length=50),
+            preserve_default=False,
+        ),
+        migrations.RunPython(copy_result_type, restore_service),
+        # Значение по умолчанию нужно только для отката на заполненной таблице
+        migrations.AlterField(
+            model_name='mlresult',
+            name='service',
+            field=models.CharField(choices=[('ocr', 'Распознавание текста (OCR)'), ('ner', 'Извлечение сущностей (NER)')], default='', max_length=3, verbose_name='Сервис'),
+        ),
+        migrations.RemoveField(
+            model_name='mlresult',
+            name='service',
+        ),
+        migrations.AddField(
+            model_name='mlrequest',
+            name='file',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.storedfile'),
+        ),
+        migrations.AddField(
+            model_name='mlrequest',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='mlrequest',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='mlrequest',
+            name='error_message',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='mlrequest',
+            name='input_data',
+            field=models.JSONField(),
+        ),
+        migrations.AlterField(
+            model_name='mlrequest',
+            name='request_type',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='mlrequest',
+            name='result',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='mlrequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'В обработке'), ('success', 'Успешно'), ('failed', 'Ошибка')], default='pending', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='mlrequest',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='mlresult',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='mlresult',
+            name='file',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.storedfile'),
+        ),
+        migrations.AlterField(
+            model_name='mlresult',
+            name='request',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ml_result', to='ml_api.mlrequest'),
+        ),
+        migrations.AddField(
+            model_name='analysisentity',
+            name='file',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entities', to='core.storedfile', verbose_name='Файл'),
+        ),
+        migrations.CreateModel(
+            name='AnalysisText',
+            fields=[
+                ('result', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='text_payload', serialize=False, to='ml_api.analysisresult', verbose_name='Результат')),
+                ('compression', models.CharField(default='zlib', max_length=10, verbose_name='Сжатие')),
+                ('size', models.PositiveIntegerField(default=0, verbose_name='Размер без сжатия, байт')),
+                ('data', models.BinaryField(verbose_name='Данные')),
+            ],
+            options={
+                'verbose_name': 'Текст результата',
+                'verbose_name_plural': 'Тексты результатов',
+            },
+        ),
+        migrations.AddField(
+            model_name='analysisresult',
+            name='file',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='analysis_results', to='core.storedfile', verbose_name='Файл'),
+        ),
+        migrations.AddField(
+            model_name='analysisentity',
+            name='result',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entities', to='ml_api.analysisresult', verbose_name='Результат'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisresult',
+            index=models.Index(fields=['file', '-created_at'], name='ml_api_result_file_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisentity',
+            index=models.Index(fields=['file', 'entity_type'], name='ml_api_entity_file_type_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_entity_terms(apps, schema_editor):
+    """Строит индекс по уже сохраненным сущностям (лемм нет, используется текст)"""
+    from ml_api.entities import normalize_entity
+
+    AnalysisEntity = apps.get_model('ml_api', 'AnalysisEntity')
+    EntityTerm = apps.get_model('ml_api', 'EntityTerm')
+
+    terms = {}
+    files = {}
+    mentions = AnalysisEntity.objects.select_related('file').order_by('id')
+    for entity in mentions.iterator(chunk_size=2000):
+        norm = normalize_entity(entity.text)
+        if not norm:
+            continue
+        key = (entity.file.user_id, entity.entity_type, norm)
+        if key not in terms:
+            terms[key], _ = EntityTerm.objects.get_or_create(
+                user_id=key[0], entity_type=key[1], norm=norm, defaults={'text': entity.text}
+            )
+        term = terms[key]
+        term.mention_count += 1
+        files.setdefault(term.id, set()).add(entity.file_id)
+        entity.term_id = term.id
+        entity.save(update_fields=['term'])
+
+    for term in terms.values():
+        term.file_count = len(files.get(term.id, ()))
+        term.save(update_fields=['file_count', 'mention_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_searchdocument'),
+        ('ml_api', '0003_analysis_result_store'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntityTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_type', models.CharField(max_length=20, verbose_name='Тип сущности')),
+                ('norm', models.CharField(max_length=255, verbose_name='Нормализованный текст')),
+                ('text', models.CharField(max_length=255, verbose_name='Текст')),
+                ('file_count', models.IntegerField(default=0, verbose_name='Файлов')),
+                ('mention_count', models.IntegerField(default=0, verbose_name='Упоминаний')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Термин сущности',
+                'verbose_name_plural': 'Термины сущностей',
+            },
+        ),
+        migrations.AddField(
+            model_name='analysisentity',
+            name='term',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mentions', to='ml_api.entityterm', verbose_name='Термин'),
+        ),
+        migrations.AddIndex(
+            model_name='analysisentity',
+            index=models.Index(fields=['term', 'file'], name='ml_api_entity_term_file_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entityterm',
+            index=models.Index(fields=['user', 'norm'], name='ml_api_entityterm_prefix_idx', opclasses=['int4_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddConstraint(
+            model_name='entityterm',
+            constraint=models.UniqueConstraint(fields=('user', 'entity_type', 'norm'), name='ml_api_entityterm_unique'),
+        ),
+        migrations.RunPython(backfill_entity_terms, migrations.RunPython.noop),
+    ]
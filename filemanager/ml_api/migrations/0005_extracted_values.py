@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-19 14:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_searchdocument'),
+        ('ml_api', '0004_entity_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedAmount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=18, verbose_name='Сумма')),
+                ('currency', models.CharField(max_length=3, verbose_name='Валюта')),
+                ('raw', models.CharField(max_length=100, verbose_name='Исходный текст')),
+                ('start', models.PositiveIntegerField(verbose_name='Начало')),
+                ('end', models.PositiveIntegerField(verbose_name='Конец')),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='extracted_amounts', to='core.storedfile', verbose_name='Файл')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='amounts', to='ml_api.analysisresult', verbose_name='Результат')),
+            ],
+            options={
+                'verbose_name': 'Сумма из текста',
+                'verbose_name_plural': 'Суммы из текста',
+                'indexes': [models.Index(fields=['currency', 'amount', 'file'], name='ml_api_amount_cur_file_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExtractedDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.DateField(verbose_name='Дата')),
+                ('raw', models.CharField(max_length=100, verbose_name='Исходный текст')),
+                ('start', models.PositiveIntegerField(verbose_name='Начало')),
+                ('end', models.PositiveIntegerField(verbose_name='Конец')),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='extracted_dates', to='core.storedfile', verbose_name='Файл')),
+                ('result', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dates', to='ml_api.analysisresult', verbose_name='Результат')),
+            ],
+            options={
+                'verbose_name': 'Дата из текста',
+                'verbose_name_plural': 'Даты из текста',
+                'indexes': [models.Index(fields=['value', 'file'], name='ml_api_date_value_file_idx')],
+            },
+        ),
+    ]
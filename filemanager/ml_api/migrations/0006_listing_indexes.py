@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_api', '0005_extracted_values'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mlrequest',
+            index=models.Index(fields=['user', '-created_at'], name='ml_api_request_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mlrequest',
+            index=models.Index(fields=['user', 'request_type', 'status', '-created_at'], name='ml_api_request_filter_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mlresult',
+            index=models.Index(fields=['file', '-created_at'], name='ml_api_mlresult_file_idx'),
+        ),
+    ]
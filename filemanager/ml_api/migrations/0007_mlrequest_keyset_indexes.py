@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-19 19:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_api', '0006_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mlrequest',
+            name='ml_api_request_user_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='mlrequest',
+            name='ml_api_request_filter_idx',
+        ),
+        migrations.AddIndex(
+            model_name='mlrequest',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='ml_api_request_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mlrequest',
+            index=models.Index(fields=['user', 'request_type', 'status', '-created_at', '-id'], name='ml_api_request_filter_idx'),
+        ),
+    ]
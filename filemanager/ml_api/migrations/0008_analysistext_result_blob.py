@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-19 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ml_api', '0007_mlrequest_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='analysistext',
+            name='blob_frames',
+            field=models.JSONField(blank=True, default=list, verbose_name='Смещения кадров блоба'),
+        ),
+        migrations.AddField(
+            model_name='analysistext',
+            name='blob_path',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Путь к блобу'),
+        ),
+        migrations.AddField(
+            model_name='analysistext',
+            name='chunk_size',
+            field=models.PositiveIntegerField(default=0, verbose_name='Размер блока, байт'),
+        ),
+        migrations.AlterField(
+            model_name='analysistext',
+            name='data',
+            field=models.BinaryField(blank=True, default=b'', verbose_name='Данные'),
+        ),
+    ]
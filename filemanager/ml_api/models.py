@@ -1,6 +1,12 @@
-from django.db import models
+import zlib
+from django.conf import settings
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from core.models import StoredFile
+from .blobs import TextBlob
+
+# Сколько байт текста показывается на странице файла
+TEXT_PREVIEW_BYTES = 16 * 1024
 
 
 class MLRequest(models.Model):
@@ -11,7 +17,7 @@ class MLRequest(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    file = models.ForeignKey(StoredFile, on_delete=models.CASCADE)
+    file = models.ForeignKey(StoredFile, on_delete=models.CASCADE, null=True, blank=True)
     request_type = models.CharField(max_length=50)
     status = models.CharField(max_length=10, choices=REQUEST_STATUS_CHOICES, default='pending')
     input_data = models.JSONField()
@@ -24,6 +30,14 @@ class MLRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'ML запрос'
         verbose_name_plural = 'ML запросы'
+        indexes = [
+            # Список запросов пользователя без фильтров и с фильтрами ?type=&status=;
+            # сортировка по -created_at читается из индекса без отдельного шага
+            # id завершает ключ keyset-пагинации (created_at, id)
+            models.Index(fields=['user', '-created_at', '-id'], name='ml_api_request_user_idx'),
+            models.Index(fields=['user', 'request_type', 'status', '-created_at', '-id'],
+                         name='ml_api_request_filter_idx'),
+        ]
 
     def __str__(self):
         return f"MLRequest #{self.id} ({self.get_status_display()})"
@@ -40,6 +54,368 @@ class MLResult(models.Model):
         ordering = ['-created_at']
         verbose_name = 'ML результат'
         verbose_name_plural = 'ML результаты'
+        indexes = [
+            models.Index(fields=['file', '-created_at'], name='ml_api_mlresult_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"Result for {self.file.filename()}"
+
+
+class AnalysisResultManager(models.Manager):
+    def store(self, file, result, pipeline_version, started_at=None, finished_at=None):
+        """
+        Сохраняет результат обработки: заголовок, сжатый текст и сущности.
+
+        Все записи создаются в одной транзакции, сущности - одним bulk_create.
+        """
+        data = result.get('data', {})
+        text = data.get('text') or ''
+        entities = data.get('entities') or []
+
+        duration_ms = None
+        if started_at and finished_at:
+            duration_ms = int((finished_at - started_at).total_seconds() * 1000)
+
+        # Крупный текст пишется в хранилище до транзакции, чтобы не держать ее открытой
+        payload = AnalysisText.compress(text)
+        try:
+            with transaction.atomic():
+                header = self.create(
+                    file=file,
+                    result_type=result['type'],
+                    pipeline_version=pipeline_version,
+                    language=data.get('language') or '',
+                    sentiment=data.get('sentiment') or '',
+                    keywords=data.get('keywords') or [],
+                    metadata=result.get('metadata') or {},
+                    text_length=len(text),
+                    entity_count=len(entities),
+                    started_at=started_at,
+                    finished_at=finished_at,
+                    duration_ms=duration_ms,
+                )
+                AnalysisText.objects.create(result=header, **payload)
+                EntityTerm.objects.reindex_file(file, header, entities)
+                self._store_values(file, header, data)
+        except Exception:
+            if payload.get('blob_path'):
+                TextBlob.delete_path(payload['blob_path'])
+            raise
+        return header
+
+    def _store_values(self, file, header, data):
+        """Заменяет нормализованные даты и суммы файла значениями из нового результата"""
+        ExtractedDate.objects.filter(file=file).delete()
+        ExtractedAmount.objects.filter(file=file).delete()
+        ExtractedDate.objects.bulk_create([
+            ExtractedDate(result=header, file=file, value=item['value'], raw=item['raw'][:100],
+                          start=item['start'], end=item['end'])
+            for item in data.get('dates') or []
+        ], batch_size=500)
+        ExtractedAmount.objects.bulk_create([
+            ExtractedAmount(result=header, file=file, amount=item['amount'], currency=item['currency'],
+                            raw=item['raw'][:100], start=item['start'], end=item['end'])
+            for item in data.get('amounts') or []
+        ], batch_size=500)
+
+
+class AnalysisResult(models.Model):
+    """Заголовок результата анализа файла без крупных полезных данных"""
+    RESULT_TYPE_CHOICES = [
+        ('ocr', 'Распознавание текста (OCR)'),
+        ('ner', 'Извлечение сущностей (NER)'),
+    ]
+
+    file = models.ForeignKey(StoredFile, on_delete=models.CASCADE, related_name='analysis_results',
+                             verbose_name='Файл')
+    result_type = models.CharField(max_length=10, choices=RESULT_TYPE_CHOICES, verbose_name='Тип результата')
+    pipeline_version = models.CharField(max_length=20, verbose_name='Версия конвейера')
+    language = models.CharField(max_length=10, blank=True, verbose_name='Язык')
+    sentiment = models.CharField(max_length=10, blank=True, verbose_name='Тональность')
+    keywords = models.JSONField(default=list, blank=True, verbose_name='Ключевые слова')
+    metadata = models.JSONField(default=dict, blank=True, verbose_name='Метаданные')
+    text_length = models.PositiveIntegerField(default=0, verbose_name='Длина текста')
+    entity_count = models.PositiveIntegerField(default=0, verbose_name='Количество сущностей')
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name='Начало обработки')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Окончание обработки')
+    duration_ms = models.PositiveIntegerField(null=True, blank=True, verbose_name='Длительность, мс')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+
+    objects = AnalysisResultManager()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Результат анализа'
+        verbose_name_plural = 'Результаты анализа'
+        indexes = [
+            models.Index(fields=['file', '-created_at'], name='ml_api_result_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_result_type_display()} for {self.file.filename()}"
+
+    @property
+    def text(self):
+        """Полный текст загружается отдельным запросом только по требованию"""
+        try:
+            return self.text_payload.text
+        except AnalysisText.DoesNotExist:
+            return ''
+
+    @property
+    def text_preview(self):
+        """Начало текста для страницы файла без чтения крупного блоба целиком"""
+        try:
+            return self.text_payload.preview()
+        except AnalysisText.DoesNotExist:
+            return ''
+
+    def entities_by_type(self):
+        grouped = {}
+        for entity_type, text in self.entities.values_list('entity_type', 'text'):
+            grouped.setdefault(entity_type, []).append(text)
+        return grouped
+
+
+class AnalysisText(models.Model):
+    """
+    Сжатый полный текст результата (хранится отдельно от заголовка).
+
+    Текст до RESULT_BLOB_THRESHOLD байт хранится в строке (zlib), более
+    крупный - блобом zstd в хранилище файлов; в БД остаются путь и
+    смещения кадров, по которым читаются отдельные диапазоны.
+    """
+    result = models.OneToOneField(AnalysisResult, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='text_payload', verbose_name='Результат')
+    compression = models.CharField(max_length=10, default='zlib', verbose_name='Сжатие')
+    size = models.PositiveIntegerField(default=0, verbose_name='Размер без сжатия, байт')
+    data = models.BinaryField(blank=True, default=b'', verbose_name='Данные')
+    blob_path = models.CharField(max_length=255, blank=True, verbose_name='Путь к блобу')
+    blob_frames = models.JSONField(default=list, blank=True, verbose_name='Смещения кадров блоба')
+    chunk_size = models.PositiveIntegerField(default=0, verbose_name='Размер блока, байт')
+
+    class Meta:
+        verbose_name = 'Текст результата'
+        verbose_name_plural = 'Тексты результатов'
+
+    @staticmethod
+    def compress(text):
+        raw = text.encode('utf-8')
+        if len(raw) <= settings.RESULT_BLOB_THRESHOLD:
+            return {'compression': 'zlib', 'size': len(raw), 'data': zlib.compress(raw, 6)}
+        blob = TextBlob.write(raw)
+        return {
+            'compression': 'zstd-blob',
+            'size': blob.size,
+            'blob_path': blob.path,
+            'blob_frames': blob.frames,
+            'chunk_size': blob.chunk_size,
+        }
+
+    @property
+    def is_blob(self):
+        return self.compression == 'zstd-blob'
+
+    @property
+    def blob(self):
+        return TextBlob(self.blob_path, self.size, self.chunk_size, self.blob_frames)
+
+    def read(self, start=0, end=None):
+        """Байты UTF-8 текста в диапазоне [start, end)"""
+        if self.is_blob:
+            return self.blob.read(start, end)
+        return zlib.decompress(bytes(self.data))[start:end]
+
+    def iter_chunks(self):
+        if self.is_blob:
+            yield from self.blob.iter_chunks()
+        else:
+            yield self.read()
+
+    def preview(self, limit=TEXT_PREVIEW_BYTES):
+        """Начало текста; у блоба распаковывается только первый кадр"""
+        return self.read(0, limit).decode('utf-8', errors='ignore')
+
+    @property
+    def text(self):
+        return self.read().decode('utf-8')
+
+
+class EntityTermManager(models.Manager):
+    def _apply_deltas(self, deltas):
+        """Изменяет счетчики нескольких терминов одним UPDATE ... CASE"""
+        if not deltas:
+            return
+        file_delta = models.Case(
+            *[models.When(id=term_id, then=models.Value(files)) for term_id, (files, _) in deltas.items()],
+            default=models.Value(0),
+        )
+        mention_delta = models.Case(
+            *[models.When(id=term_id, then=models.Value(mentions)) for term_id, (_, mentions) in deltas.items()],
+            default=models.Value(0),
+        )
+        self.filter(id__in=deltas).update(
+            file_count=models.F('file_count') + file_delta,
+            mention_count=models.F('mention_count') + mention_delta,
+        )
+
+    def unindex_file(self, file):
+        """Убирает упоминания файла из индекса и уменьшает счетчики"""
+        mentions = (
+            AnalysisEntity.objects.filter(file=file, term__isnull=False)
+            .values('term_id').annotate(mentions=models.Count('id'))
+        )
+        deltas = {row['term_id']: (-1, -row['mentions']) for row in mentions}
+        AnalysisEntity.objects.filter(file=file).delete()
+        self._apply_deltas(deltas)
+
+    def reindex_file(self, file, result, entities):
+        """
+        Заменяет упоминания сущностей файла результатами нового анализа.
+
+        Термины создаются пакетно (INSERT ... ON CONFLICT DO NOTHING),
+        упоминания - одним bulk_create, счетчики - одним UPDATE.
+        """
+        from ml_api.entities import normalize_entity
+
+        self.unindex_file(file)
+
+        postings = []
+        for entity in entities:
+            norm = normalize_entity(entity.get('lemma') or entity['text'])
+            if norm:
+                postings.append((entity['type'][:20], norm, entity))
+        if not postings:
+            return
+
+        self.bulk_create([
+            EntityTerm(user_id=file.user_id, entity_type=entity_type, norm=norm, text=entity['text'][:255])
+            for entity_type, norm, entity in postings
+        ], ignore_conflicts=True, batch_size=500)
+        terms = {
+            (term.entity_type, term.norm): term.id
+            for term in self.filter(
+                user_id=file.user_id, norm__in={norm for _, norm, _ in postings}
+            ).only('id', 'entity_type', 'norm')
+        }
+
+        deltas = {}
+        rows = []
+        for entity_type, norm, entity in postings:
+            term_id = terms[(entity_type, norm)]
+            files, mentions = deltas.get(term_id, (1, 0))
+            deltas[term_id] = (files, mentions + 1)
+            rows.append(AnalysisEntity(
+                result=result,
+                file=file,
+                term_id=term_id,
+                entity_type=entity_type,
+                text=entity['text'][:255],
+                start=entity['start'],
+                end=entity['end'],
+            ))
+        AnalysisEntity.objects.bulk_create(rows, batch_size=500)
+        self._apply_deltas(deltas)
+
+
+class EntityTerm(models.Model):
+    """
+    Термин инвертированного индекса сущностей пользователя.
+
+    norm - лемматизированный текст в casefold; по нему идет поиск по префиксу.
+    Счетчики поддерживаются инкрементально при записи результатов.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Пользователь')
+    entity_type = models.CharField(max_length=20, verbose_name='Тип сущности')
+    norm = models.CharField(max_length=255, verbose_name='Нормализованный текст')
+    text = models.CharField(max_length=255, verbose_name='Текст')
+    file_count = models.IntegerField(default=0, verbose_name='Файлов')
+    mention_count = models.IntegerField(default=0, verbose_name='Упоминаний')
+
+    objects = EntityTermManager()
+
+    class Meta:
+        verbose_name = 'Термин сущности'
+        verbose_name_plural = 'Термины сущностей'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'entity_type', 'norm'], name='ml_api_entityterm_unique'),
+        ]
+        indexes = [
+            # varchar_pattern_ops позволяет PostgreSQL использовать индекс для LIKE 'prefix%'
+            models.Index(fields=['user', 'norm'], name='ml_api_entityterm_prefix_idx',
+                         opclasses=['int4_ops', 'varchar_pattern_ops']),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type}: {self.text}"
+
+
+class AnalysisEntity(models.Model):
+    """Именованная сущность, найденная в файле (упоминание термина)"""
+    result = models.ForeignKey(AnalysisResult, on_delete=models.CASCADE, related_name='entities',
+                               verbose_name='Результат')
+    file = models.ForeignKey(StoredFile, on_delete=models.CASCADE, related_name='entities', verbose_name='Файл')
+    term = models.ForeignKey(EntityTerm, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='mentions', verbose_name='Термин')
+    entity_type = models.CharField(max_length=20, verbose_name='Тип сущности')
+    text = models.CharField(max_length=255, verbose_name='Текст')
+    start = models.PositiveIntegerField(verbose_name='Начало')
+    end = models.PositiveIntegerField(verbose_name='Конец')
+
+    class Meta:
+        verbose_name = 'Сущность'
+        verbose_name_plural = 'Сущности'
+        indexes = [
+            models.Index(fields=['file', 'entity_type'], name='ml_api_entity_file_type_idx'),
+            models.Index(fields=['term', 'file'], name='ml_api_entity_term_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.entity_type}: {self.text}"
+
+
+class ExtractedDate(models.Model):
+    """Дата, найденная в тексте файла, в нормализованном виде"""
+    result = models.ForeignKey(AnalysisResult, on_delete=models.CASCADE, related_name='dates',
+                               verbose_name='Результат')
+    file = models.ForeignKey(StoredFile, on_delete=models.CASCADE, related_name='extracted_dates',
+                             verbose_name='Файл')
+    value = models.DateField(verbose_name='Дата')
+    raw = models.CharField(max_length=100, verbose_name='Исходный текст')
+    start = models.PositiveIntegerField(verbose_name='Начало')
+    end = models.PositiveIntegerField(verbose_name='Конец')
+
+    class Meta:
+        verbose_name = 'Дата из текста'
+        verbose_name_plural = 'Даты из текста'
+        indexes = [
+            # Диапазонный поиск файлов по дате без обращения к таблице
+            models.Index(fields=['value', 'file'], name='ml_api_date_value_file_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.value} ({self.raw})"
+
+
+class ExtractedAmount(models.Model):
+    """Денежная сумма, найденная в тексте файла"""
+    result = models.ForeignKey(AnalysisResult, on_delete=models.CASCADE, related_name='amounts',
+                               verbose_name='Результат')
+    file = models.ForeignKey(StoredFile, on_delete=models.CASCADE, related_name='extracted_amounts',
+                             verbose_name='Файл')
+    amount = models.DecimalField(max_digits=18, decimal_places=2, verbose_name='Сумма')
+    currency = models.CharField(max_length=3, verbose_name='Валюта')
+    raw = models.CharField(max_length=100, verbose_name='Исходный текст')
+    start = models.PositiveIntegerField(verbose_name='Начало')
+    end = models.PositiveIntegerField(verbose_name='Конец')
+
+    class Meta:
+        verbose_name = 'Сумма из текста'
+        verbose_name_plural = 'Суммы из текста'
+        indexes = [
+            models.Index(fields=['currency', 'amount', 'file'], name='ml_api_amount_cur_file_idx'),
+        ]
 
     def __str__(self):
-        return f"Result for {self.file.filename()}"
\ No newline at end of file
+        return f"{self.amount} {self.currency}"
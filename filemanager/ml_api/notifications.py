@@ -0,0 +1,81 @@
+# ml_api/notifications.py
+"""
+Объединение уведомлений об обработке файлов в дайджесты.
+
+Результат обработки записывается в хеш Redis пользователя (file_id ->
+успех), первый результат в окне планирует одну задачу дайджеста через
+NOTIFICATION_DIGEST_WINDOW секунд. Одиночная загрузка (нет других файлов
+в обработке и накопленных событий) уведомляется сразу.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.models import StoredFile
+from filemanager.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ('pending', 'processing')
+# Давно загруженные, но не отправленные в обработку файлы не считаются пакетом
+ACTIVE_WINDOW = timedelta(hours=1)
+
+
+def events_key(user_id):
+    return f"notify:events:{user_id}"
+
+
+def window_key(user_id):
+    return f"notify:window:{user_id}"
+
+
+def has_active_batch(user_id, file_id):
+    """Есть ли у пользователя другие недавно загруженные файлы в обработке"""
+    return StoredFile.objects.filter(
+        user_id=user_id,
+        processing_status__in=ACTIVE_STATUSES,
+        uploaded_at__gte=timezone.now() - ACTIVE_WINDOW,
+    ).exclude(id=file_id).exists()
+
+
+def record_processing_result(user_id, file_id, success):
+    """
+    Регистрирует результат обработки файла для уведомления.
+
+    Возвращает 'immediate', если уведомление нужно отправить сразу, или
+    'buffered', если результат войдет в дайджест.
+    """
+    from .tasks import send_processing_notification, send_notification_digest
+
+    try:
+        redis = get_redis()
+        if not redis.exists(events_key(user_id)) and not has_active_batch(user_id, file_id):
+            send_processing_notification.delay(user_id, file_id, success)
+            return 'immediate'
+
+        window = settings.NOTIFICATION_DIGEST_WINDOW
+        pipe = redis.pipeline()
+        # Повторные попытки одного файла перезаписывают его статус
+        pipe.hset(events_key(user_id), file_id, int(success))
+        pipe.expire(events_key(user_id), window * 10)
+        pipe.set(window_key(user_id), 1, nx=True, ex=window)
+        *_, window_opened = pipe.execute()
+        if window_opened:
+            send_notification_digest.apply_async((user_id,), countdown=window)
+        return 'buffered'
+    except Exception as e:
+        # Без Redis уведомление все равно должно дойти
+        logger.warning(f"Notification coalescing unavailable ({e}), sending immediately")
+        send_processing_notification.delay(user_id, file_id, success)
+        return 'immediate'
+
+
+def collect_processing_results(user_id):
+    """Забирает накопленные результаты пользователя атомарно: {file_id: success}"""
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.hgetall(events_key(user_id))
+    pipe.delete(events_key(user_id))
+    events, _ = pipe.execute()
+    return {int(file_id): value == b'1' for file_id, value in events.items()}
@@ -0,0 +1,70 @@
+# ml_api/progress.py
+"""
+Постраничный прогресс обработки документа.
+
+Счетчики хранятся в хеше Redis progress:<file_id> (total, done) и
+обновляются задачами OCR страниц; каждое изменение публикуется в канал
+статуса файла (SSE) и доступно пакетному опросу статусов.
+"""
+import logging
+
+from core.events import publish_file_status
+from filemanager.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_TTL = 24 * 60 * 60
+
+
+def progress_key(file_id):
+    return f"progress:{file_id}"
+
+
+def start_progress(file_id, total, done=0):
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hset(progress_key(file_id), mapping={'total': total, 'done': done})
+        pipe.expire(progress_key(file_id), PROGRESS_TTL)
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not start progress for file {file_id}: {e}")
+
+
+def advance_progress(file, pages=1):
+    """Отмечает распознанные страницы и публикует прогресс"""
+    try:
+        pipe = get_redis().pipeline()
+        pipe.hincrby(progress_key(file.id), 'done', pages)
+        pipe.hget(progress_key(file.id), 'total')
+        done, total = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not update progress for file {file.id}: {e}")
+        return
+    publish_file_status(file, pages_done=done, pages_total=int(total or 0))
+
+
+def clear_progress(file_id):
+    try:
+        get_redis().delete(progress_key(file_id))
+    except Exception as e:
+        logger.warning(f"Could not clear progress for file {file_id}: {e}")
+
+
+def fetch_progress(file_ids):
+    """Прогресс нескольких файлов одним конвейером Redis: {file_id: (done, total)}"""
+    file_ids = list(file_ids)
+    if not file_ids:
+        return {}
+    try:
+        pipe = get_redis().pipeline()
+        for file_id in file_ids:
+            pipe.hmget(progress_key(file_id), 'done', 'total')
+        rows = pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not read progress: {e}")
+        return {}
+    return {
+        file_id: (int(done), int(total))
+        for file_id, (done, total) in zip(file_ids, rows)
+        if total is not None
+    }
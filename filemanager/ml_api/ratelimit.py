@@ -0,0 +1,83 @@
+# ml_api/ratelimit.py
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """
+    Ведро токенов: rate токенов в секунду, не больше capacity подряд.
+
+    reserve() сразу списывает токен (баланс может уйти в минус) и
+    возвращает время ожидания, поэтому конкурирующие отправители
+    обслуживаются по очереди, а не пробуют снова все одновременно.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, tokens=1):
+        """Списывает токены и возвращает, сколько секунд нужно подождать"""
+        with self._lock:
+            self._refill(self.clock())
+            self.tokens -= tokens
+            return max(0.0, -self.tokens / self.rate)
+
+    def pause(self, seconds):
+        """Запрещает отправку на seconds секунд (например, по retry_after)"""
+        with self._lock:
+            self._refill(self.clock())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def idle(self):
+        with self._lock:
+            self._refill(self.clock())
+            return self.tokens >= self.capacity
+
+    def wait(self, tokens=1):
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self, tokens=1):
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class KeyedTokenBuckets:
+    """Отдельное ведро на ключ (чат, получатель); простаивающие ведра удаляются"""
+
+    def __init__(self, rate, capacity=None, max_keys=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+                if len(self._buckets) > self.max_keys:
+                    self._evict_idle()
+            self._buckets.move_to_end(key)
+            return bucket
+
+    def _evict_idle(self):
+        for key in list(self._buckets):
+            if len(self._buckets) <= self.max_keys // 2:
+                break
+            if self._buckets[key].idle():
+                del self._buckets[key]
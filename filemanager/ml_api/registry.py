@@ -0,0 +1,128 @@
+# ml_api/registry.py
+"""
+Реестр ML-моделей с ленивой загрузкой.
+
+Импорт модулей ml_api ничего не загружает: модель читается при первом
+обращении registry.get(name). Веб-процессам spaCy нужен только для
+синхронных эндпоинтов, поэтому по умолчанию они его не загружают.
+
+Процессы, которым модель нужна всегда, загружают ее до fork:
+- Celery - в worker_init (родительский процесс до создания дочерних,
+  для prefork; для gevent/eventlet - до приема первой задачи),
+  список моделей - ML_WORKER_PRELOAD_MODELS;
+- gunicorn с preload_app - в MlApiConfig.ready() мастера,
+  список моделей - ML_PRELOAD_MODELS.
+Страницы загруженной модели дочерние процессы делят с родителем
+(copy-on-write), пока не изменят их.
+"""
+import logging
+import os
+import resource
+import threading
+import time
+
+from django.conf import settings
+
+from .metrics import ML_MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def process_memory():
+    """
+    Память текущего процесса в байтах: rss и pss (доля разделяемых
+    страниц делится между процессами, поэтому pss показывает выигрыш
+    от copy-on-write). Без /proc - только пиковый rss.
+    """
+    memory = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty'):
+                    memory[name.lower()] = int(value.split()[0]) * 1024
+    except OSError:
+        memory['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return memory
+
+
+def format_memory(memory):
+    return ', '.join(f"{name.upper()} {value / 2 ** 20:.0f} MB" for name, value in memory.items())
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._load_seconds = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        """loader() возвращает модель или поднимает исключение"""
+        self._loaders[name] = loader
+
+    def get(self, name):
+        """Модель по имени; None, если загрузить ее не удалось (ошибка кешируется)"""
+        model = self._models.get(name, MISSING)
+        if model is MISSING:
+            with self._lock:
+                model = self._models.get(name, MISSING)
+                if model is MISSING:
+                    model = self._models[name] = self._load(name)
+        return model
+
+    def _load(self, name):
+        started = time.monotonic()
+        rss_before = process_memory().get('rss', 0)
+        try:
+            model = self._loaders[name]()
+        except Exception as e:
+            logger.error(f"Model {name} could not be loaded: {e}")
+            return None
+        seconds = time.monotonic() - started
+        self._load_seconds[name] = seconds
+        ML_MODEL_LOAD_SECONDS.labels(name).set(seconds)
+        growth = (process_memory().get('rss', 0) - rss_before) / 2 ** 20
+        logger.info(f"Model {name} loaded in {seconds:.2f}s (pid {os.getpid()}, RSS +{growth:.0f} MB)")
+        return model
+
+    def preload(self, names):
+        """Загружает перечисленные модели (неизвестные имена пропускаются)"""
+        for name in names:
+            if name in self._loaders:
+                self.get(name)
+            else:
+                logger.warning(f"Unknown model {name} in preload list")
+
+    def is_loaded(self, name):
+        return self._models.get(name) is not None
+
+    def loaded(self):
+        return [name for name in self._models if self._models[name] is not None]
+
+    def report(self, role):
+        """Пишет в лог загруженные модели и память процесса"""
+        models = ', '.join(
+            f"{name} ({self._load_seconds[name]:.2f}s)" for name in self.loaded()
+        ) or 'none'
+        logger.info(f"{role} pid {os.getpid()}: models {models}; {format_memory(process_memory())}")
+
+
+def parse_model_list(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def load_spacy():
+    # spaCy импортируется вместе с моделью: сам импорт занимает заметное время и память
+    import spacy
+    return spacy.load(settings.SPACY_MODEL)
+
+
+registry = ModelRegistry()
+registry.register('spacy', load_spacy)
+
+
+def get_nlp():
+    return registry.get('spacy')
@@ -0,0 +1,257 @@
+# ml_api/remote.py
+"""
+Вызов инференса в ml_service вместо локальных spaCy/Tesseract.
+
+При ML_SERVICE_MODE=remote этапы OCR и NER отправляются в ml_service через
+общий пул keep-alive соединений httpx. Сетевые ошибки и ответы 5xx
+повторяются с экспоненциальной паузой; после ML_SERVICE_BREAKER_THRESHOLD
+неудач подряд автомат размыкается, и в течение ML_SERVICE_BREAKER_RESET
+секунд запросы сразу идут в локальную обработку, не дожидаясь таймаутов.
+Затем один пробный запрос решает, замкнуть автомат или снова разомкнуть.
+
+Ответы ml_service приводятся к формату результата локального конвейера
+(services.process_image_with_ocr / process_text_with_ner).
+"""
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import httpx
+from django.conf import settings
+from prometheus_client import Counter
+
+from . import services
+from .timing import stage
+
+logger = logging.getLogger(__name__)
+
+ML_SERVICE_REQUESTS = Counter(
+    'ml_service_requests_total',
+    'Вызовы ml_service',
+    ['outcome'],  # success, rejected, error, circuit_open
+)
+
+
+class RemoteInferenceError(Exception):
+    """ml_service недоступен или ответил ошибкой сервера"""
+
+
+class CircuitOpenError(RemoteInferenceError):
+    """Автомат разомкнут - запрос в ml_service не отправлялся"""
+
+
+class CircuitBreaker:
+    """Потокобезопасный автомат: closed -> open -> half_open -> closed"""
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and self.clock() - self.opened_at >= self.reset_timeout:
+                # Пропускаем один пробный запрос, остальные ждут его исхода
+                self.state = 'half_open'
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    logger.warning(f"ml_service circuit opened after {self.failures} failures")
+                self.state = 'open'
+                self.opened_at = self.clock()
+
+
+class MLServiceClient:
+    def __init__(self, base_url=None, timeout=None, connect_timeout=None, retries=None,
+                 max_connections=None, breaker=None, transport=None):
+        self.base_url = (base_url or settings.ML_SERVICE_URL).rstrip('/')
+        self.timeout = timeout or settings.ML_SERVICE_TIMEOUT
+        self.connect_timeout = connect_timeout or settings.ML_SERVICE_CONNECT_TIMEOUT
+        self.retries = settings.ML_SERVICE_RETRIES if retries is None else retries
+        self.max_connections = max_connections or settings.ML_SERVICE_MAX_CONNECTIONS
+        self.breaker = breaker or CircuitBreaker(
+            settings.ML_SERVICE_BREAKER_THRESHOLD, settings.ML_SERVICE_BREAKER_RESET,
+        )
+        self.transport = transport
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        # Соединения не переживают fork: дочерний процесс открывает свой пул
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                        limits=httpx.Limits(
+                            max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections,
+                            keepalive_expiry=60,
+                        ),
+                        transport=self.transport,
+                    )
+                    self._pid = os.getpid()
+        return self._client
+
+    def process(self, filename, content):
+        """
+        Отправляет файл в POST /process/ и возвращает поле result ответа.
+
+        Ответ 4xx означает, что ml_service не смог обработать содержимое:
+        возвращается {'status': 'error'} без повторов. Сетевые ошибки и 5xx
+        после всех попыток поднимают RemoteInferenceError.
+        """
+        if not self.breaker.allow():
+            ML_SERVICE_REQUESTS.labels('circuit_open').inc()
+            raise CircuitOpenError('ml_service circuit is open')
+
+        error = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(min(0.5 * 2 ** (attempt - 1), 5))
+            try:
+                with stage('ml_service'):
+                    response = self._get_client().post('/process/', files={'file': (filename, content)})
+            except httpx.HTTPError as e:
+                error = e
+                logger.warning(f"ml_service request failed (attempt {attempt + 1}): {e}")
+                continue
+            if response.status_code >= 500:
+                error = RemoteInferenceError(f"ml_service responded {response.status_code}")
+                logger.warning(f"ml_service responded {response.status_code} (attempt {attempt + 1})")
+                continue
+
+            self.breaker.record_success()
+            if response.status_code >= 400:
+                ML_SERVICE_REQUESTS.labels('rejected').inc()
+                return {'status': 'error', 'message': self._detail(response)}
+            ML_SERVICE_REQUESTS.labels('success').inc()
+            return response.json()['result']
+
+        self.breaker.record_failure()
+        ML_SERVICE_REQUESTS.labels('error').inc()
+        raise RemoteInferenceError(str(error))
+
+    @staticmethod
+    def _detail(response):
+        try:
+            return response.json().get('detail') or response.text
+        except ValueError:
+            return response.text
+
+    @staticmethod
+    def _ner_data(text, result):
+        analysis = result.get('analysis') or {}
+        return {
+            'text': text,
+            'language': analysis.get('language') or 'unknown',
+            'entities': result.get('entities') or [],
+            'sentiment': sentiment_label(analysis.get('sentiment')),
+            'keywords': analysis.get('keywords') or [],
+            'dates': analysis.get('dates') or [],
+            'amounts': analysis.get('money_amounts') or [],
+        }
+
+    def analyze_text(self, text):
+        """NER в ml_service в формате services.process_text_with_ner"""
+        result = self.process('document.txt', text.encode('utf-8'))
+        if result.get('status') != 'success':
+            return {'status': 'error', 'message': result.get('message', 'NER failed')}
+        return {
+            'status': 'success',
+            'type': 'ner',
+            'data': self._ner_data(text, result),
+            'metadata': {'model': settings.SPACY_MODEL, 'backend': 'ml_service'},
+        }
+
+    def analyze_image(self, image_path):
+        """OCR и NER в ml_service в формате services.process_image_with_ocr"""
+        with open(image_path, 'rb') as f:
+            result = self.process(Path(image_path).name, f.read())
+        if result.get('status') != 'success':
+            return {'status': 'error', 'message': result.get('message', 'OCR failed')}
+        text = result.get('text') or ''
+        if not text.strip():
+            return {'status': 'error', 'message': 'No text found in image'}
+
+        if 'entities' in result:
+            ner_data = self._ner_data(text, result)
+        else:
+            # Старые версии ml_service не выполняют NER для изображений
+            ner = self.analyze_text(text)
+            if ner['status'] != 'success':
+                return ner
+            ner_data = ner['data']
+        return {
+            'status': 'success',
+            'type': 'ocr',
+            'data': {key: ner_data[key] for key in
+                     ('text', 'language', 'entities', 'sentiment', 'dates', 'amounts')},
+            'metadata': {
+                'processing_steps': (result.get('analysis') or {}).get('processing', '').split('+'),
+                'original_path': image_path,
+                'backend': 'ml_service',
+            },
+        }
+
+
+def sentiment_label(sentiment):
+    """ml_service отдает тональность словарем или None для коротких текстов"""
+    if isinstance(sentiment, dict):
+        return sentiment.get('sentiment') or 'neutral'
+    return sentiment or 'neutral'
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Общий клиент процесса: один пул соединений и один автомат на процесс"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MLServiceClient()
+    return _client
+
+
+def _run(remote, local, *args):
+    if settings.ML_SERVICE_MODE != 'remote':
+        return local(*args)
+    try:
+        return remote(*args)
+    except RemoteInferenceError as e:
+        logger.warning(f"ml_service unavailable, processing locally: {e}")
+        return local(*args)
+
+
+def process_image(image_path):
+    """OCR изображения: в ml_service или локально"""
+    return _run(lambda path: get_client().analyze_image(path), services.process_image_with_ocr, image_path)
+
+
+def process_text(text):
+    """NER текста: в ml_service или локально"""
+    return _run(lambda value: get_client().analyze_text(value), services.process_text_with_ner, text)
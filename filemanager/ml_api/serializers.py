@@ -1,8 +1,27 @@
+from django.urls import reverse
 from rest_framework import serializers
-from .models import MLRequest
+from .models import MLRequest, EntityTerm
 
 class MLRequestSerializer(serializers.ModelSerializer):
     class Meta:
         model = MLRequest
         fields = '__all__'
-        read_only_fields = ('user', 'created_at')
\ No newline at end of file
+        read_only_fields = ('user', 'created_at')
+
+
+class MLRequestSummarySerializer(serializers.ModelSerializer):
+    """Строка списка запросов без входных данных и результата"""
+    detail_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MLRequest
+        fields = ('id', 'file', 'request_type', 'status', 'created_at', 'updated_at', 'detail_url')
+
+    def get_detail_url(self, obj):
+        return reverse('ml_request_detail', args=[obj.id])
+
+
+class EntityTermSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EntityTerm
+        fields = ('id', 'entity_type', 'norm', 'text', 'file_count', 'mention_count')
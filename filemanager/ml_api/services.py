@@ -1,6 +1,5 @@
 # ml_api/services.py
 import pytesseract
-import spacy
 import cv2
 import numpy as np
 from datetime import datetime
@@ -13,14 +12,24 @@ from docx import Document
 import zipfile
 from bs4 import BeautifulSoup
 
+from .extraction import extract_dates, extract_money
+from .registry import get_nlp
+from .timing import stage
+
 logger = logging.getLogger(__name__)
 
-# Load NLP models
-try:
-    nlp = spacy.load(settings.SPACY_MODEL)
-except OSError:
-    logger.error(f"Spacy model {settings.SPACY_MODEL} not found. Please install it first.")
-    nlp = None
+# Версия конвейера обработки; увеличивается при изменении логики OCR/NER,
+# чтобы результаты разных версий можно было различить
+PIPELINE_VERSION = '1.1'
+
+# Версии этапов для контрольных точек (ml_api/checkpoints.py): при изменении
+# этапа его версия увеличивается, и сохраненные промежуточные данные
+# перестают использоваться
+STAGE_VERSIONS = {
+    'page': '1',
+    'text': '1',
+    'analysis': PIPELINE_VERSION,
+}
 
 
 def run_tesseract(image_path):
@@ -30,19 +39,22 @@ def run_tesseract(image_path):
         pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
 
         # Чтение изображения
-        img = cv2.imread(image_path)
+        with stage('decode'):
+            img = cv2.imread(image_path)
         if img is None:
             return {"status": "error", "message": "Could not read image file"}
 
-        # Преобразование в оттенки серого
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        with stage('threshold'):
+            # Преобразование в оттенки серого
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        # Применение пороговой обработки
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            # Применение пороговой обработки
+            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
 
         # Распознавание текста
         custom_config = r'--oem 3 --psm 6 -l rus+eng'
-        text = pytesseract.image_to_string(thresh, config=custom_config)
+        with stage('tesseract'):
+            text = pytesseract.image_to_string(thresh, config=custom_config)
 
         return {
             "status": "success",
@@ -57,14 +69,17 @@ def run_tesseract(image_path):
 def run_spacy(text):
     """Анализ текста с помощью spaCy NER"""
     try:
+        nlp = get_nlp()
         if not nlp:
             return {"status": "error", "message": "Spacy model not loaded"}
 
-        doc = nlp(text)
+        with stage('spacy'):
+            doc = nlp(text)
 
         # Извлечение именованных сущностей
         entities = [
-            {"text": ent.text, "type": ent.label_, "start": ent.start_char, "end": ent.end_char}
+            {"text": ent.text, "lemma": ent.lemma_, "type": ent.label_,
+             "start": ent.start_char, "end": ent.end_char}
             for ent in doc.ents
         ]
 
@@ -82,22 +97,25 @@ def preprocess_image(image_path):
     """Preprocess image for better OCR results"""
     try:
         # Read image
-        img = cv2.imread(image_path)
+        with stage('decode'):
+            img = cv2.imread(image_path)
         if img is None:
             raise ValueError("Could not read image")
 
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        with stage('threshold'):
+            # Convert to grayscale
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        # Apply adaptive thresholding
-        thresh = cv2.adaptiveThreshold(
-            gray, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY, 11, 2
-        )
+            # Apply adaptive thresholding
+            thresh = cv2.adaptiveThreshold(
+                gray, 255,
+                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                cv2.THRESH_BINARY, 11, 2
+            )
 
         # Denoise
-        denoised = cv2.fastNlMeansDenoising(thresh, h=10)
+        with stage('denoise'):
+            denoised = cv2.fastNlMeansDenoising(thresh, h=10)
 
         return denoised
     except Exception as e:
@@ -116,7 +134,8 @@ def process_image_with_ocr(image_path):
         # Run Tesseract OCR
         pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
         custom_config = r'--oem 3 --psm 6 -l rus+eng'
-        text = pytesseract.image_to_string(processed_img, config=custom_config)
+        with stage('tesseract'):
+            text = pytesseract.image_to_string(processed_img, config=custom_config)
 
         if not text.strip():
             return {'status': 'error', 'message': 'No text found in image'}
@@ -131,7 +150,9 @@ def process_image_with_ocr(image_path):
                 'text': text,
                 'language': analysis['language'],
                 'entities': analysis['entities'],
-                'sentiment': analysis['sentiment']
+                'sentiment': analysis['sentiment'],
+                'dates': analysis['dates'],
+                'amounts': analysis['amounts'],
             },
             'metadata': {
                 'processing_steps': ['grayscale', 'thresholding', 'denoising'],
@@ -146,7 +167,7 @@ def process_image_with_ocr(image_path):
 def process_text_with_ner(text):
     """Process text with NER"""
     try:
-        if not nlp:
+        if not get_nlp():
             return {'status': 'error', 'message': 'NLP model not loaded'}
 
         # Analyze text
@@ -160,7 +181,9 @@ def process_text_with_ner(text):
                 'language': analysis['language'],
                 'entities': analysis['entities'],
                 'sentiment': analysis['sentiment'],
-                'keywords': analysis['keywords']
+                'keywords': analysis['keywords'],
+                'dates': analysis['dates'],
+                'amounts': analysis['amounts'],
             },
             'metadata': {
                 'model': settings.SPACY_MODEL
@@ -178,7 +201,9 @@ def analyze_text(text):
             'language': 'unknown',
             'entities': [],
             'sentiment': 'neutral',
-            'keywords': []
+            'keywords': [],
+            'dates': [],
+            'amounts': [],
         }
 
     # Detect language
@@ -187,10 +212,13 @@ def analyze_text(text):
     # Extract entities if NLP model is available
     entities = []
     keywords = []
+    nlp = get_nlp()
     if nlp:
-        doc = nlp(text)
+        with stage('spacy'):
+            doc = nlp(text)
         entities = [
-            {'text': ent.text, 'type': ent.label_, 'start': ent.start_char, 'end': ent.end_char}
+            {'text': ent.text, 'lemma': ent.lemma_, 'type': ent.label_,
+             'start': ent.start_char, 'end': ent.end_char}
             for ent in doc.ents
         ]
 
@@ -203,11 +231,16 @@ def analyze_text(text):
     # Simple sentiment analysis
     sentiment = analyze_sentiment(text, language)
 
+    with stage('extract_values'):
+        dates, amounts = extract_dates(text), extract_money(text)
+
     return {
         'language': language,
         'entities': entities,
         'sentiment': sentiment,
-        'keywords': keywords
+        'keywords': keywords,
+        'dates': dates,
+        'amounts': amounts,
     }
 
 
@@ -240,18 +273,46 @@ def analyze_sentiment(text, language='ru'):
     return 'neutral'
 
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text from PDF using OCR"""
-    try:
-        images = pdf2image.convert_from_path(pdf_path)
-        text = ""
-        pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+def pdf_page_count(pdf_path):
+    """Число страниц PDF без растеризации"""
+    return int(pdf2image.pdfinfo_from_path(pdf_path)['Pages'])
 
-        for i, image in enumerate(images):
-            page_text = pytesseract.image_to_string(image, lang='rus+eng')
-            text += f"\n\nPage {i + 1}:\n{page_text}"
 
-        return text.strip()
+def ocr_pdf_page(pdf_path, page_number):
+    """Растеризация и OCR одной страницы PDF (нумерация с 1)"""
+    pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
+    with stage('pdf_render'):
+        images = pdf2image.convert_from_path(pdf_path, first_page=page_number, last_page=page_number)
+    if not images:
+        return ''
+    with stage('tesseract'):
+        return pytesseract.image_to_string(images[0], lang='rus+eng')
+
+
+def join_pages(pages):
+    """Текст документа из текстов страниц {номер: текст}"""
+    return "".join(
+        f"\n\nPage {number}:\n{pages[number]}" for number in sorted(pages)
+    ).strip()
+
+
+def extract_text_from_pdf(pdf_path, checkpoint=None):
+    """
+    Extract text from PDF using OCR.
+
+    Страницы растеризуются по одной; с checkpoint уже распознанные
+    страницы берутся из контрольной точки, а новые сохраняются в нее.
+    """
+    try:
+        pages = checkpoint.pages() if checkpoint else {}
+        for number in range(1, pdf_page_count(pdf_path) + 1):
+            if number in pages:
+                continue
+            pages[number] = ocr_pdf_page(pdf_path, number)
+            if checkpoint:
+                checkpoint.save_page(number, pages[number])
+
+        return join_pages(pages)
     except Exception as e:
         logger.error(f"PDF extraction failed: {str(e)}")
         return None
@@ -260,8 +321,9 @@ def extract_text_from_pdf(pdf_path):
 def extract_text_from_docx(docx_path):
     """Extract text from DOCX file"""
     try:
-        doc = Document(docx_path)
-        return "\n".join(para.text for para in doc.paragraphs if para.text.strip())
+        with stage('docx_parse'):
+            doc = Document(docx_path)
+            return "\n".join(para.text for para in doc.paragraphs if para.text.strip())
     except Exception as e:
         logger.error(f"DOCX extraction failed: {str(e)}")
         return None
\ No newline at end of file
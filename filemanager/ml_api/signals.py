@@ -0,0 +1,34 @@
+# ml_api/signals.py
+import logging
+
+from django.db import transaction
+from django.db.models.signals import pre_delete, post_delete
+from django.dispatch import receiver
+
+from core.models import StoredFile
+from .blobs import TextBlob
+from .models import EntityTerm, AnalysisText
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(pre_delete, sender=StoredFile)
+def unindex_deleted_file(sender, instance, **kwargs):
+    """Уменьшает счетчики индекса сущностей до каскадного удаления упоминаний"""
+    EntityTerm.objects.unindex_file(instance)
+
+
+@receiver(post_delete, sender=AnalysisText)
+def delete_text_blob(sender, instance, **kwargs):
+    """Удаляет блоб текста из хранилища после фиксации удаления строки"""
+    if not instance.is_blob:
+        return
+    path = instance.blob_path
+
+    def delete():
+        try:
+            TextBlob.delete_path(path)
+        except Exception as e:
+            logger.warning(f"Could not delete result blob {path}: {e}")
+
+    transaction.on_commit(delete)
@@ -0,0 +1,71 @@
+# ml_api/status.py
+import logging
+
+from celery import states
+from celery.backends.base import KeyValueStoreBackend
+
+from core.models import StoredFile
+from filemanager.celery import app as celery_app
+
+from .progress import fetch_progress
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_STATUS_IDS = 500
+
+
+def _compact_meta(meta):
+    """Сжатое представление метаданных задачи из result backend"""
+    state = meta.get('status', states.PENDING)
+    ready = state in states.READY_STATES
+    return {
+        'status': state,
+        'ready': ready,
+        'successful': state == states.SUCCESS if ready else None,
+        'result': meta.get('result') if state == states.SUCCESS else None,
+        'error': str(meta.get('result')) if state in states.PROPAGATE_STATES else None,
+    }
+
+
+def fetch_task_states(task_ids):
+    """
+    Состояния задач Celery за один запрос к result backend.
+
+    Для key-value бэкендов (Redis) все ключи читаются одним MGET вместо
+    отдельных GET на каждый вызов ready()/successful()/failed().
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    if not task_ids:
+        return {}
+
+    backend = celery_app.backend
+    if not isinstance(backend, KeyValueStoreBackend):
+        return {task_id: _compact_meta(backend.get_task_meta(task_id)) for task_id in task_ids}
+
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    values = backend.mget(keys)
+    if isinstance(values, dict):
+        # memcached/cache-бэкенды отдают словарь вместо списка
+        values = [values.get(key) for key in keys]
+
+    result = {}
+    for task_id, raw in zip(task_ids, values):
+        meta = backend.decode_result(raw) if raw is not None else {'status': states.PENDING}
+        result[task_id] = _compact_meta(meta)
+    return result
+
+
+def fetch_file_states(user, file_ids):
+    """Статусы обработки файлов пользователя одним запросом к БД"""
+    rows = StoredFile.objects.filter(user=user, id__in=file_ids).values_list(
+        'id', 'processed', 'processing_status'
+    )
+    states = {
+        file_id: {'processed': processed, 'status': processing_status}
+        for file_id, processed, processing_status in rows
+    }
+    # Постраничный прогресс есть только у документов, обрабатываемых сейчас
+    processing = [file_id for file_id, state in states.items() if state['status'] == 'processing']
+    for file_id, (done, total) in fetch_progress(processing).items():
+        states[file_id].update(pages_done=done, pages_total=total)
+    return states
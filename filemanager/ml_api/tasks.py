@@ -1,16 +1,27 @@
 # ml_api/tasks.py
 import logging
-from celery import shared_task
+from datetime import datetime
+from celery import chord, group, shared_task
 from django.core.cache import cache
-from django.core.mail import send_mail
 from django.conf import settings
-from core.models import StoredFile
+from django.utils import timezone
+from core.models import StoredFile, SearchDocument
 from ml_api.services import (
-    process_image_with_ocr,
-    process_text_with_ner,
+    PIPELINE_VERSION,
+    STAGE_VERSIONS,
     extract_text_from_pdf,
+    join_pages,
+    ocr_pdf_page,
+    pdf_page_count,
     extract_text_from_docx
 )
+from ml_api.mailer import queue_email, drain_outbox, FLUSH_FLAG_KEY
+from ml_api.checkpoints import StageCheckpoint
+from ml_api.remote import process_image, process_text
+from ml_api.notifications import record_processing_result, collect_processing_results
+from ml_api.progress import start_progress, advance_progress, clear_progress
+from ml_api.timing import PipelineTimer, current_breakdown, stage
+from filemanager.redis_client import get_redis
 import time
 from pathlib import Path
 
@@ -19,59 +30,204 @@ logger = logging.getLogger(__name__)
 
 @shared_task(bind=True)
 def process_file_task(self, file_id, user_id):
+    with PipelineTimer.for_task(self) as timer:
+        response = run_file_processing(self, timer, file_id, user_id)
+        timer.outcome = response['status']
+        return response
+
+
+def run_file_processing(task, timer, file_id, user_id):
     try:
         file = StoredFile.objects.get(id=file_id, user_id=user_id)
-        file.mark_processing()
+        if not file.mark_processing():
+            # Файл уже забрала другая доставка этой задачи
+            return {'status': 'skipped', 'file_id': file_id}
+        started_at = timezone.now()
 
         file_path = file.file.path
         file_ext = Path(file_path).suffix.lower()
+        timer.file_type = file_ext
 
         result = None
+        # Повторная попытка продолжает с последнего завершенного этапа
+        checkpoint = StageCheckpoint.for_file(file_path, STAGE_VERSIONS)
 
         # Process based on file type
-        if file_ext in settings.SUPPORTED_IMAGE_TYPES:
-            logger.info(f"Processing image file: {file_path}")
-            result = process_image_with_ocr(file_path)
-
-        elif file_ext == '.pdf':
+        # PDF проверяется первым: расширение входит и в SUPPORTED_IMAGE_TYPES
+        if file_ext == '.pdf':
             logger.info(f"Processing PDF file: {file_path}")
-            text = extract_text_from_pdf(file_path)
+            text = checkpoint.load('text')
+            if text is None:
+                page_count = pdf_page_count(file_path)
+                if page_count >= settings.OCR_FANOUT_MIN_PAGES:
+                    return dispatch_pdf_pipeline(file, page_count, checkpoint, started_at)
+                text = checkpoint.run('text', lambda: extract_text_from_pdf(file_path, checkpoint=checkpoint))
             if text:
-                result = process_text_with_ner(text)
+                result = checkpoint.run('analysis', lambda: process_text(text))
+
+        elif file_ext in settings.SUPPORTED_IMAGE_TYPES:
+            logger.info(f"Processing image file: {file_path}")
+            result = checkpoint.run('analysis', lambda: process_image(file_path))
 
         elif file_ext == '.docx':
             logger.info(f"Processing DOCX file: {file_path}")
-            text = extract_text_from_docx(file_path)
+            text = checkpoint.run('text', lambda: extract_text_from_docx(file_path))
             if text:
-                result = process_text_with_ner(text)
+                result = checkpoint.run('analysis', lambda: process_text(text))
 
         elif file_ext in settings.SUPPORTED_TEXT_TYPES:
             logger.info(f"Processing text file: {file_path}")
             with open(file_path, 'r', encoding='utf-8') as f:
                 text = f.read()
-            result = process_text_with_ner(text)
-
-        if result and result.get('status') == 'success':
-            from ml_api.models import AnalysisResult
-            AnalysisResult.objects.create(
-                file=file,
-                result_type=result['type'],
-                data=result['data'],
-                metadata=result.get('metadata', {})
-            )
-            file.mark_completed()
-            send_processing_notification.delay(user_id, file_id, True)
-            return {'status': 'success', 'file_id': file_id}
-        else:
-            file.mark_failed()
-            send_processing_notification.delay(user_id, file_id, False)
-            return {'status': 'failed', 'file_id': file_id}
+            result = checkpoint.run('analysis', lambda: process_text(text))
+
+        return persist_processing_result(file, result, checkpoint, started_at)
 
     except Exception as e:
         logger.error(f"Error processing file {file_id}: {str(e)}")
         file.mark_failed()
-        send_processing_notification.delay(user_id, file_id, False)
-        raise self.retry(exc=e, countdown=60)
+        record_processing_result(user_id, file_id, False)
+        raise task.retry(exc=e, countdown=60)
+
+
+def persist_processing_result(file, result, checkpoint, started_at):
+    """Сохраняет результат обработки, обновляет статус и уведомляет пользователя"""
+    if not file.is_current():
+        # Файл заменен или переобрабатывается: результат устаревшей попытки не нужен
+        logger.info(f"File {file.id}: discarding result of stale processing attempt")
+        return {'status': 'stale', 'file_id': file.id}
+
+    if result and result.get('status') == 'success':
+        from ml_api.models import AnalysisResult
+        # Разбивка по этапам до записи в БД (сама запись - этап db_write в метриках)
+        result.setdefault('metadata', {})['timings_ms'] = current_breakdown()
+        with stage('db_write'):
+            AnalysisResult.objects.store(
+                file,
+                result,
+                pipeline_version=PIPELINE_VERSION,
+                started_at=started_at,
+                finished_at=timezone.now(),
+            )
+            SearchDocument.index_text(
+                file,
+                result['data'].get('text') or '',
+                language=result['data'].get('language') or '',
+            )
+        checkpoint.clear()
+        if not file.mark_completed():
+            return {'status': 'stale', 'file_id': file.id}
+        record_processing_result(file.user_id, file.id, True)
+        return {'status': 'success', 'file_id': file.id}
+    else:
+        if not file.mark_failed():
+            return {'status': 'stale', 'file_id': file.id}
+        record_processing_result(file.user_id, file.id, False)
+        return {'status': 'failed', 'file_id': file.id}
+
+
+def dispatch_pdf_pipeline(file, page_count, checkpoint, started_at):
+    """
+    Запускает распознавание PDF по страницам на всех воркерах.
+
+    Группа задач OCR охватывает только страницы без контрольной точки;
+    хорда по их завершении собирает текст, выполняет NER и сохраняет
+    результат.
+    """
+    done = checkpoint.pages()
+    missing = [number for number in range(1, page_count + 1) if number not in done]
+    start_progress(file.id, page_count, done=len(done))
+
+    # Версия статуса передается дальше: завершение после замены файла отклоняется
+    finalize = finalize_document_task.s(
+        file.id, file.processing_version, checkpoint.content_hash, page_count, started_at.isoformat()
+    ).on_error(fail_document_task.si(file.id, file.processing_version))
+    if missing:
+        header = group([ocr_page_task.s(file.id, checkpoint.content_hash, number) for number in missing])
+        async_result = chord(header, finalize).apply_async()
+    else:
+        async_result = finalize.apply_async(([],))
+
+    logger.info(f"PDF {file.id}: {len(missing)} of {page_count} pages dispatched for OCR")
+    return {'status': 'processing', 'file_id': file.id, 'pages': page_count, 'pipeline_id': async_result.id}
+
+
+@shared_task(bind=True, max_retries=3)
+def ocr_page_task(self, file_id, content_hash, page_number):
+    """
+    OCR одной страницы PDF; текст сохраняется в контрольную точку страницы.
+
+    Текст возвращается в результате задачи, только если контрольную точку
+    записать не удалось - иначе страницы не проходят через бэкенд результатов.
+    """
+    with PipelineTimer.for_task(self, 'pdf'):
+        file = StoredFile.objects.get(id=file_id)
+        checkpoint = StageCheckpoint(content_hash, STAGE_VERSIONS)
+        try:
+            text = ocr_pdf_page(file.file.path, page_number)
+        except Exception as e:
+            logger.error(f"OCR of page {page_number} of file {file_id} failed: {e}")
+            raise self.retry(exc=e, countdown=10)
+        saved = checkpoint.save_page(page_number, text)
+        advance_progress(file)
+        return [page_number, None if saved else text]
+
+
+@shared_task(bind=True)
+def finalize_document_task(self, page_results, file_id, version, content_hash, page_count, started_at):
+    """
+    Колбэк хорды: склеивает страницы, выполняет NER и сохраняет результат.
+
+    Разбивка в metadata относится только к этой задаче: этапы страниц
+    (pdf_render, tesseract) видны в метриках ocr_page_task.
+    """
+    with PipelineTimer.for_task(self, 'pdf') as timer:
+        response = finalize_document(page_results, file_id, version, content_hash, page_count, started_at)
+        timer.outcome = response['status']
+        return response
+
+
+def finalize_document(page_results, file_id, version, content_hash, page_count, started_at):
+    file = StoredFile.objects.get(id=file_id)
+    if file.processing_version != version:
+        logger.info(f"File {file_id}: pipeline of version {version} is stale, skipping")
+        return {'status': 'stale', 'file_id': file_id}
+    checkpoint = StageCheckpoint(content_hash, STAGE_VERSIONS)
+    # Страницы читаются из контрольной точки; в результатах группы - только
+    # те, что не удалось туда записать
+    pages = checkpoint.pages()
+    pages.update({number: text for number, text in page_results if text is not None})
+    if len(pages) < page_count:
+        logger.error(f"PDF {file_id}: only {len(pages)} of {page_count} pages recognized")
+        clear_progress(file_id)
+        return persist_processing_result(file, None, checkpoint, None)
+
+    text = join_pages(pages)
+    checkpoint.save('text', text)
+    result = checkpoint.run('analysis', lambda: process_text(text)) if text else None
+    clear_progress(file_id)
+    return persist_processing_result(file, result, checkpoint, datetime.fromisoformat(started_at))
+
+
+@shared_task
+def fail_document_task(file_id, version):
+    """Обработчик ошибки хорды: страница не распознана после всех попыток"""
+    file = StoredFile.objects.get(id=file_id)
+    clear_progress(file_id)
+    file.processing_version = version
+    if file.mark_failed():
+        record_processing_result(file.user_id, file_id, False)
+
+
+def deliver_notification(user, subject, message):
+    """Отправляет уведомление пользователю по email и в Telegram"""
+    if user.email:
+        queue_email(subject, message, [user.email])
+
+    # Send Telegram notification if configured
+    if hasattr(user, 'telegram_chat_id') and user.telegram_chat_id:
+        from ml_api.telegram_dispatch import enqueue_telegram_message
+        enqueue_telegram_message(user.telegram_chat_id, f"{subject}\n{message}")
 
 
 @shared_task
@@ -89,44 +245,73 @@ def send_processing_notification(user_id, file_id, success):
             f"Файл {file.filename()} был {'успешно обработан' if success else 'не обработан'}.\n\n"
             f"Вы можете просмотреть результаты на сайте: {settings.SITE_URL}/files/{file_id}/"
         )
+        deliver_notification(user, subject, message)
 
-        send_mail(
-            subject=subject,
-            message=message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
-            fail_silently=False
-        )
+    except Exception as e:
+        logger.error(f"Error sending notification: {str(e)}")
 
-        # Send Telegram notification if configured
-        if hasattr(user, 'telegram_chat_id') and user.telegram_chat_id:
-            from ml_api.telegram import send_telegram_message
-            send_telegram_message.delay(
-                chat_id=user.telegram_chat_id,
-                text=f"{subject}\n{message}"
-            )
+
+@shared_task
+def send_notification_digest(user_id):
+    """Одно уведомление по всем файлам, обработанным за окно"""
+    try:
+        from django.contrib.auth import get_user_model
+
+        results = collect_processing_results(user_id)
+        if not results:
+            return 0
+        if len(results) == 1:
+            (file_id, success), = results.items()
+            send_processing_notification(user_id, file_id, success)
+            return 1
+
+        user = get_user_model().objects.get(id=user_id)
+        files = StoredFile.objects.filter(user_id=user_id, id__in=results).order_by('id')
+        succeeded = sum(1 for success in results.values() if success)
+        failed = len(results) - succeeded
+
+        subject = f"Обработано файлов: {len(results)}"
+        lines = [
+            f"{'✓' if results[file.id] else '✗'} {file.filename()}: "
+            f"{settings.SITE_URL}/files/{file.id}/"
+            for file in files
+        ]
+        message = (
+            f"Успешно: {succeeded}, с ошибкой: {failed}.\n\n" + "\n".join(lines)
+        )
+        deliver_notification(user, subject, message)
+        return len(results)
 
     except Exception as e:
-        logger.error(f"Error sending notification: {str(e)}")
+        logger.error(f"Error sending notification digest: {str(e)}")
 
 
 @shared_task
 def send_telegram_notification(chat_id: str, message: str):
-    """Отправка уведомления в Telegram"""
+    """Отправка уведомления в Telegram через очередь диспетчера"""
     if not settings.TELEGRAM_BOT_TOKEN:
         logger.warning("Telegram bot token not configured")
-        return
+        return False
+
+    from ml_api.telegram_dispatch import enqueue_telegram_message
+    return enqueue_telegram_message(chat_id, message)
+
+
+@shared_task(bind=True, max_retries=20)
+def flush_email_outbox(self):
+    """
+    Отправляет накопленные письма через общее SMTP-соединение (очередь io).
 
+    После исчерпания повторов письма остаются в очереди и уйдут при
+    следующей отправке, которую запланирует queue_email.
+    """
+    # Письма, поставленные после этой строки, запланируют новую отправку
+    get_redis().delete(FLUSH_FLAG_KEY)
     try:
-        url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
-        payload = {
-            'chat_id': chat_id,
-            'text': message,
-            'parse_mode': 'Markdown'
-        }
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        return True
+        sent = drain_outbox()
     except Exception as e:
-        logger.error(f"Failed to send Telegram notification: {str(e)}")
-        return False
\ No newline at end of file
+        logger.error(f"Email batch failed: {e}")
+        raise self.retry(exc=e, countdown=30)
+    if sent:
+        logger.info(f"Sent {sent} notification emails")
+    return sent
\ No newline at end of file
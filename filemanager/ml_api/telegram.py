@@ -3,8 +3,11 @@ import requests
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from .models import MLRequest
+from .telegram_dispatch import enqueue_telegram_message
+from .telegram_updates import enqueue_update
 import json
 
 logger = logging.getLogger(__name__)
@@ -13,41 +16,64 @@ User = get_user_model()
 
 @csrf_exempt
 def telegram_webhook(request):
-    """Обработчик входящих сообщений от Telegram"""
-    if request.method == 'POST':
-        try:
-            data = json.loads(request.body)
-            message = data.get('message', {})
-            chat_id = message.get('chat', {}).get('id')
-            text = message.get('text', '').strip().lower()
+    """
+    Прием обновлений от Telegram.
+
+    Обновление только проверяется и кладется в поток Redis, ответ 200
+    уходит сразу; обработку выполняет run_telegram_consumers.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'status': 'method not allowed'}, status=405)
+
+    secret = settings.TELEGRAM_WEBHOOK_SECRET
+    if secret and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != secret:
+        return JsonResponse({'status': 'forbidden'}, status=403)
+
+    try:
+        update = json.loads(request.body)
+        update_id = int(update['update_id'])
+    except (ValueError, KeyError, TypeError):
+        # Повторная доставка не исправит некорректное обновление
+        logger.warning("Invalid Telegram update received")
+        return JsonResponse({'status': 'ignored'})
+
+    try:
+        enqueue_update(update_id, request.body)
+    except Exception as e:
+        # 5xx - Telegram повторит доставку позже
+        logger.error(f"Could not enqueue Telegram update {update_id}: {e}")
+        return JsonResponse({'status': 'error'}, status=503)
 
-            logger.info(f"Incoming Telegram message: {text}")
+    return JsonResponse({'status': 'ok'})
 
-            # Обработка команды /start
-            if text.startswith('/start'):
-                return handle_start_command(chat_id, text)
 
-            # Обработка команды /help
-            elif text == '/help':
-                return send_telegram_message(
-                    chat_id,
-                    "Доступные команды:\n"
-                    "/start - Начало работы\n"
-                    "/help - Справка\n"
-                    "/link <код> - Привязать аккаунт"
-                )
+def process_update(update):
+    """Обработка одного обновления Telegram (вызывается потребителями потока)"""
+    message = update.get('message') or {}
+    chat_id = message.get('chat', {}).get('id')
+    text = (message.get('text') or '').strip().lower()
+    if not chat_id:
+        return
 
-            # Обработка команды /link
-            elif text.startswith('/link'):
-                return handle_link_command(chat_id, text)
+    logger.info(f"Incoming Telegram message: {text}")
 
-            return JsonResponse({'status': 'ok'})
+    # Обработка команды /start
+    if text.startswith('/start'):
+        handle_start_command(chat_id, text)
 
-        except Exception as e:
-            logger.error(f"Telegram webhook error: {str(e)}", exc_info=True)
-            return JsonResponse({'status': 'error'}, status=500)
+    # Обработка команды /help
+    elif text == '/help':
+        send_telegram_message(
+            chat_id,
+            "Доступные команды:\n"
+            "/start - Начало работы\n"
+            "/help - Справка\n"
+            "/link <код> - Привязать аккаунт"
+        )
 
-    return JsonResponse({'status': 'method not allowed'}, status=405)
+    # Обработка команды /link
+    elif text.startswith('/link'):
+        handle_link_command(chat_id, text)
 
 
 def handle_start_command(chat_id, text):
@@ -122,7 +148,6 @@ def handle_link_command(chat_id, text):
 
 def generate_verification_code(user_id):
     """Генерация кода подтверждения"""
-    from django.core.cache import cache
     import secrets
 
     code = secrets.token_hex(3)
@@ -132,33 +157,24 @@ def generate_verification_code(user_id):
 
 
 def send_telegram_message(chat_id, text):
-    """Отправка сообщения через Telegram Bot API"""
-    url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        'chat_id': chat_id,
-        'text': text,
-        'parse_mode': 'Markdown'
-    }
-
-    try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
+    """Ставит сообщение в очередь отправки Telegram (см. telegram_dispatch)"""
+    if enqueue_telegram_message(chat_id, text):
         return JsonResponse({'status': 'ok'})
-    except Exception as e:
-        logger.error(f"Error sending Telegram message: {str(e)}")
-        return JsonResponse({'status': 'error'}, status=500)
+    return JsonResponse({'status': 'error'}, status=500)
 
 
 def setup_telegram_webhook():
     """Настройка вебхука для Telegram бота"""
-    url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/setWebhook"
+    url = f"{settings.TELEGRAM_API_URL}/bot{settings.TELEGRAM_BOT_TOKEN}/setWebhook"
     payload = {
         'url': settings.TELEGRAM_WEBHOOK_URL,
-        'allowed_updates': ['message']
+        'allowed_updates': ['message'],
     }
+    if settings.TELEGRAM_WEBHOOK_SECRET:
+        payload['secret_token'] = settings.TELEGRAM_WEBHOOK_SECRET
 
     try:
-        response = requests.post(url, json=payload)
+        response = requests.post(url, json=payload, timeout=10)
         response.raise_for_status()
         logger.info("Telegram webhook setup successfully")
         return True
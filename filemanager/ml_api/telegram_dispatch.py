@@ -0,0 +1,179 @@
+# ml_api/telegram_dispatch.py
+"""
+Исходящие сообщения Telegram через очередь.
+
+Отправители (обработчики вебхука, задачи Celery) только кладут сообщение
+в список Redis. Отдельный асинхронный процесс (manage.py
+run_telegram_dispatcher) забирает сообщения и отправляет их через общий
+пул keep-alive соединений, соблюдая лимиты Bot API: около 30 сообщений
+в секунду на бота и 1 в секунду на чат. Ответы 429 повторяются после
+retry_after, сообщения одного чата уходят по порядку.
+
+Забранное сообщение перекладывается (BLMOVE) в список обрабатываемых и
+удаляется из него после отправки: сообщения, которые были в работе при
+падении или остановке, при следующем запуске возвращаются в очередь.
+Рассчитано на один процесс диспетчера.
+"""
+import asyncio
+import json
+import logging
+
+import httpx
+from django.conf import settings
+
+from filemanager.redis_client import get_redis, get_async_redis
+from .ratelimit import KeyedTokenBuckets, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = 'telegram:outbox'
+PROCESSING_KEY = 'telegram:processing'
+
+
+def enqueue_telegram_message(chat_id, text, parse_mode='Markdown'):
+    """Ставит сообщение в очередь отправки; не блокируется на Telegram"""
+    payload = {'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode, 'attempt': 0}
+    try:
+        get_redis().lpush(OUTBOX_KEY, json.dumps(payload))
+        return True
+    except Exception as e:
+        logger.error(f"Could not enqueue Telegram message for chat {chat_id}: {e}")
+        return False
+
+
+class TelegramDispatcher:
+    def __init__(self, api_url=None, token=None, concurrency=None, global_rate=None,
+                 chat_rate=None, max_attempts=None, client=None):
+        self.api_url = (api_url or settings.TELEGRAM_API_URL).rstrip('/')
+        self.token = token or settings.TELEGRAM_BOT_TOKEN
+        self.concurrency = concurrency or settings.TELEGRAM_DISPATCH_CONCURRENCY
+        self.max_attempts = max_attempts or settings.TELEGRAM_MAX_ATTEMPTS
+        self.global_bucket = TokenBucket(global_rate or settings.TELEGRAM_GLOBAL_RATE)
+        self.chat_buckets = KeyedTokenBuckets(chat_rate or settings.TELEGRAM_CHAT_RATE)
+        self._client = client
+        self._chats = {}  # chat_id -> [Lock, число ожидающих сообщений]
+        self._semaphore = None
+        self._stopping = False
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0, connect=3.0),
+                limits=httpx.Limits(
+                    max_connections=self.concurrency,
+                    max_keepalive_connections=self.concurrency,
+                ),
+            )
+        return self._client
+
+    async def send(self, message):
+        """
+        Отправляет одно сообщение с учетом лимитов.
+
+        Возвращает True при успехе и False, если сообщение отброшено.
+        """
+        chat_id = message['chat_id']
+        entry = self._chats.get(chat_id)
+        if entry is None:
+            entry = self._chats[chat_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            # Lock честный (FIFO): сообщения чата уходят в порядке постановки
+            async with entry[0]:
+                return await self._send_ordered(message)
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._chats.pop(chat_id, None)
+
+    async def _send_ordered(self, message):
+        chat_bucket = self.chat_buckets.get(message['chat_id'])
+        url = f"{self.api_url}/bot{self.token}/sendMessage"
+        payload = {key: message[key] for key in ('chat_id', 'text', 'parse_mode') if message.get(key)}
+
+        for attempt in range(message.get('attempt', 0), self.max_attempts):
+            # Чат, недавно получавший сообщения, мог упереться в свой лимит
+            chat_busy = not chat_bucket.idle()
+            await chat_bucket.acquire()
+            await self.global_bucket.acquire()
+            try:
+                response = await self._get_client().post(url, json=payload)
+            except httpx.HTTPError as e:
+                delay = min(2 ** attempt, 30)
+                logger.warning(f"Telegram request failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code == 429:
+                retry_after = self._retry_after(response)
+                logger.warning(f"Telegram rate limit for chat {message['chat_id']}, retry after {retry_after}s")
+                chat_bucket.pause(retry_after)
+                if not chat_busy:
+                    # Лимит чата не исчерпан - сработал общий лимит бота
+                    self.global_bucket.pause(retry_after)
+                continue
+            if response.status_code >= 500:
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+            if response.status_code >= 400:
+                logger.error(f"Telegram rejected message for chat {message['chat_id']}: {response.text}")
+                return False
+            return True
+
+        logger.error(f"Giving up on Telegram message for chat {message['chat_id']}")
+        return False
+
+    @staticmethod
+    def _retry_after(response):
+        try:
+            return float(response.json()['parameters']['retry_after'])
+        except (ValueError, KeyError, TypeError):
+            return float(response.headers.get('Retry-After', 1))
+
+    async def _handle(self, redis, raw):
+        try:
+            await self.send(json.loads(raw))
+        except Exception as e:
+            logger.error(f"Telegram dispatch error: {e}", exc_info=True)
+        finally:
+            await redis.lrem(PROCESSING_KEY, 1, raw)
+            self._semaphore.release()
+
+    async def recover(self, redis):
+        """Возвращает в очередь сообщения, оставшиеся в работе от прошлого запуска"""
+        recovered = 0
+        # Самые старые окажутся с того края, откуда очередь читается
+        while await redis.lmove(PROCESSING_KEY, OUTBOX_KEY, 'LEFT', 'RIGHT') is not None:
+            recovered += 1
+        if recovered:
+            logger.warning(f"Requeued {recovered} Telegram messages left in processing")
+        return recovered
+
+    async def run(self):
+        """Забирает сообщения из очереди, пока не вызван stop()"""
+        self._semaphore = asyncio.Semaphore(self.concurrency * 4)
+        redis = get_async_redis()
+        await self.recover(redis)
+        tasks = set()
+        try:
+            while not self._stopping:
+                await self._semaphore.acquire()
+                raw = await redis.blmove(OUTBOX_KEY, PROCESSING_KEY, 1, 'RIGHT', 'LEFT')
+                if raw is None:
+                    self._semaphore.release()
+                    continue
+                task = asyncio.create_task(self._handle(redis, raw))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            await self.aclose()
+
+    def stop(self):
+        self._stopping = True
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
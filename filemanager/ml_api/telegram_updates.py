@@ -0,0 +1,127 @@
+# ml_api/telegram_updates.py
+"""
+Поток входящих обновлений Telegram в Redis.
+
+Вебхук делает один вызов Redis (Lua-скрипт: SET NX для дедупликации по
+update_id и XADD) и сразу отвечает 200. Потребители читают поток через
+группу (XREADGROUP), обрабатывают обновления и подтверждают их XACK;
+зависшие у упавшего потребителя сообщения периодически забираются
+XAUTOCLAIM работающими потребителями.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from filemanager.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+UPDATES_STREAM = 'telegram:updates'
+CONSUMER_GROUP = 'telegram-handlers'
+DEDUPE_PREFIX = 'telegram:update'
+
+ENQUEUE_SCRIPT = """
+if redis.call('SET', KEYS[1], 1, 'NX', 'EX', ARGV[1]) then
+    return redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', 'update', ARGV[3])
+end
+return false
+"""
+
+
+def enqueue_update(update_id, body):
+    """
+    Кладет обновление в поток, если оно еще не принималось.
+
+    Возвращает id записи потока или None для повторной доставки.
+    """
+    script = get_redis().register_script(ENQUEUE_SCRIPT)
+    entry_id = script(
+        keys=[f"{DEDUPE_PREFIX}:{update_id}", UPDATES_STREAM],
+        args=[settings.TELEGRAM_UPDATE_DEDUPE_TTL, settings.TELEGRAM_UPDATES_MAXLEN, body],
+    )
+    return entry_id.decode() if entry_id else None
+
+
+class UpdateConsumerPool:
+    """Пул потоков, обрабатывающих обновления из группы потребителей"""
+
+    def __init__(self, handler, size=None, block_ms=5000, claim_idle_ms=60000, claim_interval=None, redis=None):
+        self.handler = handler
+        self.size = size or settings.TELEGRAM_CONSUMERS
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        # Проверка зависших обновлений - раз в половину порога простоя
+        self.claim_interval = claim_interval if claim_interval is not None else claim_idle_ms / 2000
+        self.redis = redis or get_redis()
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self._stop = threading.Event()
+
+    def ensure_group(self):
+        try:
+            self.redis.xgroup_create(UPDATES_STREAM, CONSUMER_GROUP, id='0', mkstream=True)
+        except Exception as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+
+    def process(self, entry_id, fields):
+        try:
+            self.handler(json.loads(fields[b'update']))
+        except Exception as e:
+            # Ошибка обработчика не должна зацикливать обновление
+            logger.error(f"Telegram update {entry_id} failed: {e}", exc_info=True)
+        finally:
+            close_old_connections()
+            self.redis.xack(UPDATES_STREAM, CONSUMER_GROUP, entry_id)
+
+    def claim_stale(self, consumer):
+        """Забирает обновления, которые другой потребитель взял и не подтвердил"""
+        start_id = '0-0'
+        while not self._stop.is_set():
+            next_id, entries, *_ = self.redis.xautoclaim(
+                UPDATES_STREAM, CONSUMER_GROUP, consumer, self.claim_idle_ms, start_id=start_id, count=100
+            )
+            for entry_id, fields in entries:
+                if fields:
+                    self.process(entry_id, fields)
+            start_id = next_id.decode() if isinstance(next_id, bytes) else next_id
+            if start_id == '0-0':
+                return
+
+    def consume(self, index):
+        consumer = f"{self.name}-{index}"
+        next_claim = 0
+        while not self._stop.is_set():
+            if time.monotonic() >= next_claim:
+                next_claim = time.monotonic() + self.claim_interval
+                try:
+                    self.claim_stale(consumer)
+                except Exception as e:
+                    logger.warning(f"Telegram consumer {consumer} claim failed: {e}")
+            try:
+                response = self.redis.xreadgroup(
+                    CONSUMER_GROUP, consumer, {UPDATES_STREAM: '>'}, count=10, block=self.block_ms
+                )
+            except Exception as e:
+                logger.warning(f"Telegram consumer {consumer} read failed: {e}")
+                self._stop.wait(1)
+                continue
+            for _, entries in response or []:
+                for entry_id, fields in entries:
+                    self.process(entry_id, fields)
+
+    def run(self):
+        self.ensure_group()
+        with ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='telegram-consumer') as executor:
+            futures = [executor.submit(self.consume, index) for index in range(self.size)]
+            for future in futures:
+                future.result()
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,150 @@
+# ml_api/timing.py
+"""
+Поэтапные замеры конвейера обработки.
+
+Задача открывает PipelineTimer, а функции services отмечают этапы через
+`with stage('tesseract'):` - без передачи таймера по цепочке вызовов
+(текущий таймер хранится в contextvar, у каждого гринлета gevent он
+свой). Вне задачи stage() ничего не делает.
+
+По завершении задачи длительности этапов попадают в гистограмму
+pipeline_stage_seconds с метками типа файла, очереди и исхода, а разбивка
+в миллисекундах - в metadata результата.
+
+Время ожидания в очереди считается по заголовку enqueued_at, который
+добавляется при публикации задачи (before_task_publish).
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from celery.exceptions import Retry
+from celery.signals import before_task_publish
+from django.conf import settings
+
+from .metrics import PIPELINE_STAGE_SECONDS, PIPELINE_TASK_SECONDS, QUEUE_WAIT_SECONDS
+
+ENQUEUED_AT_HEADER = 'enqueued_at'
+
+_current = ContextVar('pipeline_timer', default=None)
+
+
+@contextmanager
+def stage(name):
+    """Отмечает этап текущего таймера (повторные этапы суммируются)"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+def file_type_label(file_type):
+    """
+    Тип файла для метки метрик: pdf, image, docx, text или other.
+
+    Расширение берется из загрузки и не проверяется, поэтому в метку
+    попадает только фиксированный набор значений.
+    """
+    ext = f".{file_type.lower().lstrip('.')}"
+    if ext == '.pdf':
+        return 'pdf'
+    if ext in settings.SUPPORTED_IMAGE_TYPES:
+        return 'image'
+    if ext == '.docx':
+        return 'docx'
+    if ext in settings.SUPPORTED_TEXT_TYPES:
+        return 'text'
+    return 'other'
+
+
+class PipelineTimer:
+    def __init__(self, file_type='', queue=''):
+        self.file_type = file_type  # расширение; можно уточнить, когда файл прочитан
+        self.queue = queue
+        self.stages = {}
+        self.outcome = 'success'
+        self.queue_wait = None
+        self._started = None
+        self._token = None
+
+    @classmethod
+    def for_task(cls, task, file_type=''):
+        """Таймер задачи Celery: очередь и ожидание в ней берутся из запроса"""
+        timer = cls(file_type, task_queue(task.request))
+        timer.queue_wait = observe_queue_wait(task)
+        return timer
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0) + seconds
+
+    def breakdown(self):
+        """Разбивка для metadata результата: {этап: мс}, плюс ожидание в очереди и итог"""
+        timings = {name: round(seconds * 1000, 1) for name, seconds in self.stages.items()}
+        if self.queue_wait is not None:
+            timings['queue_wait'] = round(self.queue_wait * 1000, 1)
+        if self._started is not None:
+            timings['total'] = round((time.perf_counter() - self._started) * 1000, 1)
+        return timings
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.outcome = 'retry' if issubclass(exc_type, Retry) else 'error'
+        labels = (file_type_label(self.file_type), self.queue or 'unknown', self.outcome)
+        for name, seconds in self.stages.items():
+            PIPELINE_STAGE_SECONDS.labels(name, *labels).observe(seconds)
+        PIPELINE_TASK_SECONDS.labels(*labels).observe(time.perf_counter() - self._started)
+        return False
+
+
+def current_breakdown():
+    """Разбивка таймера текущей задачи ({} вне задачи)"""
+    timer = _current.get()
+    return timer.breakdown() if timer else {}
+
+
+def task_queue(request):
+    """Очередь, из которой получена задача ('' при eager-выполнении)"""
+    return (request.delivery_info or {}).get('routing_key') or ''
+
+
+def queue_wait(request):
+    """Секунды от публикации задачи до начала выполнения или None"""
+    enqueued_at = getattr(request, ENQUEUED_AT_HEADER, None)
+    if enqueued_at is None:
+        enqueued_at = (getattr(request, 'headers', None) or {}).get(ENQUEUED_AT_HEADER)
+    if enqueued_at is None:
+        return None
+    started = float(enqueued_at)
+    # Задача с countdown/eta ждет назначенного времени - это не очередь
+    eta = getattr(request, 'eta', None)
+    if eta:
+        started = max(started, datetime.fromisoformat(eta).timestamp())
+    return max(time.time() - started, 0)
+
+
+def observe_queue_wait(task):
+    """Пишет ожидание в очереди в гистограмму и возвращает его"""
+    wait = queue_wait(task.request)
+    if wait is not None:
+        QUEUE_WAIT_SECONDS.labels(task.name.rsplit('.', 1)[-1], task_queue(task.request) or 'unknown').observe(wait)
+    return wait
+
+
+@before_task_publish.connect
+def stamp_enqueued_at(headers=None, **kwargs):
+    """Время постановки в очередь (часы публикующего процесса)"""
+    if headers is not None:
+        # Перезаписывается и при повторе: ожидание считается от последней публикации
+        headers[ENQUEUED_AT_HEADER] = time.time()
@@ -1,9 +1,20 @@
 from django.urls import path
 
 from . import views
-from .views import PredictView, process_stored_file
+from .telegram import telegram_webhook
+from .views import (
+    PredictView, MLRequestListView, MLRequestDetailView, process_stored_file,
+    check_task_status, batch_status, entity_terms, entity_term_files,
+)
 
 urlpatterns = [
     path('api/ml/predict/', PredictView.as_view(), name='ml_predict'),
+    path('api/ml/requests/', MLRequestListView.as_view(), name='ml_requests'),
+    path('api/ml/requests/<int:pk>/', MLRequestDetailView.as_view(), name='ml_request_detail'),
     path('files/<int:file_id>/process/', process_stored_file, name='process_file'),
+    path('tasks/<str:task_id>/status/', check_task_status, name='check_task_status'),
+    path('api/status/', batch_status, name='batch_status'),
+    path('api/entities/', entity_terms, name='entity_terms'),
+    path('api/entities/<int:term_id>/files/', entity_term_files, name='entity_term_files'),
+    path('telegram/webhook/', telegram_webhook, name='telegram_webhook'),
 ]
\ No newline at end of file
@@ -9,18 +9,20 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
 from django.http import JsonResponse
 from django.conf import settings
-from django.core.cache import cache
 
-from .models import MLRequest, MLResult
-from .serializers import MLRequestSerializer
+from .models import MLRequest, MLResult, EntityTerm
+from .serializers import MLRequestSerializer, MLRequestSummarySerializer, EntityTermSerializer
+from .entities import search_terms, term_postings, MAX_TERM_RESULTS
 from core.models import StoredFile
+from core.pagination import paginate_keyset, InvalidCursor
 from .services import run_tesseract, run_spacy
 from .tasks import process_file_task, send_telegram_notification
-from filemanager.celery import AsyncResult
+from .status import fetch_task_states, fetch_file_states, MAX_BATCH_STATUS_IDS
+from .caching import MLCache
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +31,10 @@ SUPPORTED_IMAGE_TYPES = {'.png', '.jpg', '.jpeg', '.pdf', '.tiff', '.bmp'}
 SUPPORTED_TEXT_TYPES = {'.txt', '.docx', '.odt', '.rtf', '.csv'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 PROCESSING_TIMEOUT = 300  # 5 минут
+ML_REQUESTS_PAGE_SIZE = 50
+MAX_ML_REQUESTS_PAGE_SIZE = 200
+
+predict_cache = MLCache('predict', ttl=settings.ML_CACHE_TTL, stale_ttl=settings.ML_CACHE_STALE_TTL)
 
 
 def read_docx(file_path):
@@ -86,46 +92,39 @@ class PredictView(APIView):
         serializer = MLRequestSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        cache_key = f"ml_request_{request.user.id}_{str(serializer.validated_data)}"
-        cached_result = cache.get(cache_key)
-
-        if cached_result:
-            return Response(cached_result, status=status.HTTP_200_OK)
-
+        validated_data = serializer.validated_data
+        # Кешируется только предсказание; запрос записывается в историю всегда,
+        # в том числе при ответе из кеша
+        history = dict(user=request.user, request_type=request.data.get('type', 'unknown'),
+                       input_data=validated_data)
         try:
-            ml_request = MLRequest.objects.create(
-                user=request.user,
-                request_type=request.data.get('type', 'unknown'),
-                input_data=serializer.validated_data,
-                status='pending'
+            prediction, cache_result = predict_cache.get_or_compute(
+                (request.user.id, validated_data),
+                lambda: self._predict(validated_data),
             )
-
-            # В реальном проекте здесь будет вызов ML сервиса
-            result = {
-                "status": "success",
-                "prediction": {"example": "Mock result"},
-                "request_id": ml_request.id
-            }
-
-            ml_request.status = 'success'
-            ml_request.result = result
-            ml_request.save()
-
-            cache.set(cache_key, result, timeout=3600)  # Кешируем на 1 час
-
-            return Response(result, status=status.HTTP_201_CREATED)
-
         except Exception as e:
             logger.error(f"Prediction failed: {str(e)}", exc_info=True)
-            if 'ml_request' in locals():
-                ml_request.status = 'failed'
-                ml_request.error_message = str(e)
-                ml_request.save()
+            MLRequest.objects.create(**history, status='failed', error_message=str(e))
             return Response(
                 {"status": "error", "message": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+        ml_request = MLRequest.objects.create(**history, status='success', result=prediction)
+        result = {**prediction, "request_id": ml_request.id}
+
+        computed = cache_result in ('miss', 'wait_timeout')
+        response_status = status.HTTP_201_CREATED if computed else status.HTTP_200_OK
+        return Response(result, status=response_status, headers={'X-Cache': cache_result.upper()})
+
+    def _predict(self, validated_data):
+        """Предсказание без побочных эффектов: результат кешируется"""
+        # В реальном проекте здесь будет вызов ML сервиса
+        return {
+            "status": "success",
+            "prediction": {"example": "Mock result"},
+        }
+
 
 def _validate_file(file):
     """Расширенная валидация файла"""
@@ -168,7 +167,7 @@ def process_stored_file(request, file_id=None):
             "message": "Файл принят в обработку",
             "task_id": task.id,
             "queue": queue,
-            "monitor_url": f"/tasks/{task.id}/status/"
+            "monitor_url": reverse('check_task_status', args=[task.id])
         })
 
     except Exception as e:
@@ -184,18 +183,8 @@ def process_stored_file(request, file_id=None):
 def check_task_status(request, task_id):
     """Проверка статуса задачи с подробной информацией"""
     try:
-        task = AsyncResult(task_id)
-
-        response_data = {
-            "task_id": task_id,
-            "status": task.status,
-            "ready": task.ready(),
-            "successful": task.successful() if task.ready() else None,
-            "result": task.result if task.ready() and task.successful() else None,
-            "error": str(task.result) if task.ready() and task.failed() else None
-        }
-
-        return JsonResponse(response_data)
+        task_state = fetch_task_states([task_id])[task_id]
+        return JsonResponse({"task_id": task_id, **task_state})
 
     except Exception as e:
         return JsonResponse(
@@ -204,42 +193,135 @@ def check_task_status(request, task_id):
         )
 
 
+def _parse_ids(values, cast=str):
+    if isinstance(values, str):
+        values = values.split(',')
+    return [cast(value) for value in values if str(value).strip()]
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def batch_status(request):
+    """
+    Пакетная проверка статусов задач и файлов.
+
+    Принимает task_ids и/или file_ids (JSON-списки в POST или значения
+    через запятую в GET) и отвечает одной картой состояний.
+    """
+    source = request.data if request.method == 'POST' else request.GET
+    try:
+        task_ids = _parse_ids(source.get('task_ids') or [])
+        file_ids = _parse_ids(source.get('file_ids') or [], cast=int)
+    except (TypeError, ValueError):
+        return JsonResponse(
+            {"status": "error", "message": "task_ids и file_ids должны быть списками идентификаторов"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if len(task_ids) + len(file_ids) > MAX_BATCH_STATUS_IDS:
+        return JsonResponse(
+            {"status": "error", "message": f"Не более {MAX_BATCH_STATUS_IDS} идентификаторов за запрос"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return JsonResponse({
+        "tasks": fetch_task_states(task_ids),
+        "files": fetch_file_states(request.user, file_ids),
+    })
+
+
 def task_status_page(request, task_id):
     """HTML страница для отслеживания статуса задачи"""
-    task = AsyncResult(task_id)
+    task_state = fetch_task_states([task_id])[task_id]
 
     context = {
         'task_id': task_id,
-        'status': task.status,
-        'result': task.result if task.ready() else None,
-        'ready': task.ready(),
-        'successful': task.successful() if task.ready() else None
+        'status': task_state['status'],
+        'result': task_state['result'] or task_state['error'],
+        'ready': task_state['ready'],
+        'successful': task_state['successful']
     }
 
     return render(request, 'ml_api/task_status.html', context)
 
 
 class MLRequestListView(APIView):
-    """Список запросов с расширенной фильтрацией"""
+    """
+    Список запросов с расширенной фильтрацией.
+
+    Строки списка не содержат input_data и result (колонки не читаются из
+    БД), полные данные отдает MLRequestDetailView. Пагинация keyset по
+    (created_at, id): ?cursor= из next_cursor предыдущей страницы.
+    """
     permission_classes = [IsAuthenticated]
-    pagination_class = PageNumberPagination
 
     def get(self, request):
-        queryset = MLRequest.objects.filter(user=request.user)
+        queryset = MLRequest.objects.filter(user=request.user).defer('input_data', 'result', 'error_message')
 
         # Фильтрация по типу
         if request_type := request.GET.get('type'):
             queryset = queryset.filter(request_type=request_type)
 
         # Фильтрация по статусу
-        if status := request.GET.get('status'):
-            queryset = queryset.filter(status=status)
-
-        queryset = queryset.select_related('result').order_by('-created_at')
-        paginator = self.pagination_class()
-        page = paginator.paginate_queryset(queryset, request)
-        serializer = MLRequestSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        if request_status := request.GET.get('status'):
+            queryset = queryset.filter(status=request_status)
+
+        try:
+            page_size = min(int(request.GET.get('page_size', ML_REQUESTS_PAGE_SIZE)), MAX_ML_REQUESTS_PAGE_SIZE)
+            page = paginate_keyset(queryset, cursor=request.GET.get('cursor'),
+                                   page_size=max(page_size, 1), date_field='created_at')
+        except (ValueError, InvalidCursor):
+            return Response({"status": "error", "message": "Некорректный курсор или размер страницы"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        next_url = None
+        if page.has_next:
+            params = request.GET.copy()
+            params['cursor'] = page.next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+        return Response({
+            'next': next_url,
+            'next_cursor': page.next_cursor,
+            'results': MLRequestSummarySerializer(page.object_list, many=True).data,
+        })
+
+
+class MLRequestDetailView(APIView):
+    """Полные данные одного запроса, включая входные данные и результат"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        ml_request = get_object_or_404(MLRequest, pk=pk, user=request.user)
+        return Response(MLRequestSerializer(ml_request).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def entity_terms(request):
+    """Поиск сущностей пользователя по префиксу с количеством файлов и упоминаний"""
+    try:
+        limit = min(int(request.GET.get('limit', MAX_TERM_RESULTS)), MAX_TERM_RESULTS)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    terms = search_terms(
+        request.user,
+        prefix=request.GET.get('q', ''),
+        entity_type=request.GET.get('type'),
+        limit=max(limit, 1),
+    )
+    return Response({'results': EntityTermSerializer(terms, many=True).data})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def entity_term_files(request, term_id):
+    """Файлы, в которых встречается сущность, со смещениями упоминаний"""
+    term = get_object_or_404(EntityTerm, id=term_id, user=request.user)
+    return Response({
+        'term': EntityTermSerializer(term).data,
+        'files': term_postings(term),
+    })
 
 
 @api_view(['POST'])
@@ -8,24 +8,12 @@ from typing import Dict, Any, List, Optional
 from spacy.lang.ru import Russian
 from spacy.tokens import Doc
 
+from .extraction import extract_dates, extract_money
+
 # Загрузка моделей
 nlp = spacy.load("ru_core_news_sm")
 nlp_en = spacy.load("en_core_web_sm")
 
-# Регулярные выражения для извлечения данных
-DATE_PATTERNS = [
-    r'\d{1,2}\.\d{1,2}\.\d{2,4}',
-    r'\d{1,2}/\d{1,2}/\d{2,4}',
-    r'\d{1,2}\s+[а-я]+\s+\d{4}'
-]
-
-MONEY_PATTERNS = [
-    r'\d+\s*[рр]уб[\w]*',
-    r'\$\s*\d+',
-    r'\d+\s*евро',
-    r'\d+\s*USD'
-]
-
 
 def detect_language(text: str) -> str:
     """Определение языка текста"""
@@ -33,22 +21,6 @@ def detect_language(text: str) -> str:
     return 'ru' if cyrillic / len(text) > 0.3 else 'en' if text else 'unknown'
 
 
-def extract_dates(text: str) -> List[str]:
-    """Извлечение дат из текста"""
-    dates = []
-    for pattern in DATE_PATTERNS:
-        dates.extend(re.findall(pattern, text))
-    return dates
-
-
-def extract_money(text: str) -> List[str]:
-    """Извлечение денежных сумм"""
-    amounts = []
-    for pattern in MONEY_PATTERNS:
-        amounts.extend(re.findall(pattern, text, re.IGNORECASE))
-    return amounts
-
-
 def analyze_sentiment(text: str, lang: str = 'ru') -> Dict[str, Any]:
     """Простой анализ тональности текста"""
     positive_words_ru = ['хорош', 'отличн', 'прекрасн', 'рекоменд', 'довол']
@@ -79,6 +51,22 @@ def analyze_sentiment(text: str, lang: str = 'ru') -> Dict[str, Any]:
     }
 
 
+def extract_entities(text: str, language: str) -> tuple[List[Dict[str, Any]], List[str]]:
+    """Именованные сущности и ключевые слова (первые 5 существительных)"""
+    nlp_model = nlp if language == 'ru' else nlp_en
+    doc = nlp_model(text)
+    entities = [
+        {"text": ent.text, "lemma": ent.lemma_, "type": ent.label_,
+         "start": ent.start_char, "end": ent.end_char}
+        for ent in doc.ents
+    ]
+    keywords = [
+                   token.text for token in doc
+                   if token.pos_ in ['NOUN', 'PROPN'] and len(token.text) > 3
+               ][:5]
+    return entities, keywords
+
+
 def run_tesseract(file_content: bytes) -> Dict[str, Any]:
     """Улучшенная обработка изображений с дополнительным анализом"""
     try:
@@ -102,15 +90,19 @@ def run_tesseract(file_content: bytes) -> Dict[str, Any]:
         dates = extract_dates(text)
         money = extract_money(text)
         sentiment = analyze_sentiment(text, language) if len(text.split()) > 5 else None
+        # NER распознанного текста - в том же запросе, без второго обращения клиента
+        entities, keywords = extract_entities(text, language) if text.strip() else ([], [])
 
         return {
             "status": "success",
             "text": text.strip(),
+            "entities": entities,
             "analysis": {
                 "language": language,
                 "dates": dates,
                 "money_amounts": money,
                 "sentiment": sentiment,
+                "keywords": keywords,
                 "processing": "grayscale+contrast+threshold"
             }
         }
@@ -124,30 +116,15 @@ def run_tesseract(file_content: bytes) -> Dict[str, Any]:
 def run_spacy(text: str) -> Dict[str, Any]:
     """Улучшенная обработка текста с извлечением сущностей и анализом"""
     try:
-        # Определение языка и выбор модели
+        # Определение языка и извлечение сущностей
         language = detect_language(text)
-        nlp_model = nlp if language == 'ru' else nlp_en
-
-        # Обработка текста
-        doc = nlp_model(text)
-
-        # Извлечение сущностей
-        entities = [
-            {"text": ent.text, "type": ent.label_, "start": ent.start_char, "end": ent.end_char}
-            for ent in doc.ents
-        ]
+        entities, keywords = extract_entities(text, language)
 
         # Дополнительный анализ
         dates = extract_dates(text)
         money = extract_money(text)
         sentiment = analyze_sentiment(text, language) if len(text.split()) > 5 else None
 
-        # Ключевые слова (первые 5 существительных)
-        keywords = [
-                       token.text for token in doc
-                       if token.pos_ in ['NOUN', 'PROPN'] and len(token.text) > 3
-                   ][:5]
-
         return {
             "status": "success",
             "entities": entities,
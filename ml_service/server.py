@@ -145,6 +145,9 @@ async def process_image_content(filename: str, content: bytes) -> Dict[str, Any]
             "result": result
         }
 
+    except HTTPException:
+        # 422 - отказ по содержимому: клиент не должен повторять запрос
+        raise
     except Exception as e:
         logger.error(f"Ошибка обработки изображения {filename}: {str(e)}")
         raise HTTPException(
@@ -180,6 +183,8 @@ async def process_text_content(filename: str, content: bytes) -> Dict[str, Any]:
             "result": result
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Ошибка обработки текста {filename}: {str(e)}")
         raise HTTPException(